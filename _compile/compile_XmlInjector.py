@@ -1,4 +1,4 @@
-# compile.sh version 2.0.25
+# compile.sh version 2.0.29
 # This file searches from the parent directory for 'modinfo.py' in it or in any subdirectory.
 # Make sure to have only one 'modinfo.py' in your project directory. The first found 'modinfo.py' is used and loaded.
 
@@ -14,12 +14,15 @@ import os
 import re
 import ast
 import sys
+import json
 import shutil
+import hashlib
 import zipfile
-from typing import Tuple, Dict, Any
-from datetime import date
+from concurrent.futures import Future
+from typing import Tuple, Dict, Any, List
 
-from Utilities.unpyc3_compiler import Unpyc3PythonCompiler
+import compile_utils
+from compile_utils import OPTIMIZE, compress, get_executor, get_method, get_pyc, make_ts4script, write_zip
 
 
 additional_directories: Tuple = ()
@@ -30,6 +33,7 @@ file_appendix = ''
 auto_beta = True
 exclude_dependencies = ()
 exclude_mac_directories: Tuple = ()
+build_workers = 0
 
 with open('compile.ini', 'rt') as fp:
     cfg: Dict[str, Any] = ast.literal_eval(fp.read())
@@ -41,6 +45,7 @@ with open('compile.ini', 'rt') as fp:
     auto_beta = cfg.get('auto_beta', auto_beta)
     exclude_dependencies = cfg.get('exclude_dependencies', exclude_dependencies)
     exclude_mac_directories = cfg.get('exclude_mac_directories', exclude_mac_directories)
+    build_workers = cfg.get('build_workers', build_workers) or os.cpu_count() or 1
 
 
 beta_appendix = "-beta"  # or "-test-build"
@@ -104,7 +109,6 @@ except Exception as e:
 
 release_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(os.getcwd()))), 'Release')
 mod_base_directory = os.path.join(release_directory, mod_name)
-ts4_directory = os.path.join(mod_base_directory, 'Mods', f"_{author}_")
 src_folder = os.path.join(os.path.dirname(os.path.abspath(os.getcwd())), '_TS4')
 
 # Add version to mod_documentation/{mod_directory}/version.txt
@@ -127,14 +131,7 @@ with open(modinfo, 'rt', encoding='UTF-8') as fp:
             else:
                 modinfo_data += f"{line}\n"
 
-version_file = os.path.join(mod_base_directory, 'mod_documentation', mod_directory, 'version.txt')
 version_info = f"{mod_name} v{version} for The Sims 4 v{game_version} and S4CL v{s4cl_version}"
-if os.path.exists(version_file):
-    fp = open(version_file, 'rt', encoding='UTF-8')
-    current_version_info = fp.readline().strip()
-    if current_version_info == version_info:
-        print(f"'{version_info}' already exists. Skipping creation!")
-        exit(101)
 
 if add_readme:
     file_readme = os.path.join('..', '.private', 'README.md')
@@ -164,20 +161,96 @@ if add_readme:
         print(f"Files missing: {file_readme} or {gitignore} or {file_footer}")
         exit(1)
 
-if os.path.exists(mod_base_directory):
-    shutil.rmtree(mod_base_directory)
 
+# Content hash cache
+# 'files' maps each input file to [size, mtime_ns, sha256] so unchanged files are not read again,
+# 'key' is the hash of all inputs and settings of the last build, including both build scripts,
+# the Python version and the optimization level.
+# The cached '.pyc' and deflated files are also named by the hash of 'compile_utils.py'.
+_mod_src_directory = os.path.dirname(os.path.abspath(os.getcwd()))
+build_cache_directory = os.path.join(release_directory, '.build_cache', mod_name)
+build_cache_file = os.path.join(build_cache_directory, 'build_cache.json')
+pyc_cache_directory = os.path.join(build_cache_directory, 'pyc')
+deflate_cache_directory = os.path.join(build_cache_directory, 'deflate')
+version_file_name = f"mod_documentation/{mod_directory}/version.txt"
+
+build_cache: Dict[str, Any] = {}
+if os.path.exists(build_cache_file):
+    try:
+        with open(build_cache_file, 'rt', encoding='UTF-8') as fp:
+            build_cache = json.load(fp)
+    except Exception as e:
+        print(f"Ignoring build cache ({e}).")
+cached_files: Dict[str, List] = build_cache.get('files', {})
+hashed_files: Dict[str, List] = {}
 
+
+def get_hash(file_path: str) -> str:
+    stat = os.stat(file_path)
+    cached = cached_files.get(file_path, None)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        sha = cached[2]
+    else:
+        with open(file_path, 'rb') as fp_r:
+            sha = hashlib.sha256(fp_r.read()).hexdigest()
+    hashed_files[file_path] = [stat.st_size, stat.st_mtime_ns, sha]
+    return sha
+
+
+def get_files(directory: str, packages_only: bool = False) -> List[Tuple[str, str]]:
+    # Sorted (relative name with '/', path) of all files in directory, skipping hidden files and '__pycache__'
+    # With packages_only only the '.py' files of directories with an '__init__.py' are returned (like PyZipFile.writepy())
+    _files = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__' and not d.startswith('.'))
+        if packages_only:
+            if init_py not in files:
+                dirs[:] = []
+                continue
+            files = [f for f in files if f.endswith('.py')]
+        for file in sorted(files):
+            if file.startswith('.'):
+                continue
+            file_path = os.path.join(root, file)
+            _files.append((os.path.relpath(file_path, directory).replace(os.sep, '/'), file_path))
+    return _files
+
+
+def is_excluded(name: str) -> bool:
+    for exclude_folder in exclude_folders:
+        exclude_folder = exclude_folder.replace(os.sep, '/').strip('/')
+        if name == exclude_folder or name.startswith(f"{exclude_folder}/"):
+            return True
+    return False
+
+
+# Entries of the release ZIP without the ts4script: (name in the ZIP, path)
+assets: List[Tuple[str, str]] = []
 for folder in ['mod_data', 'mod_documentation', 'Mods', 'mod_sources']:
-    try:
-        if os.path.exists(os.path.join(src_folder, folder)):
-            try:
-                shutil.rmtree(os.path.join(mod_base_directory, folder))
-            except:
-                pass
-            shutil.copytree(os.path.join(src_folder, folder), os.path.join(mod_base_directory, folder))
-    except:
-        print(f"WARNING: Remove the folder {os.path.join(mod_base_directory, folder)} to update the data.")
+    for name, file_path in get_files(os.path.join(src_folder, folder)):
+        name = f"{folder}/{name}"
+        if name != version_file_name:
+            assets.append((name, file_path))
+if include_sources:
+    for folder in (mod_directory,) + additional_directories:
+        for name, file_path in get_files(os.path.join(_mod_src_directory, folder)):
+            assets.append((f"mod_sources/{mod_name}/{folder}/{name}", file_path))
+assets = [(name, file_path) for name, file_path in assets if not is_excluded(name)]
+
+# Modules of the ts4script: (name in the ts4script, path)
+modules: Dict[str, List[Tuple[str, str]]] = {}
+for folder in (mod_directory,) + additional_directories:
+    modules[folder] = [(f"{folder}/{name}", file_path) for name, file_path in get_files(os.path.join(_mod_src_directory, folder), packages_only=True)]
+
+utils_hash = get_hash(os.path.abspath(compile_utils.__file__))[:16]
+build_hash = hashlib.sha256()
+build_hash.update(repr((version_info, cfg, sys.version, OPTIMIZE)).encode('UTF-8'))
+for name, file_path in assets + [module for folder in modules for module in modules[folder]]:
+    build_hash.update(f"{name}\0{get_hash(file_path)}\0".encode('UTF-8'))
+for script in (os.path.abspath(__file__), os.path.abspath(compile_utils.__file__)):
+    with open(script, 'rb') as fp:
+        build_hash.update(fp.read())
+build_key = build_hash.hexdigest()
 
 zip_file_name = os.path.join(release_directory, f"{mod_name}")
 if version:
@@ -186,97 +259,119 @@ if version:
         if re.match(r"^(?:0|(?:0|[1-9][0-9]*)\.[0-9]*[13579])(?:\.[0-9]+)*$", version):
             zip_file_name = f"{zip_file_name}{beta_appendix}"
 zip_file_name = f"{zip_file_name}{file_appendix}"
+zip_files = [f"{zip_file_name}.zip"]
+if exclude_mac_directories:
+    zip_files.append(f"{zip_file_name}_Mac.zip")
 
-# Add version info
-with open(version_file, 'wt', encoding='UTF-8') as fp:
-    fp.write(f"{version_info}\n")
-    fp.write(f"Created on {date.today()}\n")
-    fp.write(f"{modinfo_data}\n")
+if build_cache.get('key', None) == build_key and all(os.path.exists(zip_file) for zip_file in zip_files) and os.path.exists(mod_base_directory):
+    print(f"'{version_info}' is unchanged. Skipping creation!")
+    exit(101)
 
+# Add version info, without the date to keep the ZIP files reproducible
+version_data = f"{version_info}\n{modinfo_data}\n"
 # Save version also to _TS4:
 version_file = os.path.join(src_folder, 'mod_documentation', mod_directory, 'version.txt')
+os.makedirs(os.path.dirname(version_file), exist_ok=True)
 with open(version_file, 'wt', encoding='UTF-8') as fp:
-    fp.write(f"{version_info}\n")
-    fp.write(f"Created on {date.today()}\n")
-    fp.write(f"{modinfo_data}\n")
+    fp.write(version_data)
+if not is_excluded(version_file_name):
+    assets.append((version_file_name, version_data.encode('UTF-8')))
 
-# Add source
-if include_sources:
-    _mod_src_directory = os.path.dirname(os.path.abspath(os.getcwd()))
-    for folder in (mod_directory,) + additional_directories:
-        try:
-            shutil.copytree(os.path.join(_mod_src_directory, folder),
-                            os.path.join(mod_base_directory, 'mod_sources', mod_name, folder),
-                            ignore=shutil.ignore_patterns('__pycache__', '.*'))
-        except Exception as e:
-            print(f"{e}")
-            print(
-                f"WARNING: Remove the folder {os.path.join(mod_base_directory, 'mod_sources', mod_name, folder)} to update the data.")
 
 # Compile
-os.makedirs(ts4_directory, exist_ok=True)
-print(f"Compiling '{mod_directory}' and {additional_directories} in '{ts4_directory}'")
-
-Unpyc3PythonCompiler.compile_mod(
-    names_of_modules_include=(mod_directory,) + additional_directories,
-    folder_path_to_output_ts4script_to=ts4_directory,
-    output_ts4script_name=f"{mod_directory}_win"
-)
-if exclude_mac_directories:
-    _directories = (mod_directory,) + additional_directories
-    _mac_directories = set()
-    for _d in _directories:
-        if _d not in exclude_mac_directories:
-            _mac_directories.add(_d)
-    mac_directories = tuple(_mac_directories)
-    Unpyc3PythonCompiler.compile_mod(
-        names_of_modules_include=mac_directories,
-        folder_path_to_output_ts4script_to=ts4_directory,
-        output_ts4script_name=f"{mod_directory}_mac"
-    )
-
-
-for exclude_folder in exclude_folders:
-    try:
-        if os.path.exists(os.path.join(mod_base_directory, exclude_folder)):
-            print(f"Excluding (removing) '{exclude_folder}'")
-            shutil.rmtree(os.path.join(mod_base_directory, exclude_folder))
-    except Exception as e:
-        print(f"WARNING: Error {e} deleting the folder")
-
-
-def make_zip_excluding(output_filename, source_dir, exclude_files):
-    with zipfile.ZipFile(output_filename, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                filepath = os.path.join(root, file)
-                filename = os.path.basename(filepath)
-                if filename in exclude_files:
-                    continue
-                relpath = os.path.relpath(filepath, source_dir)
-                if relpath in exclude_files:
-                    continue
-                zf.write(filepath, relpath)
-
-
-# shutil.make_archive(os.path.join(release_directory, f"{zip_file_name}"), 'zip', mod_base_directory)
-ts4script = os.path.join(ts4_directory, f"{mod_directory}.ts4script")
-ts4script_win = os.path.join(ts4_directory, f"{mod_directory}_win.ts4script")
-ts4script_mac = os.path.join(ts4_directory, f"{mod_directory}_mac.ts4script")
-
-if exclude_mac_directories:
-    os.link(ts4script_mac, ts4script)
-    make_zip_excluding(os.path.join(release_directory, f"{zip_file_name}_Mac.zip"), mod_base_directory, exclude_files={f"{mod_directory}_win.ts4script", f"{mod_directory}_mac.ts4script"})
-    os.unlink(ts4script)
-    print(f'Created {os.path.join(release_directory, f"{zip_file_name}_Mac.zip")}')
-
-os.link(ts4script_win, ts4script)
-make_zip_excluding(os.path.join(release_directory, f"{zip_file_name}.zip"), mod_base_directory, exclude_files={f"{mod_directory}_win.ts4script", f"{mod_directory}_mac.ts4script"})
-print(f'Created {os.path.join(release_directory, f"{zip_file_name}.zip")}')
+# Each module is compiled once per content hash to 'pyc_cache_directory', unchanged modules reuse the cached '.pyc'.
+# The modules are compiled by the workers while the assets are compressed. The Windows and Mac ts4script
+# are built from the '.pyc' files after all modules have been compiled, no module is compiled twice.
+# Deflated ZIP members are cached by content hash in 'deflate_cache_directory'.
+os.makedirs(pyc_cache_directory, exist_ok=True)
+os.makedirs(deflate_cache_directory, exist_ok=True)
+used_pycs = set()
+used_deflates = set()
+
+
+def get_modules(folders: Tuple) -> List[Tuple[str, str, str]]:
+    _modules = []
+    for folder in folders:
+        for name, file_path in modules[folder]:
+            pyc_key = hashlib.sha256(f"{name}\0{get_hash(file_path)}\0{sys.version_info[:2]}\0{OPTIMIZE}\0{utils_hash}".encode('UTF-8')).hexdigest()
+            pyc = os.path.join(pyc_cache_directory, f"{pyc_key}.pyc")
+            used_pycs.add(os.path.basename(pyc))
+            _modules.append((name, file_path, pyc))
+    return _modules
+
+
+def get_members(entries: List[Tuple[str, Any]]) -> List[Tuple[str, Future]]:
+    members = []
+    for name, data in entries:
+        sha = hashlib.sha256(data).hexdigest() if isinstance(data, bytes) else get_hash(data)
+        used_deflates.add(f"{sha}_{utils_hash}.deflate")
+        members.append((name, executor.submit(compress, data, get_method(name), os.path.join(deflate_cache_directory, f"{sha}_{utils_hash}.deflate"))))
+    return members
+
+
+print(f"Compiling '{mod_directory}' and {additional_directories} with {build_workers} workers")
+ts4script_name = f"Mods/_{author}_/{mod_directory}.ts4script"
+with get_executor(build_workers) as executor:
+    platform_modules = {'': (f"{mod_directory}_win.ts4script", get_modules((mod_directory,) + additional_directories))}
+    if exclude_mac_directories:
+        mac_directories = tuple(_d for _d in (mod_directory,) + additional_directories if _d not in exclude_mac_directories)
+        platform_modules['_Mac'] = (f"{mod_directory}_mac.ts4script", get_modules(mac_directories))
+    pycs = {}
+    for _, _modules in platform_modules.values():
+        for name, file_path, pyc in _modules:
+            if pyc not in pycs:
+                pycs[pyc] = executor.submit(get_pyc, name, file_path, pyc)
+    asset_members = get_members(assets)
+    print(f"Compiled {sum(compiled.result() for compiled in pycs.values())} of {len(pycs)} modules")
+    ts4scripts = {suffix: executor.submit(make_ts4script, os.path.join(build_cache_directory, file_name), _modules)
+                  for suffix, (file_name, _modules) in platform_modules.items()}
+    zip_members = {}
+    for suffix, ts4script in ts4scripts.items():
+        ts4script_file = ts4script.result()
+        zip_members[suffix] = asset_members if is_excluded(ts4script_name) else asset_members + get_members([(ts4script_name, ts4script_file)])
+    for suffix, members in zip_members.items():
+        write_zip(f"{zip_file_name}{suffix}.zip", [(name, member.result()) for name, member in members])
+        print(f'Created {zip_file_name}{suffix}.zip')
+
+# The extracted release in 'Release/{mod_name}', as before the ZIP files were written directly
+if os.path.exists(mod_base_directory):
+    shutil.rmtree(mod_base_directory)
+with zipfile.ZipFile(zip_files[0]) as zf:
+    zf.extractall(mod_base_directory)
+
+for pyc_file in os.listdir(pyc_cache_directory):
+    if pyc_file not in used_pycs:
+        os.unlink(os.path.join(pyc_cache_directory, pyc_file))
+for deflate_file in os.listdir(deflate_cache_directory):
+    if deflate_file not in used_deflates:
+        os.unlink(os.path.join(deflate_cache_directory, deflate_file))
+
+build_cache = {'key': build_key, 'files': hashed_files}
+with open(build_cache_file, 'wt', encoding='UTF-8') as fp:
+    json.dump(build_cache, fp)
 exit(100)
 
 
 r'''
+v2.0.29
+    Reproducible ZIP files: entries sorted by name, fixed timestamps (1980-01-01) and permissions (0644).
+    The 'Created on' date has been removed from version.txt.
+    'Release/{mod_name}' is extracted from the Windows ZIP file again.
+    '.package', '.pdf' and other compressed files are stored, not deflated again.
+    Deflated entries are cached by content hash in 'Release/.build_cache/{mod_name}/deflate/'.
+    The build key includes 'compile_utils.py', the Python version and the optimization level. Cached '.pyc' and deflated
+    files are named with the hash of 'compile_utils.py', a changed ZIP writer or compiler option does not reuse them.
+    The modules are compiled with optimization level 0, the level of Unpyc3PythonCompiler.
+v2.0.28
+    Build the Windows and Mac ts4script in separate workers and compress the ZIP members in parallel.
+    Each module is compiled once, before the ts4script of each platform is built from the '.pyc' files.
+    'build_workers' in compile.ini sets the number of worker threads (default 0: number of CPUs).
+    The ZIP files are identical for any number of workers.
+v2.0.27
+    Incremental build with a content hash cache in 'Release/.build_cache/{mod_name}/' instead of the 'version.txt' check.
+    A new ZIP is only created if a source, an asset, the versions or 'compile.ini' changed.
+    Only changed modules are compiled (to '.pyc' files kept in the cache), the Release/{mod_name} copy is no longer created,
+    the files are written directly from '_TS4' and the sources to the ZIP.
 v2.0.26
     Add 'exclude_mac_directories' to build for Mac without Windows specific folders
 v2.0.25
@@ -0,0 +1,108 @@
+# compile_utils.py for compile.sh version 2.0.29
+# Functions used by 'compile_XmlInjector.py' which run in worker threads.
+# Worker threads are used instead of processes as 'spawn' (Windows) would run the build script again in
+# every worker. zlib releases the GIL while it compresses, so the compression still runs in parallel.
+# get_pyc() is called once per '.pyc' file, make_ts4script() only reads the compiled files, so no two
+# workers write the same file of the '.pyc' cache.
+# The ZIP files are reproducible: sorted entries, fixed timestamps and permissions.
+
+
+import os
+import struct
+import zlib
+import threading
+import py_compile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FILE_PERMISSIONS = 0o100644
+OPTIMIZE = 0  # py_compile optimization level of the modules as with Unpyc3PythonCompiler (asserts and docstrings are kept), part of the build key
+# Already compressed files are stored
+STORED_EXTENSIONS = ('.package', '.pdf', '.png', '.jpg', '.jpeg', '.zip', '.gz')
+
+
+def get_executor(workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max(1, workers))
+
+
+def read(data: Any) -> bytes:
+    # data is a path or the bytes
+    if isinstance(data, bytes):
+        return data
+    with open(data, 'rb') as fp:
+        return fp.read()
+
+
+def get_method(name: str) -> int:
+    return METHOD_STORED if name.lower().endswith(STORED_EXTENSIONS) else METHOD_DEFLATED
+
+
+def compress(data: Any, method: int = METHOD_DEFLATED, cache_file: str = None) -> Tuple[int, int, int, bytes]:
+    # Returns (method, crc, size, compressed data) of a ZIP member
+    # Deflated data is kept in cache_file (crc, size, compressed data), named by the content hash of data.
+    if method == METHOD_DEFLATED and cache_file and os.path.exists(cache_file):
+        cached = read(cache_file)
+        crc, size = struct.unpack('<II', cached[:8])
+        return method, crc, size, cached[8:]
+    raw = read(data)
+    crc = zlib.crc32(raw) & 0xffffffff
+    if method == METHOD_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(raw) + compressor.flush()
+        if cache_file:
+            tmp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as fp:
+                fp.write(struct.pack('<II', crc, len(raw)))
+                fp.write(compressed)
+            os.replace(tmp_file, cache_file)
+    else:
+        compressed = raw
+    return method, crc, len(raw), compressed
+
+
+def write_zip(output_filename: str, members: List[Tuple[str, Tuple[int, int, int, bytes]]]):
+    # Write the members (name, compressed member) sorted by name.
+    # The ZIP is written to a temporary file and replaced when complete.
+    tmp_filename = f"{output_filename}.tmp"
+    central_directory = b''
+    date_time = FIXED_DATE_TIME
+    dos_time = (date_time[3] << 11) | (date_time[4] << 5) | (date_time[5] // 2)
+    dos_date = ((date_time[0] - 1980) << 9) | (date_time[1] << 5) | date_time[2]
+    with open(tmp_filename, 'wb') as fp:
+        for name, (method, crc, size, compressed) in sorted(members, key=lambda member: member[0]):
+            _name = name.encode('UTF-8')
+            flags = 0x800 if not name.isascii() else 0
+            offset = fp.tell()
+            if max(offset, size, len(compressed)) >= 0xffffffff:
+                raise ValueError(f"'{name}' exceeds the ZIP size limit")
+            fp.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, flags, method, dos_time, dos_date, crc, len(compressed), size, len(_name), 0))
+            fp.write(_name)
+            fp.write(compressed)
+            # Made by 'Unix' (3) to store the permissions
+            central_directory += struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | 20, 20, flags, method, dos_time, dos_date, crc, len(compressed), size,
+                                             len(_name), 0, 0, 0, 0, FILE_PERMISSIONS << 16, offset)
+            central_directory += _name
+        offset = fp.tell()
+        fp.write(central_directory)
+        fp.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(members), len(members), len(central_directory), offset, 0))
+    os.replace(tmp_filename, output_filename)
+
+
+def get_pyc(name: str, file_path: str, pyc: str) -> bool:
+    # Compile file_path to pyc unless it exists, returns True if it was compiled
+    if os.path.exists(pyc):
+        return False
+    py_compile.compile(file_path, cfile=pyc, dfile=name, doraise=True, optimize=OPTIMIZE,
+                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    return True
+
+
+def make_ts4script(output_filename: str, modules: List[Tuple[str, str, str]]) -> str:
+    # modules: (name, path, pyc) of the modules compiled with get_pyc(), returns output_filename
+    members = [(f"{name[:-3]}.pyc", compress(pyc, METHOD_STORED)) for name, _, pyc in modules]
+    write_zip(output_filename, members)
+    return output_filename
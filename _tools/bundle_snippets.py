@@ -0,0 +1,369 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Merges many XmlInjector snippets into one snippet with the same result in game.
+# Every snippet is a tuning instance of its own which the game has to parse and process, a pack of
+# fifty small snippets repeats the same object selections and additions many times.
+#
+# The input are snippet .xml files, .package files and directories containing them. The entries are
+# merged the same way the injector processes them:
+#   add_interactions_to_objects and add_lock_aware_interactions_to_lockable_objects
+#       - one entry per identical object_selection, the interactions are unique
+#   add_interactions_to_sims, _phones, _relationship_panel - one list, the interactions are unique
+#   add_mixer_interactions - the mixers are collected per AffordanceList (unique), AffordanceLists with
+#       the same mixers share one entry
+#   add_purchase_list_options_to_interactions, add_picker_dialog_categories_to_interactions - collected
+#       per interaction, interactions with the same additions share one entry. Categories are unique by tag,
+#       the first one is kept.
+#   add_to_loot_actions, add_to_random_loot_actions - one entry per loot, loot ops with the same XML are
+#       added once (the injector merges them by their tuned values, see 'merge_duplicate_loot')
+#   add_buffs_to_trait - one entry per trait, buffs are unique by buff_type, the first one is kept
+#   add_satisfaction_store_rewards - one entry, a later reward overrides an earlier one with the same key
+#   add_name_component_to_objects, add_object_relationships_to_objects - identical entries are dropped
+#   add_states_to_objects - entries are kept as they are
+# The entries keep the order of their first occurrence, input files are read sorted by path.
+# Snippets are identified by their instance id ('s'), the game loads one copy of an instance. A snippet
+# found again (e.g. as .xml and in a .package) is skipped.
+# An entry which fails in game is reverted as a whole, for a merged entry this includes the additions
+# of all bundled snippets. Remove the bundled snippets from the pack when shipping the bundle.
+#
+# The estimated objects scanned count the objects of 'object_list' and --objects (the catalogue size)
+# for every other object selection.
+#
+# Usage: python bundle_snippets.py input [input ...] --out bundle.xml [--name Creator_XmlInjector_Bundle]
+#        [--package bundle.package] [--objects 20000]
+# The bundle needs the highest xml_injector_minimum_version of the snippets, the report lists the snippets
+# which need it, older injectors skip the whole bundle.
+
+
+import argparse
+import copy
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generate_corpus import Package, SECTIONS, SNIPPET_TYPE, fnv64  # noqa: E402
+
+
+OBJECT_SELECTION = 'object_selection'
+REFERENCE_SECTIONS = ('add_interactions_to_sims', 'add_interactions_to_phones', 'add_interactions_to_relationship_panel')
+
+
+def canonical(element) -> str:
+    # Structural key of an element, comments and whitespace are ignored
+    if element.tag is ET.Comment:
+        return ''
+    attributes = ''.join(f' {k}="{v}"' for k, v in sorted(element.attrib.items()))
+    children = ''.join(canonical(child) for child in element)
+    return f"<{element.tag}{attributes}>{(element.text or '').strip()}{children}</{element.tag}>"
+
+
+def get_child(entry, n: str):
+    for child in entry:
+        if child.get('n') == n:
+            return child
+    return None
+
+
+def get_items(entry, n: str) -> list:
+    # Children of the list n of entry without comments
+    child = None if entry is None else get_child(entry, n)
+    return [] if child is None else [item for item in child if item.tag is not ET.Comment]
+
+
+def get_value(element) -> str:
+    return '' if element is None else (element.text or '').strip()
+
+
+def new_list(n: str, items: list):
+    # Items are copied, an addition can be part of several merged entries
+    element = ET.Element('L', {'n': n} if n else {})
+    element.extend(copy.deepcopy(item) for item in items)
+    return element
+
+
+def new_entry(*children):
+    entry = ET.Element('U')
+    entry.extend(copy.deepcopy(child) for child in children if child is not None)
+    return entry
+
+
+def unique(items: list, key_fn: Callable[[Any], str] = None) -> list:
+    # Keeps the first item of each key, key_fn None keeps all items
+    if key_fn is None:
+        return list(items)
+    unique_items = {}
+    for item in items:
+        unique_items.setdefault(key_fn(item), item)
+    return list(unique_items.values())
+
+
+def indent(element, depth: int = 0):
+    # ET.indent() is not available before Python 3.9, values with comments are not indented
+    padding = '\n' + '  ' * depth
+    if len(element) and not (element.text or '').strip():
+        element.text = padding + '  '
+        for child in element:
+            indent(child, depth + 1)
+        if not (child.tail or '').strip():
+            child.tail = padding
+    if depth and not (element.tail or '').strip():
+        element.tail = padding
+
+
+class Bundle:
+    def __init__(self, objects: int):
+        self.objects = objects
+        # instance id: snippet name
+        self.snippets: Dict[int, str] = {}
+        self.skipped: List[str] = []
+        self.duplicates: List[str] = []
+        self.minimum_version = 1
+        # snippet name: xml_injector_minimum_version above 1
+        self.minimum_versions: Dict[str, int] = {}
+        self.version_error_dialog = None
+        self.version_error_dialogs = 0
+        # section: entries of all snippets in order
+        self.sections: Dict[str, list] = {}
+
+    def add_file(self, file_name: str):
+        if file_name.lower().endswith('.package'):
+            for _, _, instance, data in Package.read(file_name, SNIPPET_TYPE):
+                self.add_xml(data, f"{file_name}:{instance:016X}", instance)
+        else:
+            with open(file_name, 'rb') as fp:
+                self.add_xml(fp.read(), file_name)
+
+    @staticmethod
+    def get_instance(root, name: str, instance: int = None) -> int:
+        # The 's' attribute, else the instance of the package entry or the hash of the name
+        try:
+            return int(root.get('s'))
+        except (TypeError, ValueError):
+            return fnv64(name) if instance is None else instance
+
+    def add_xml(self, data: bytes, source: str, instance: int = None):
+        parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+        try:
+            root = ET.fromstring(data.decode('utf-8-sig'), parser=parser)
+        except ET.ParseError as e:
+            self.skipped.append(f"{source}: {e}")
+            return
+        if root.tag != 'I' or root.get('c') != 'XmlInjector':
+            # Other snippets (e.g. AffordanceList) in the packages are ignored
+            return
+        name = root.get('n', source)
+        instance = Bundle.get_instance(root, name, instance)
+        if instance in self.snippets:
+            self.duplicates.append(f"{source} ({name}, {instance:016X})")
+            return
+        self.snippets[instance] = name
+        for section in root:
+            n = section.get('n')
+            if n == 'xml_injector_minimum_version':
+                minimum_version = int(get_value(section) or 1)
+                if minimum_version > 1:
+                    self.minimum_versions[name] = minimum_version
+                self.minimum_version = max(self.minimum_version, minimum_version)
+            elif n == 'version_error_dialog':
+                self.version_error_dialogs += 1
+                if self.version_error_dialog is None:
+                    self.version_error_dialog = section
+            elif n:
+                self.sections.setdefault(n, []).extend(item for item in section if item.tag is not ET.Comment)
+
+    @staticmethod
+    def merge_references(entries: list) -> list:
+        return unique(entries, get_value)
+
+    @staticmethod
+    def merge_by_selection(entries: list, additions_name: str) -> list:
+        selections: Dict[str, Tuple[Any, list]] = {}
+        for entry in entries:
+            object_selection = get_child(entry, OBJECT_SELECTION)
+            if object_selection is None:
+                continue
+            selection = selections.setdefault(canonical(object_selection), (object_selection, []))
+            selection[1].extend(get_items(entry, additions_name))
+        return [new_entry(object_selection, new_list(additions_name, unique(additions, get_value)))
+                for object_selection, additions in selections.values()]
+
+    @staticmethod
+    def merge_by_target(entries: list, targets_name: str, additions_name: str, key_fn: Callable[[Any], str] = None) -> list:
+        # targets_name is a list of references, the additions are collected per target.
+        # Targets with the same additions share one entry.
+        targets: Dict[str, Tuple[Any, list]] = {}
+        for entry in entries:
+            additions = get_items(entry, additions_name)
+            for target in get_items(entry, targets_name):
+                targets.setdefault(get_value(target), (target, []))[1].extend(additions)
+        groups: Dict[Tuple, Tuple[list, list]] = {}
+        for target, additions in targets.values():
+            additions = unique(additions, key_fn)
+            groups.setdefault(tuple(canonical(addition) for addition in additions), ([], additions))[0].append(target)
+        return [new_entry(new_list(targets_name, group_targets), new_list(additions_name, additions))
+                for group_targets, additions in groups.values()]
+
+    @staticmethod
+    def merge_by_reference(entries: list, reference_name: str, additions_name: str, key_fn: Callable[[Any], str] = None) -> list:
+        # reference_name is one reference, one entry per reference
+        references: Dict[str, Tuple[Any, list]] = {}
+        for entry in entries:
+            reference = get_child(entry, reference_name)
+            if reference is None:
+                continue
+            references.setdefault(get_value(reference), (reference, []))[1].extend(get_items(entry, additions_name))
+        return [new_entry(reference, new_list(additions_name, unique(additions, key_fn)))
+                for reference, additions in references.values()]
+
+    @staticmethod
+    def merge_mapping(entries: list, mapping_name: str) -> list:
+        # dict semantics, a later value replaces an earlier one with the same key at its position
+        items: Dict[str, Any] = {}
+        for entry in entries:
+            for item in get_items(entry, mapping_name):
+                items[get_value(get_child(item, 'key'))] = item
+        return [new_entry(new_list(mapping_name, list(items.values())))] if items else []
+
+    @staticmethod
+    def merge_identical(entries: list) -> list:
+        return unique(entries, canonical)
+
+    @staticmethod
+    def get_child_value(n: str) -> Callable[[Any], str]:
+        return lambda item: get_value(get_child(item, n))
+
+    @staticmethod
+    def merge_section(section: str, entries: list) -> list:
+        if section in REFERENCE_SECTIONS:
+            return Bundle.merge_references(entries)
+        if section == 'add_interactions_to_objects':
+            return Bundle.merge_by_selection(entries, '_super_affordances')
+        if section == 'add_lock_aware_interactions_to_lockable_objects':
+            return Bundle.merge_by_selection(entries, 'super_affordances')
+        if section == 'add_mixer_interactions':
+            return Bundle.merge_by_target(entries, 'mixer_snippets', 'affordances', get_value)
+        if section == 'add_purchase_list_options_to_interactions':
+            return Bundle.merge_by_target(entries, 'interactions_to_add_to', 'purchase_list_options')
+        if section == 'add_picker_dialog_categories_to_interactions':
+            return Bundle.merge_by_target(entries, 'interactions_to_add_to', 'picker_dialog_categories', Bundle.get_child_value('tag'))
+        if section == 'add_to_loot_actions':
+            return Bundle.merge_by_reference(entries, 'loot_actions_ref', 'loot_actions_to_add', canonical)
+        if section == 'add_to_random_loot_actions':
+            return Bundle.merge_by_reference(entries, 'random_weighted_loot_ref', 'random_loot_actions_to_add', canonical)
+        if section == 'add_buffs_to_trait':
+            return Bundle.merge_by_reference(entries, 'trait', 'buffs', Bundle.get_child_value('buff_type'))
+        if section == 'add_satisfaction_store_rewards':
+            return Bundle.merge_mapping(entries, 'new_items')
+        if section in ('add_name_component_to_objects', 'add_object_relationships_to_objects'):
+            return Bundle.merge_identical(entries)
+        # add_states_to_objects and unknown sections
+        return list(entries)
+
+    def get_sections(self) -> List[str]:
+        return [section for section in SECTIONS if section in self.sections] + [section for section in self.sections if section not in SECTIONS]
+
+    def merge(self) -> Dict[str, list]:
+        return {section: Bundle.merge_section(section, self.sections[section]) for section in self.get_sections()}
+
+    def get_scans(self, entries: list) -> Tuple[int, int]:
+        # (object selections, estimated objects scanned)
+        selections = 0
+        scanned = 0
+        for entry in entries:
+            object_selection = get_child(entry, OBJECT_SELECTION)
+            if object_selection is None:
+                continue
+            selections += 1
+            if object_selection.get('t') == 'object_list':
+                scanned += len(get_items(get_child(object_selection, 'object_list'), 'object_list'))
+            else:
+                scanned += self.objects
+        return selections, scanned
+
+    def to_xml(self, name: str, merged: Dict[str, list]) -> bytes:
+        root = ET.Element('I', {'c': 'XmlInjector', 'i': 'snippet', 'm': 'xml_injector.snippet', 'n': name, 's': str(fnv64(name))})
+        version = ET.SubElement(root, 'T', {'n': 'xml_injector_minimum_version'})
+        version.text = str(self.minimum_version)
+        if self.version_error_dialog is not None:
+            root.append(self.version_error_dialog)
+        for section, entries in merged.items():
+            if entries:
+                root.append(new_list(section, entries))
+        indent(root)
+        return b'<?xml version="1.0" encoding="utf-8"?>\n' + ET.tostring(root, encoding='unicode').encode('UTF-8') + b'\n'
+
+    def get_report(self, name: str, merged: Dict[str, list]) -> List[str]:
+        report = [f"Bundled {len(self.snippets)} snippets into '{name}' (S4_{SNIPPET_TYPE:08X}_00000000_{fnv64(name):016X})"]
+        report.append(f"  {'section':<50}{'entries':>9}{'merged':>9}")
+        totals = [0, 0, 0, 0, 0, 0]
+        for section, entries in merged.items():
+            before = self.sections[section]
+            report.append(f"  {section:<50}{len(before):>9}{len(entries):>9}")
+            selections_before, scanned_before = self.get_scans(before)
+            selections_after, scanned_after = self.get_scans(entries)
+            for i, value in enumerate((len(before), len(entries), selections_before, selections_after, scanned_before, scanned_after)):
+                totals[i] += value
+        for label, before, after in (('entries', totals[0], totals[1]), ('object selections', totals[2], totals[3]),
+                                     ('estimated objects scanned', totals[4], totals[5])):
+            reduction = f" (-{100 * (before - after) / before:.0f}%)" if before > after else ''
+            report.append(f"  {label}: {before} -> {after}{reduction}")
+        if self.minimum_version > 1:
+            names = [name for name, minimum_version in self.minimum_versions.items() if minimum_version == self.minimum_version]
+            report.append(f"  xml_injector_minimum_version {self.minimum_version} is needed by {', '.join(names)}, older injectors skip the bundle")
+        if self.duplicates:
+            report.append(f"  skipped {len(self.duplicates)} snippets found more than once, the first copy is bundled:")
+            report.extend(f"    {duplicate}" for duplicate in self.duplicates[:10])
+            if len(self.duplicates) > 10:
+                report.append(f"    ... {len(self.duplicates) - 10} more")
+        if self.version_error_dialogs > 1:
+            report.append(f"  {self.version_error_dialogs} snippets define a version_error_dialog, the first one is used")
+        for skipped in self.skipped:
+            report.append(f"  skipped {skipped}")
+        return report
+
+
+def get_files(inputs: List[str]) -> List[str]:
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, file_names in os.walk(path):
+                files.extend(os.path.join(root, file_name) for file_name in file_names if file_name.lower().endswith(('.xml', '.package')))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge XmlInjector snippets into one snippet.')
+    parser.add_argument('inputs', nargs='+', help='Snippet .xml files, .package files or directories')
+    parser.add_argument('--out', required=True, help='Output .xml file')
+    parser.add_argument('--name', default='XmlInjector_Bundle', help='Name of the merged snippet, the instance id is derived from it')
+    parser.add_argument('--package', help='Also write the merged snippet to this .package')
+    parser.add_argument('--objects', type=int, default=20000, help='Catalogue size to estimate the objects scanned by object selections')
+    args = parser.parse_args()
+
+    bundle = Bundle(args.objects)
+    for file_name in get_files(args.inputs):
+        bundle.add_file(file_name)
+    if not bundle.snippets:
+        print('No XmlInjector snippets found')
+        return
+    merged = bundle.merge()
+    data = bundle.to_xml(args.name, merged)
+    with open(args.out, 'wb') as fp:
+        fp.write(data)
+    if args.package:
+        package = Package()
+        package.add(SNIPPET_TYPE, 0, fnv64(args.name), data)
+        package.write(args.package)
+    print('\n'.join(bundle.get_report(args.name, merged)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Checks how the work of the injector grows with the number of snippets and the size of the object
+# catalogue. Timings are noisy, the real risk is an operation which accidentally becomes quadratic
+# as the number of mods grows (a full catalogue scan or a tuple rebuild per entry).
+#
+# Each scenario replays a synthetic corpus (generate_corpus.py) against the stand-in tunings
+# (replay_catalogue.py) at several sizes, every run in a process of its own. The work is counted, not
+# timed: Python function calls, items written to tunings (tuple rebuilds are as expensive as the
+# tuple is long) and the injector counters (objects scanned, index hits and misses, clones, ...).
+# The growth exponent of each count is the slope of a least squares fit of log(count) over log(size),
+# a check fails when the exponent exceeds the declared complexity of the scenario by more than --tolerance.
+#
+# 'duplicates skipped' is listed but not checked, the share of duplicates grows until the targets are saturated.
+#
+# Scenarios:
+#   <section> - one operation, every snippet of the corpus has entries of the section, the number of
+#       snippets grows and the catalogue is fixed. All operations are O(n) in the number of entries,
+#       a tuple rebuilt per entry instead of once per target makes the items written O(n^2).
+#       'add_interactions_to_objects:lazy' replays with 'lazy_object_affordances'.
+#   select:<selector> - add_interactions_to_objects with one object selection variant, the number of
+#       snippets is fixed and the catalogue grows. 'object_list' must not depend on the catalogue size.
+#
+# Usage: python check_scaling.py [--only add_to_loot_actions,select:object_list,add_interactions_to_objects:lazy]
+#        [--sizes 100,200,400,800] [--catalogue-sizes 1000,2000,4000,8000] [--tolerance 0.2] [--verbose]
+# The exit code is 1 if a check failed. test_scaling.py runs the scenarios with smaller sizes as pytest cases.
+
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generate_corpus import Corpus, SECTIONS, SELECTORS  # noqa: E402
+
+
+COMPLEXITY = {'O(1)': 0.0, 'O(n)': 1.0, 'O(n^2)': 2.0}
+SELECTIONS = {
+    'object_list': 'O(1)',  # Index lookups, independent of the catalogue size
+    'objects_with_affordance': 'O(n)',
+    'objects_matching_name': 'O(n)',
+    'objects_with_tag': 'O(n)',  # The number of matching objects grows with the catalogue
+}
+CALLS = 'python calls'
+ITEMS_WRITTEN = 'items written'
+UNCHECKED = ('duplicates skipped',)
+
+
+def get_scenarios() -> Dict[str, Tuple[str, str, str, bool]]:
+    # scenario: (section, selectors, declared complexity, lazy_object_affordances)
+    scenarios = {section: (section, SELECTORS, 'O(n)', False) for section in SECTIONS}
+    scenarios['add_interactions_to_objects:lazy'] = ('add_interactions_to_objects', SELECTORS, 'O(n)', True)
+    for selector, complexity in SELECTIONS.items():
+        scenarios[f'select:{selector}'] = ('add_interactions_to_objects', f'{selector}=1', complexity, False)
+    return scenarios
+
+
+def create_snapshot(section: str, selectors: str, snippets: int, objects: int, seed: int) -> Dict[str, Any]:
+    # Every snippet has entries of section and no other entries
+    args = SimpleNamespace(snippets=snippets, objects=objects, selectors=selectors, overlap=0.3, skew=1.5,
+                           density=1 / SECTIONS[section], entries=3, items=4, seed=seed)
+    corpus = Corpus(args)
+    corpus.create()
+    for snippet in corpus.snippets:
+        for other in SECTIONS:
+            if other != section:
+                snippet[other] = []
+    return corpus.get_snapshot()
+
+
+def run(section: str, selectors: str, snippets: int, objects: int, seed: int, lazy: bool) -> Dict[str, int]:
+    # Runs in the child process, replay_catalogue installs the stand-in modules when it is imported
+    import replay_catalogue
+    from xml_injector.journal import Journal
+    from xml_injector.lazy_affordances import LazyAffordances
+    from xml_injector.stats import Stats
+
+    counts = {CALLS: 0, ITEMS_WRITTEN: 0}
+    journal_setattr = Journal.setattr
+
+    def setattr_counted(obj, attribute: str, value):
+        if isinstance(value, (tuple, list, set, frozenset, dict)):
+            counts[ITEMS_WRITTEN] += len(value)
+        journal_setattr(obj, attribute, value)
+
+    def profile(frame, event, arg):
+        if event == 'call':
+            counts[CALLS] += 1
+
+    replay_catalogue.StandInLog.VERBOSE = False
+    LazyAffordances.ENABLED = lazy
+    Journal.setattr = staticmethod(setattr_counted)
+    catalogue = replay_catalogue.Catalogue(create_snapshot(section, selectors, snippets, objects, seed))
+    replay = replay_catalogue.Replay(catalogue)
+    Stats.reset()
+    sys.setprofile(profile)
+    try:
+        replay.replay()
+    finally:
+        sys.setprofile(None)
+    counts.update(Stats.counters)
+    return counts
+
+
+def run_child(section: str, selectors: str, snippets: int, objects: int, seed: int, lazy: bool) -> Dict[str, int]:
+    arguments = [sys.executable, os.path.abspath(__file__), '--run', json.dumps([section, selectors, snippets, objects, seed, lazy])]
+    result = subprocess.run(arguments, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode:
+        raise RuntimeError(f'{section} ({snippets} snippets, {objects} objects) failed:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def get_exponent(sizes: List[int], values: List[int]) -> float:
+    # Slope of log(value) over log(size), counts of 0 are taken as 1
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(1, value)) for value in values]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+
+def check(name: str, scenario: Tuple[str, str, str, bool], args) -> List[str]:
+    section, selectors, complexity, lazy = scenario
+    by_catalogue = name.startswith('select:')
+    sizes = args.catalogue_sizes if by_catalogue else args.sizes
+    runs = [run_child(section, selectors, args.snippets if by_catalogue else size, size if by_catalogue else args.objects, args.seed, lazy)
+            for size in sizes]
+    axis = 'objects' if by_catalogue else 'snippets'
+    print(f"{name} ({complexity} in {axis}, {', '.join(str(size) for size in sizes)})")
+    failures = []
+    for metric in sorted({metric for counts in runs for metric in counts}):
+        values = [counts.get(metric, 0) for counts in runs]
+        if not any(values):
+            continue
+        exponent = get_exponent(sizes, values)
+        failed = metric not in UNCHECKED and exponent > COMPLEXITY[complexity] + args.tolerance
+        if failed:
+            failures.append(f'{name}: {metric} grows with exponent {exponent:.2f}, declared {complexity}')
+        if failed or args.verbose:
+            status = 'FAIL' if failed else '-   ' if metric in UNCHECKED else 'ok  '
+            print(f"  {status} {metric:<24}{exponent:6.2f} {complexity:<7}{' '.join(f'{value:>10}' for value in values)}")
+    if not failures and not args.verbose:
+        print('  ok')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the growth of the injector work with the number of snippets and the catalogue size.')
+    parser.add_argument('--only', help='Comma separated scenarios, sections or select:<selector>')
+    parser.add_argument('--sizes', default='100,200,400,800', help='Numbers of snippets of the section scenarios')
+    parser.add_argument('--objects', type=int, default=1000, help='Catalogue size of the section scenarios')
+    parser.add_argument('--catalogue-sizes', default='1000,2000,4000,8000', help='Catalogue sizes of the select: scenarios')
+    parser.add_argument('--snippets', type=int, default=100, help='Number of snippets of the select: scenarios')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed excess of the growth exponent over the declared complexity')
+    parser.add_argument('--seed', type=int, default=19, help='Random seed of the corpus')
+    parser.add_argument('--verbose', action='store_true', help='Print the counts and exponents of all metrics')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(*json.loads(args.run))))
+        return
+
+    args.sizes = [int(size) for size in args.sizes.split(',')]
+    args.catalogue_sizes = [int(size) for size in args.catalogue_sizes.split(',')]
+    scenarios = get_scenarios()
+    names = [name.strip() for name in args.only.split(',')] if args.only else list(scenarios)
+    failures = []
+    for name in names:
+        if name not in scenarios:
+            parser.error(f"unknown scenario '{name}'")
+        failures.extend(check(name, scenarios[name], args))
+    if failures:
+        print(f'{len(failures)} checks failed:')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
+    print(f'All {len(names)} scenarios within their declared complexity')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Compares two exports of the changes made by the injector, e.g. before and after a game or mod update.
+# With 'export_changes' the game writes 'The Sims 4/mod_data/xml_injector/injected_changes.bin' at the
+# end of each load and keeps the export of the previous load as 'injected_changes.previous.bin'.
+#
+# Records are matched by target id, target name and attribute. For each matched record the added and
+# removed item ids are compared as multisets, items without a stable identity (id 0) only by count.
+# With one file the changed attributes are summarized.
+#
+# Usage: python compare_changes.py injected_changes.previous.bin [injected_changes.bin] [--limit 20]
+# The exit code is 1 if the exports differ.
+
+
+import argparse
+import os
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stand_ins  # noqa: E402
+
+stand_ins.install()
+
+from xml_injector.change_export import ChangeExport, ChangeRecord  # noqa: E402
+
+
+def get_key(record: ChangeRecord) -> Tuple[int, str, str]:
+    return record.target_id, record.target_name, record.attribute
+
+
+def get_records(records: List[ChangeRecord]) -> Dict[Tuple, ChangeRecord]:
+    # Components without a stable id share a key, they are numbered in load order
+    by_key = {}
+    for record in records:
+        key = get_key(record)
+        n = 0
+        while key + (n,) in by_key:
+            n += 1
+        by_key[key + (n,)] = record
+    return by_key
+
+
+def format_key(key: Tuple) -> str:
+    target_id, target_name, attribute, n = key
+    return f"{target_name}{f'#{n}' if n else ''} ({target_id:016x}).{attribute}"
+
+
+def format_ids(ids: Counter) -> str:
+    return ', '.join(f"{'?' if item == 0 else f'{item:016x}'}{f' {count}x' if count > 1 else ''}" for item, count in sorted(ids.items()))
+
+
+def get_differences(old: ChangeRecord, new: ChangeRecord) -> List[str]:
+    differences = []
+    for name in ('added', 'removed'):
+        old_ids = Counter(getattr(old, name))
+        new_ids = Counter(getattr(new, name))
+        if old_ids != new_ids:
+            if new_ids - old_ids:
+                differences.append(f'{name} only in new: {format_ids(new_ids - old_ids)}')
+            if old_ids - new_ids:
+                differences.append(f'{name} only in old: {format_ids(old_ids - new_ids)}')
+    if (old.length_before, old.length_after) != (new.length_before, new.length_after):
+        differences.append(f'length {old.length_before}->{old.length_after} is {new.length_before}->{new.length_after}')
+    return differences
+
+
+def summarize(file_name: str, records: List[ChangeRecord]):
+    attributes = Counter()
+    items = Counter()
+    for record in records:
+        attributes[record.attribute] += 1
+        items[record.attribute] += len(record.added)
+    print(f'{file_name}: {len(records)} changed attributes, {sum(items.values())} added items, {sum(len(record.removed) for record in records)} removed items')
+    for attribute, count in attributes.most_common():
+        print(f'  {attribute}: {count} targets, {items[attribute]} added items')
+
+
+def compare(old_records: List[ChangeRecord], new_records: List[ChangeRecord], limit: int) -> bool:
+    old = get_records(old_records)
+    new = get_records(new_records)
+    only_old = [key for key in old if key not in new]
+    only_new = [key for key in new if key not in old]
+    changed = [(key, differences) for key, differences in ((key, get_differences(old[key], new[key])) for key in old if key in new) if differences]
+    print(f'{len(old)} records in old, {len(new)} in new: {len(only_old)} only in old, {len(only_new)} only in new, {len(changed)} changed')
+    for title, keys, records in (('Only in old', only_old, old), ('Only in new', only_new, new)):
+        if keys:
+            print(f'{title}:')
+            for key in keys[:limit]:
+                record = records[key]
+                print(f'  {format_key(key)}: +{len(record.added)} -{len(record.removed)}, length {record.length_before}->{record.length_after}')
+            if len(keys) > limit:
+                print(f'  ... {len(keys) - limit} more')
+    if changed:
+        print('Changed:')
+        for key, differences in changed[:limit]:
+            print(f'  {format_key(key)}: {"; ".join(differences)}')
+        if len(changed) > limit:
+            print(f'  ... {len(changed) - limit} more')
+    return bool(only_old or only_new or changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two exports of the changes made by XmlInjector.')
+    parser.add_argument('old', help="'injected_changes.previous.bin' or an older export")
+    parser.add_argument('new', nargs='?', help="'injected_changes.bin', without it the old export is summarized")
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of records listed per section')
+    args = parser.parse_args()
+
+    old_records = ChangeExport.read(args.old)
+    summarize(args.old, old_records)
+    if args.new is None:
+        return
+    new_records = ChangeExport.read(args.new)
+    summarize(args.new, new_records)
+    if compare(old_records, new_records, args.limit):
+        sys.exit(1)
+    print('The exports are equal')
+
+
+if __name__ == '__main__':
+    main()
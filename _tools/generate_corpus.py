@@ -0,0 +1,513 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Generates a synthetic corpus of XmlInjector snippets for scale tests.
+# The snippets follow the tuning in 'xml_injector/snippet.py' and the sample in
+# '_TS4/mod_documentation/xml_injector/Test Package XML' and use every section.
+#
+# Written to the output directory:
+#   xml/S4_7DF2169C_00000000_<instance>_<name>.xml  - one file per snippet (unless --no-xml)
+#   packages/Synthetic_<n>.package                   - DBPF packages with --package-size snippets each
+#   catalogue_snapshot.json.gz                      - with --snapshot, a synthetic object catalogue and the
+#                                                     snippets for '_tools/replay_catalogue.py'
+#
+# The same arguments and --seed always create the same corpus.
+#
+# Usage: python generate_corpus.py out_dir [--snippets 1000] [--objects 20000] [--overlap 0.3] [--skew 1.5]
+#        [--selectors object_list=4,objects_with_affordance=2,objects_matching_name=1,objects_with_tag=1]
+#        [--density 1.0] [--entries 3] [--items 4] [--package-size 100] [--snapshot] [--no-xml] [--seed 19]
+
+
+import argparse
+import gzip
+import json
+import os
+import random
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Tuple
+
+
+SNIPPET_TYPE = 0x7DF2169C
+OBJECT_SIM = 14965
+NOUNS = ('Chair', 'Table', 'Bed', 'Computer', 'Mailbox', 'Stereo', 'Lamp', 'Sink', 'Fridge', 'Counter', 'Shelf', 'Plant',
+         'Mirror', 'Desk', 'Sofa', 'Bathtub', 'Toilet', 'Oven', 'Easel', 'Television')
+TAG_BASE = 50000
+COMPONENTS = ('state', 'name', 'object_relationships', 'object_locking_component')
+# Probability of a section in a snippet, multiplied with --density
+SECTIONS = {
+    'add_interactions_to_objects': 0.8,
+    'add_interactions_to_sims': 0.3,
+    'add_interactions_to_phones': 0.1,
+    'add_interactions_to_relationship_panel': 0.1,
+    'add_mixer_interactions': 0.3,
+    'add_to_loot_actions': 0.1,
+    'add_to_random_loot_actions': 0.05,
+    'add_states_to_objects': 0.05,
+    'add_name_component_to_objects': 0.05,
+    'add_object_relationships_to_objects': 0.03,
+    'add_lock_aware_interactions_to_lockable_objects': 0.03,
+    'add_buffs_to_trait': 0.1,
+    'add_satisfaction_store_rewards': 0.05,
+    'add_purchase_list_options_to_interactions': 0.05,
+    'add_picker_dialog_categories_to_interactions': 0.05,
+}
+SELECTORS = 'object_list=4,objects_with_affordance=2,objects_matching_name=1,objects_with_tag=1'
+
+
+def fnv64(name: str) -> int:
+    # Instance id of a custom tuning, FNV-1 64 of the lower case name with the high bit set
+    h = 0xcbf29ce484222325
+    for b in name.lower().encode('UTF-8'):
+        h = (h * 0x100000001b3) & 0xffffffffffffffff
+        h ^= b
+    return h | 0x8000000000000000
+
+
+class Corpus:
+    # Snippets in the format of 'catalogue_snapshot.json.gz', rendered to XML by SnippetXml
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.selectors = []
+        self.selector_weights = []
+        for selector in args.selectors.split(','):
+            name, weight = selector.split('=')
+            self.selectors.append(name.strip())
+            self.selector_weights.append(float(weight))
+        self._next_id = 1 << 40
+        self.object_ids = [OBJECT_SIM] + [100000 + i for i in range(args.objects)]
+        self.base_affordances = self.new_ids(max(10, args.objects // 50))
+        self.shared_affordances = self.new_ids(max(10, args.snippets // 5))
+        self.tags = [TAG_BASE + i for i in range(len(NOUNS) * 3)]
+        self.affordance_lists = self.new_ids(40)
+        self.loot_actions = self.new_ids(100)
+        self.random_loot_actions = self.new_ids(20)
+        # Loot ops as stored by the snapshot, mods often add the same few buff loots
+        self.loot_ops = [f'BuffOp:{i:016x}' for i in range(20)]
+        self.traits = self.new_ids(100)
+        self.buffs = self.new_ids(200)
+        self.rewards = self.new_ids(50)
+        self.picker_interactions = self.new_ids(20)
+        self.snippets: List[Dict[str, Any]] = []
+
+    def new_ids(self, count: int) -> List[int]:
+        ids = list(range(self._next_id, self._next_id + count))
+        self._next_id += count
+        return ids
+
+    def pick(self, pool: List, count: int = 1) -> List:
+        # Skewed towards the start of the pool, a few objects are selected by many snippets
+        picked = []
+        for _ in range(count):
+            item = pool[int(len(pool) * self.rng.random() ** self.args.skew)]
+            if item not in picked:
+                picked.append(item)
+        return picked
+
+    def count(self, maximum: int) -> int:
+        return self.rng.randint(1, max(1, maximum))
+
+    def get_additions(self, shared: List[int]) -> List[int]:
+        # Additions are taken from the pool shared by all snippets with the --overlap probability, else they are new
+        additions = []
+        for _ in range(self.count(self.args.items)):
+            if self.rng.random() < self.args.overlap:
+                additions.extend(self.pick(shared))
+            else:
+                additions.extend(self.new_ids(1))
+        return list(dict.fromkeys(additions))
+
+    def get_object_selection(self) -> Dict[str, Any]:
+        selector = self.rng.choices(self.selectors, self.selector_weights)[0]
+        if selector == 'object_list':
+            return {'object_list': self.pick(self.object_ids[1:], self.count(self.args.items * 2))}
+        if selector == 'objects_with_affordance':
+            return {'objects_with_affordance': self.pick(self.base_affordances)[0]}
+        if selector == 'objects_matching_name':
+            return {'objects_matching_name': self.pick(list(NOUNS))[0]}
+        return {'objects_with_tag': self.pick(self.tags)[0]}
+
+    def get_entries(self, section: str, create) -> List:
+        if self.rng.random() >= SECTIONS[section] * self.args.density:
+            return []
+        return [create() for _ in range(self.count(self.args.entries))]
+
+    def create_snippet(self, index: int) -> Dict[str, Any]:
+        name = f"Creator{index % 97:02d}_Synthetic_{index:06d}"
+        e = self.get_entries
+        a = self.get_additions
+        return {
+            'name': name,
+            'id': fnv64(name),
+            'xml_injector_minimum_version': 1,
+            'add_interactions_to_objects': e('add_interactions_to_objects', lambda: {
+                'object_selection': self.get_object_selection(), '_super_affordances': a(self.shared_affordances)}),
+            'add_interactions_to_sims': [i for l in e('add_interactions_to_sims', lambda: a(self.shared_affordances)) for i in l],
+            'add_interactions_to_phones': [i for l in e('add_interactions_to_phones', lambda: a(self.shared_affordances)) for i in l],
+            'add_interactions_to_relationship_panel': [i for l in e('add_interactions_to_relationship_panel', lambda: a(self.shared_affordances)) for i in l],
+            'add_mixer_interactions': e('add_mixer_interactions', lambda: {
+                'mixer_snippets': self.pick(self.affordance_lists, self.count(2)), 'affordances': a(self.shared_affordances)}),
+            'add_to_loot_actions': e('add_to_loot_actions', lambda: {
+                'loot_actions_ref': self.pick(self.loot_actions)[0], 'loot_actions_to_add': self.pick(self.loot_ops, self.count(self.args.items))}),
+            'add_to_random_loot_actions': e('add_to_random_loot_actions', lambda: {
+                'random_weighted_loot_ref': self.pick(self.random_loot_actions)[0], 'random_loot_actions_to_add': self.pick(self.loot_ops, self.count(self.args.items))}),
+            'add_states_to_objects': e('add_states_to_objects', lambda: {
+                'object_selection': self.get_object_selection(), 'states': self.count(2), 'state_triggers': self.rng.randint(0, 1)}),
+            'add_name_component_to_objects': e('add_name_component_to_objects', lambda: {
+                'object_selection': self.get_object_selection()}),
+            'add_object_relationships_to_objects': e('add_object_relationships_to_objects', lambda: {
+                'object_selection': self.get_object_selection()}),
+            'add_lock_aware_interactions_to_lockable_objects': e('add_lock_aware_interactions_to_lockable_objects', lambda: {
+                'object_selection': {'objects_matching_name': 'Computer'}, 'super_affordances': a(self.shared_affordances)}),
+            'add_buffs_to_trait': e('add_buffs_to_trait', lambda: {
+                'trait': self.pick(self.traits)[0], 'buffs': a(self.buffs)}),
+            'add_satisfaction_store_rewards': e('add_satisfaction_store_rewards', lambda: {
+                'new_items': a(self.rewards)}),
+            'add_purchase_list_options_to_interactions': e('add_purchase_list_options_to_interactions', lambda: {
+                'interactions_to_add_to': self.pick(self.picker_interactions, self.count(2)), 'purchase_list_options': self.count(2)}),
+            'add_picker_dialog_categories_to_interactions': e('add_picker_dialog_categories_to_interactions', lambda: {
+                'interactions_to_add_to': self.pick(self.picker_interactions, self.count(2)), 'picker_dialog_categories': self.pick(self.tags, self.count(3))}),
+        }
+
+    def create(self):
+        self.snippets = [self.create_snippet(i) for i in range(self.args.snippets)]
+
+    def get_objects(self) -> Dict[str, Any]:
+        rng = random.Random(self.args.seed + 1)
+        columns = {'ids': [], 'names': [], 'classes': [], 'tags': [], 'super_affordances': [], 'components': [], 'lock_components': []}
+        for i, guid64 in enumerate(self.object_ids):
+            noun = NOUNS[i % len(NOUNS)] if guid64 != OBJECT_SIM else 'Sim'
+            component_mask = 0
+            for bit in range(3):
+                if rng.random() < 0.3:
+                    component_mask |= 1 << bit
+            lock_component = -1
+            if noun == 'Computer':
+                component_mask |= 1 << COMPONENTS.index('object_locking_component')
+                lock_component = 0
+            columns['ids'].append(guid64)
+            columns['names'].append(f"object_{noun}_{i:06d}")
+            columns['classes'].append(0)
+            columns['tags'].append(sorted({TAG_BASE + NOUNS.index(noun) if noun in NOUNS else TAG_BASE} | set(rng.sample(self.tags, 2))))
+            columns['super_affordances'].append(rng.sample(self.base_affordances, min(len(self.base_affordances), rng.randint(1, 8))))
+            columns['components'].append(component_mask)
+            columns['lock_components'].append(lock_component)
+        columns['class_names'] = ['GameObject']
+        columns['lock_component_affordances'] = [self.base_affordances[:3]]
+        return columns
+
+    def get_targets(self) -> Dict[str, Any]:
+        rng = random.Random(self.args.seed + 2)
+        return {
+            'affordance_lists': {str(i): rng.sample(self.base_affordances, min(len(self.base_affordances), 10)) for i in self.affordance_lists},
+            'loot_actions': {str(i): rng.randint(1, 5) for i in self.loot_actions},
+            'random_loot_actions': {str(i): rng.randint(1, 5) for i in self.random_loot_actions},
+            'traits': {str(i): rng.sample(self.buffs, 2) for i in self.traits},
+            'interactions': {str(i): {'purchase_list_options': 2, 'picker_dialog_categories': rng.sample(self.tags, 3)} for i in self.picker_interactions},
+        }
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        return {
+            'format_version': 1,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'synthetic': vars(self.args),
+            'object_sim': {'_super_affordances': self.base_affordances[:2], '_phone_affordances': [], '_relation_panel_affordances': []},
+            'components': COMPONENTS,
+            'objects': self.get_objects(),
+            'targets': self.get_targets(),
+            'snippets': self.snippets,
+        }
+
+
+class SnippetXml:
+    # Renders a snippet in the layout of the game's tuning XML
+    def __init__(self):
+        self.lines: List[str] = []
+        self.depth = 0
+
+    def start(self, tag: str, n: str = None, t: str = None):
+        attributes = (f' n="{n}"' if n else '') + (f' t="{t}"' if t else '')
+        self.lines.append(f"{'  ' * self.depth}<{tag}{attributes}>")
+        self.depth += 1
+
+    def end(self, tag: str):
+        self.depth -= 1
+        self.lines.append(f"{'  ' * self.depth}</{tag}>")
+
+    def value(self, tag: str, value: Any, n: str = None):
+        attributes = f' n="{n}"' if n else ''
+        self.lines.append(f"{'  ' * self.depth}<{tag}{attributes}>{value}</{tag}>")
+
+    def references(self, n: str, ids: List[int]):
+        self.start('L', n)
+        for i in ids:
+            self.value('T', i)
+        self.end('L')
+
+    def object_selection(self, object_selection: Dict[str, Any]):
+        selector, value = next(iter(object_selection.items()))
+        self.start('V', 'object_selection', selector)
+        self.start('U', selector)
+        if selector == 'object_list':
+            self.references('object_list', value)
+        elif selector == 'objects_with_affordance':
+            self.value('T', value, 'affordance')
+        elif selector == 'objects_matching_name':
+            self.value('T', value, 'partial_name')
+        else:
+            self.value('E', get_tag_name(value), 'tag')
+        self.end('U')
+        self.end('V')
+
+    def buff_op(self, op: str, n: str = None):
+        # Ops with the same digest render the same XML
+        self.start('V', n, 'buff')
+        self.start('U', 'buff')
+        self.start('U', 'buff')
+        self.value('T', int(op.split(':')[1], 16) if ':' in op else 0, 'buff_type')
+        self.end('U')
+        self.end('U')
+        self.end('V')
+
+    def render(self, snippet: Dict[str, Any]) -> str:
+        self.lines = ['<?xml version="1.0" encoding="utf-8"?>', f'<I c="XmlInjector" i="snippet" m="xml_injector.snippet" n="{snippet["name"]}" s="{snippet["id"]}">']
+        self.depth = 1
+        self.value('T', snippet['xml_injector_minimum_version'], 'xml_injector_minimum_version')
+        for section in SECTIONS:
+            entries = snippet[section]
+            if not entries:
+                continue
+            if section in ('add_interactions_to_sims', 'add_interactions_to_phones', 'add_interactions_to_relationship_panel'):
+                self.references(section, entries)
+                continue
+            self.start('L', section)
+            for e in entries:
+                self.start('U')
+                self.entry(section, e)
+                self.end('U')
+            self.end('L')
+        self.lines.append('</I>')
+        return '\n'.join(self.lines) + '\n'
+
+    def entry(self, section: str, e: Dict[str, Any]):
+        if 'object_selection' in e:
+            self.object_selection(e['object_selection'])
+        if section == 'add_interactions_to_objects':
+            self.references('_super_affordances', e['_super_affordances'])
+        elif section == 'add_mixer_interactions':
+            self.references('mixer_snippets', e['mixer_snippets'])
+            self.references('affordances', e['affordances'])
+        elif section == 'add_to_loot_actions':
+            self.value('T', e['loot_actions_ref'], 'loot_actions_ref')
+            self.start('L', 'loot_actions_to_add')
+            for op in e['loot_actions_to_add']:
+                self.buff_op(op)
+            self.end('L')
+        elif section == 'add_to_random_loot_actions':
+            self.value('T', e['random_weighted_loot_ref'], 'random_weighted_loot_ref')
+            self.start('L', 'random_loot_actions_to_add')
+            for op in e['random_loot_actions_to_add']:
+                self.start('U')
+                self.buff_op(op, 'action')
+                self.start('U', 'weight')
+                self.value('T', 1, 'base_value')
+                self.end('U')
+                self.end('U')
+            self.end('L')
+        elif section == 'add_states_to_objects':
+            self.start('U', 'state_component')
+            self.start('L', 'states')
+            for _ in range(e['states']):
+                self.start('U')
+                self.value('T', 0, 'default_value')
+                self.end('U')
+            self.end('L')
+            self.end('U')
+        elif section == 'add_name_component_to_objects':
+            self.start('U', 'name_component')
+            self.value('T', 'True', 'allow_name')
+            self.end('U')
+        elif section == 'add_object_relationships_to_objects':
+            self.start('U', 'object_relationships_component')
+            self.value('T', 0, 'relationship_stat')
+            self.end('U')
+        elif section == 'add_lock_aware_interactions_to_lockable_objects':
+            self.references('super_affordances', e['super_affordances'])
+        elif section == 'add_buffs_to_trait':
+            self.value('T', e['trait'], 'trait')
+            self.start('L', 'buffs')
+            for buff in e['buffs']:
+                self.start('U')
+                self.value('T', buff, 'buff_type')
+                self.end('U')
+            self.end('L')
+        elif section == 'add_satisfaction_store_rewards':
+            self.start('L', 'new_items')
+            for reward in e['new_items']:
+                self.start('U')
+                self.value('T', reward, 'key')
+                self.start('U', 'value')
+                self.value('E', 'MONEY', 'award_type')
+                self.value('T', 100, 'cost')
+                self.end('U')
+                self.end('U')
+            self.end('L')
+        elif section == 'add_purchase_list_options_to_interactions':
+            self.references('interactions_to_add_to', e['interactions_to_add_to'])
+            self.start('L', 'purchase_list_options')
+            for _ in range(e['purchase_list_options']):
+                self.start('V', None, 'specific_items')
+                self.start('U', 'specific_items')
+                # The first objects of the synthetic catalogue
+                self.references('definitions', [100000 + i for i in range(len(e['interactions_to_add_to']))])
+                self.end('U')
+                self.end('V')
+            self.end('L')
+        elif section == 'add_picker_dialog_categories_to_interactions':
+            self.references('interactions_to_add_to', e['interactions_to_add_to'])
+            self.start('L', 'picker_dialog_categories')
+            for tag in e['picker_dialog_categories']:
+                self.start('U')
+                self.value('E', get_tag_name(tag), 'tag')
+                self.value('T', '2f7d0004:00000000:0000000000000000', 'icon')
+                self.value('T', '0x0', 'tooltip')
+                self.end('U')
+            self.end('L')
+
+
+def get_tag_name(tag: int) -> str:
+    i = tag - TAG_BASE
+    return f"Func_{NOUNS[i % len(NOUNS)]}" + (f"_{i // len(NOUNS)}" if i >= len(NOUNS) else '')
+
+
+class Package:
+    # Minimal DBPF 2.1 reader and writer, the resources are written zlib compressed
+    HEADER_SIZE = 96
+    ZLIB = 0x5A42
+    UNCOMPRESSED = 0x0000
+
+    def __init__(self):
+        # (type, group, instance, data)
+        self.resources: List[Tuple[int, int, int, bytes]] = []
+
+    def add(self, resource_type: int, group: int, instance: int, data: bytes):
+        self.resources.append((resource_type, group, instance, data))
+
+    def write(self, file_name: str):
+        index = struct.pack('<I', 0)  # no constant type, group or instance
+        with open(file_name, 'wb') as fp:
+            fp.write(b'\0' * Package.HEADER_SIZE)
+            for resource_type, group, instance, data in self.resources:
+                compressed = zlib.compress(data)
+                position = fp.tell()
+                fp.write(compressed)
+                index += struct.pack('<IIIIIIIHH', resource_type, group, instance >> 32, instance & 0xffffffff,
+                                     position, len(compressed) | 0x80000000, len(data), Package.ZLIB, 1)
+            index_position = fp.tell()
+            fp.write(index)
+            fp.seek(0)
+            fp.write(struct.pack('<4s8I3I12sIQ24s', b'DBPF', 2, 1, 0, 0, 0, 0, 0, 0, len(self.resources), 0, len(index),
+                                 b'\0' * 12, 3, index_position, b'\0' * 24))
+
+    @staticmethod
+    def read(file_name: str, resource_type: int = None) -> List[Tuple[int, int, int, bytes]]:
+        # Returns (type, group, instance, data) of the uncompressed or zlib compressed resources, optionally of one type
+        with open(file_name, 'rb') as fp:
+            data = fp.read()
+        header = struct.unpack_from('<4s8I3I12sIQ24s', data)
+        if header[0] != b'DBPF':
+            raise ValueError(f"'{file_name}' is not a DBPF package")
+        count = header[9]
+        position = header[14] or header[10]
+        flags, = struct.unpack_from('<I', data, position)
+        position += 4
+        constants = []
+        for bit in range(3):
+            if flags & (1 << bit):
+                constants.append(struct.unpack_from('<I', data, position)[0])
+                position += 4
+        resources = []
+        for _ in range(count):
+            values = list(constants)
+            fields = []
+            for bit in range(3):
+                if flags & (1 << bit):
+                    fields.append(values.pop(0))
+                else:
+                    fields.append(struct.unpack_from('<I', data, position)[0])
+                    position += 4
+            instance_low, offset, size, uncompressed_size = struct.unpack_from('<4I', data, position)
+            position += 16
+            compression = Package.UNCOMPRESSED
+            if size & 0x80000000:
+                compression, _ = struct.unpack_from('<HH', data, position)
+                position += 4
+            t, group, instance_high = fields
+            if resource_type is not None and t != resource_type:
+                continue
+            raw = data[offset:offset + (size & 0x7fffffff)]
+            if compression == Package.ZLIB:
+                raw = zlib.decompress(raw)
+            elif compression != Package.UNCOMPRESSED:
+                print(f"Skipped resource {t:08X}:{group:08X}:{(instance_high << 32) | instance_low:016X} in '{file_name}' (compression {compression:04X})")
+                continue
+            resources.append((t, group, (instance_high << 32) | instance_low, raw))
+        return resources
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic corpus of XmlInjector snippets.')
+    parser.add_argument('out_dir', help='Output directory')
+    parser.add_argument('--snippets', type=int, default=1000, help='Number of snippets')
+    parser.add_argument('--objects', type=int, default=20000, help='Number of objects in the synthetic catalogue')
+    parser.add_argument('--selectors', default=SELECTORS, help='Weights of the object selections')
+    parser.add_argument('--overlap', type=float, default=0.3, help='Probability that an added item is shared with other snippets')
+    parser.add_argument('--skew', type=float, default=1.5, help='Skew of picked objects and targets, 1 is uniform, higher values select a few more often')
+    parser.add_argument('--density', type=float, default=1.0, help='Multiplier for the probability of each section')
+    parser.add_argument('--entries', type=int, default=3, help='Maximum number of entries per section')
+    parser.add_argument('--items', type=int, default=4, help='Maximum number of items per entry')
+    parser.add_argument('--package-size', type=int, default=0, help='Pack this number of snippets into each .package, 0 writes no packages')
+    parser.add_argument('--snapshot', action='store_true', help="Write 'catalogue_snapshot.json.gz' for replay_catalogue.py")
+    parser.add_argument('--no-xml', action='store_true', help='Do not write the .xml files')
+    parser.add_argument('--seed', type=int, default=19, help='Random seed')
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    corpus = Corpus(args)
+    corpus.create()
+    renderer = SnippetXml()
+    xml_dir = os.path.join(args.out_dir, 'xml')
+    package_dir = os.path.join(args.out_dir, 'packages')
+    if not args.no_xml:
+        os.makedirs(xml_dir, exist_ok=True)
+    if args.package_size > 0:
+        os.makedirs(package_dir, exist_ok=True)
+    package = Package()
+    packages = 0
+    size = 0
+    for i, snippet in enumerate(corpus.snippets):
+        data = renderer.render(snippet).encode('UTF-8')
+        size += len(data)
+        if not args.no_xml:
+            with open(os.path.join(xml_dir, f"S4_{SNIPPET_TYPE:08X}_00000000_{snippet['id']:016X}_{snippet['name']}.xml"), 'wb') as fp:
+                fp.write(data)
+        if args.package_size > 0:
+            package.add(SNIPPET_TYPE, 0, snippet['id'], data)
+            if len(package.resources) == args.package_size or i == len(corpus.snippets) - 1:
+                package.write(os.path.join(package_dir, f"Synthetic_{packages:04d}.package"))
+                package = Package()
+                packages += 1
+    if args.snapshot:
+        with gzip.open(os.path.join(args.out_dir, 'catalogue_snapshot.json.gz'), 'wt', encoding='UTF-8') as fp:
+            json.dump(corpus.get_snapshot(), fp, separators=(',', ':'))
+    entries = sum(len(snippet[section]) for snippet in corpus.snippets for section in SECTIONS)
+    print(f"Generated {len(corpus.snippets)} snippets ({entries} entries, {size // 1024} KiB XML) and {packages} packages in {time.perf_counter() - t:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
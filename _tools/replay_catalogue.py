@@ -0,0 +1,320 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Replays the XmlInjector snippets of a catalogue snapshot against stand-in tunings.
+# Create the snapshot in game with the 'xml_injector.dump_catalogue' console command, it is
+# written to 'The Sims 4/mod_data/xml_injector/catalogue_snapshot.json.gz'.
+#
+# The snapshot is taken after the injection, so by default every affordance a snippet adds is
+# removed from the stand-in tunings before the replay to get close to the state before injection.
+# Loot ops are compared by the digest stored in the snapshot, ops of older snapshots without a
+# digest are never merged.
+# With --export-changes the changes are exported ('export_changes') to mod_data of the stand-in documents
+# directory, compare two replays with compare_changes.py.
+#
+# Usage: python replay_catalogue.py catalogue_snapshot.json.gz [--profile replay.pstats] [--lazy] [--keep-injected] [--release-payloads] [--no-loot-merge] [--sample-load] [--export-changes] [--verbose]
+
+
+import argparse
+import cProfile
+import gzip
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stand_ins  # noqa: E402
+from stand_ins import StandInAffordance, StandInLog, StandInObject, StandInTuning, StandInTypes, StandInValues  # noqa: E402
+
+services = stand_ins.install()
+
+import xml_injector.add_to_tuning  # noqa: E402, F401, registers the operations
+from xml_injector.batched_additions import BatchedAdditions  # noqa: E402
+from xml_injector.change_export import ChangeExport  # noqa: E402
+from xml_injector.journal import InjectionUnits  # noqa: E402
+from xml_injector.lazy_affordances import LazyAffordances  # noqa: E402
+from xml_injector.load_profiler import LoadProfiler  # noqa: E402
+from xml_injector.loot_merges import LootMerges  # noqa: E402
+from xml_injector.object_selection import ObjectSelection  # noqa: E402
+from xml_injector.operations import Operations  # noqa: E402
+from xml_injector.selector_cost import SelectorCost  # noqa: E402
+from xml_injector.settings import Settings  # noqa: E402
+from xml_injector.sim_affordances import SimAffordances  # noqa: E402
+from xml_injector.snippet_payloads import SnippetPayloads  # noqa: E402
+from xml_injector.stats import Stats  # noqa: E402
+
+
+class StandInLootActions(StandInTuning):
+    loot_actions = ()
+    random_loot_actions = ()
+
+    @classmethod
+    def _validate_recursion(cls):
+        pass
+
+
+class Catalogue:
+    # Stand-in tunings built from a snapshot
+    def __init__(self, snapshot: Dict[str, Any], keep_injected: bool = False):
+        self.snapshot = snapshot
+        self.affordances: Dict[int, Any] = {}
+        self.tunings: Dict[int, Any] = {}
+        self.injected = set() if keep_injected else Catalogue.get_injected_ids(snapshot['snippets'])
+        self._build_objects()
+        self._build_targets()
+
+    @staticmethod
+    def get_injected_ids(snippets: List[Dict[str, Any]]) -> set:
+        injected = set()
+        for snippet in snippets:
+            for e in snippet['add_interactions_to_objects']:
+                injected.update(e['_super_affordances'])
+            injected.update(snippet['add_interactions_to_sims'])
+            injected.update(snippet['add_interactions_to_phones'])
+            injected.update(snippet['add_interactions_to_relationship_panel'])
+            for e in snippet['add_mixer_interactions']:
+                injected.update(e['affordances'])
+            for e in snippet['add_lock_aware_interactions_to_lockable_objects']:
+                injected.update(e['super_affordances'])
+        return injected
+
+    def get_affordance(self, guid64: int):
+        affordance = self.affordances.get(guid64, None)
+        if affordance is None:
+            affordance = self.affordances[guid64] = StandInAffordance.create(f'affordance_{guid64}', guid64)
+            services.get_instance_manager(StandInTypes.INTERACTION).add(affordance)
+        return affordance
+
+    def get_affordances(self, guid64s) -> tuple:
+        return tuple(self.get_affordance(guid64) for guid64 in guid64s if guid64 not in self.injected)
+
+    def _build_objects(self):
+        objects = self.snapshot['objects']
+        components = self.snapshot['components']
+        lock_components = [
+            StandInValues(_tuned_values=StandInValues(super_affordances=frozenset(self.get_affordances(sa_ids))))
+            for sa_ids in objects['lock_component_affordances']]
+        definition_manager = services.definition_manager_instance
+        for i, guid64 in enumerate(objects['ids']):
+            attributes = {}
+            sa_ids = objects['super_affordances'][i]
+            if sa_ids is not None:
+                attributes['_super_affordances'] = self.get_affordances(sa_ids)
+            component_mask = objects['components'][i]
+            if component_mask:
+                _components = {name: None for name in components}
+                if component_mask & (1 << components.index('state')):
+                    _components['state'] = StandInValues(_tuned_values=StandInValues(states=(), state_triggers=()))
+                if component_mask & (1 << components.index('name')):
+                    _components['name'] = StandInValues(_tuned_values=StandInValues())
+                if component_mask & (1 << components.index('object_relationships')):
+                    _components['object_relationships'] = StandInValues(_tuned_values=StandInValues())
+                if objects['lock_components'][i] >= 0:
+                    _components['object_locking_component'] = lock_components[objects['lock_components'][i]]
+                attributes['_components'] = StandInValues(**_components)
+            if guid64 == SimAffordances.OBJECT_SIM:
+                for attribute, sa_ids in self.snapshot['object_sim'].items():
+                    attributes[attribute] = self.get_affordances(sa_ids)
+            tuning = StandInObject.create(objects['names'][i] or f'object_{guid64}', guid64, **attributes)
+            definition_manager.add(tuning, objects['tags'][i])
+
+    def _build_targets(self):
+        targets = self.snapshot['targets']
+        snippet_manager = services.get_instance_manager(StandInTypes.SNIPPET)
+        action_manager = services.get_instance_manager(StandInTypes.ACTION)
+        trait_manager = services.get_instance_manager(StandInTypes.TRAIT)
+        for guid64, sa_ids in targets['affordance_lists'].items():
+            snippet_manager.add(StandInTuning.create(f'affordance_list_{guid64}', int(guid64), value=self.get_affordances(sa_ids)))
+        for guid64, count in targets['loot_actions'].items():
+            action_manager.add(StandInLootActions.create(f'loot_actions_{guid64}', int(guid64), loot_actions=tuple(object() for _ in range(count))))
+        for guid64, count in targets['random_loot_actions'].items():
+            action_manager.add(StandInLootActions.create(f'random_loot_actions_{guid64}', int(guid64), random_loot_actions=tuple(object() for _ in range(count))))
+        for guid64, buff_ids in targets['traits'].items():
+            trait_manager.add(StandInTuning.create(f'trait_{guid64}', int(guid64), buffs=tuple(SimpleNamespace(buff_type=self.get_affordance(b)) for b in buff_ids)))
+        for guid64, interaction in targets['interactions'].items():
+            sa = self.get_affordance(int(guid64))
+            if 'purchase_list_options' in interaction:
+                sa.purchase_list_option = tuple(object() for _ in range(interaction['purchase_list_options']))
+            if 'picker_dialog_categories' in interaction:
+                sa.picker_dialog = StandInValues(_tuned_values=StandInValues(categories=tuple(SimpleNamespace(tag=t) for t in interaction['picker_dialog_categories'])))
+
+    def get(self, instance_type, guid64: int):
+        tuning = services.get_instance_manager(instance_type).get(guid64)
+        if tuning is None and instance_type == StandInTypes.INTERACTION:
+            tuning = self.get_affordance(guid64)
+        return tuning
+
+    def get_list(self, instance_type, guid64s) -> list:
+        # pack_safe references which are not found are dropped
+        return [tuning for tuning in (self.get(instance_type, guid64) for guid64 in guid64s) if tuning is not None]
+
+    def get_object_selection(self, object_selection: Dict[str, Any]):
+        if 'object_list' in object_selection:
+            return ObjectSelection._ObjectList(object_list=object_selection['object_list'])
+        if 'objects_with_affordance' in object_selection:
+            return ObjectSelection._ObjectsWithAffordance(affordance=self.get_affordance(object_selection['objects_with_affordance']))
+        if 'objects_matching_name' in object_selection:
+            return ObjectSelection._ObjectsMatchingName(partial_name=object_selection['objects_matching_name'])
+        if 'objects_with_tag' in object_selection:
+            return ObjectSelection._ObjectsWithTag(tag=object_selection['objects_with_tag'])
+        return None
+
+
+class Replay:
+    def __init__(self, catalogue: Catalogue):
+        self.catalogue = catalogue
+
+    @staticmethod
+    def get_loot_op(op: str):
+        # 'BuffOp:<digest>', a stand-in op without a digest gets an attribute of its own
+        return SimpleNamespace(name=op) if ':' in op else SimpleNamespace(name=op, op=object())
+
+    def get_snippet(self, snippet: Dict[str, Any]):
+        # A stand-in XmlInjector tuning with the entries of the snippet
+        c = self.catalogue
+        interaction = StandInTypes.INTERACTION
+        get_object_selection = c.get_object_selection
+        return StandInTuning.create(
+            snippet['name'], snippet['id'],
+            add_interactions_to_objects=tuple(SimpleNamespace(
+                object_selection=get_object_selection(e['object_selection']), _super_affordances=c.get_list(interaction, e['_super_affordances']))
+                for e in snippet['add_interactions_to_objects']),
+            add_interactions_to_sims=tuple(c.get_list(interaction, snippet['add_interactions_to_sims'])),
+            add_interactions_to_phones=tuple(c.get_list(interaction, snippet['add_interactions_to_phones'])),
+            add_interactions_to_relationship_panel=tuple(c.get_list(interaction, snippet['add_interactions_to_relationship_panel'])),
+            add_mixer_interactions=tuple(SimpleNamespace(
+                mixer_snippets=c.get_list(StandInTypes.SNIPPET, e['mixer_snippets']), affordances=c.get_list(interaction, e['affordances']))
+                for e in snippet['add_mixer_interactions']),
+            add_to_loot_actions=tuple(SimpleNamespace(
+                loot_actions_ref=c.get(StandInTypes.ACTION, e['loot_actions_ref']),
+                loot_actions_to_add=tuple(Replay.get_loot_op(op) for op in e['loot_actions_to_add']))
+                for e in snippet['add_to_loot_actions']),
+            add_to_random_loot_actions=tuple(SimpleNamespace(
+                random_weighted_loot_ref=c.get(StandInTypes.ACTION, e['random_weighted_loot_ref']),
+                random_loot_actions_to_add=tuple(SimpleNamespace(action=Replay.get_loot_op(op), weight=1) for op in e['random_loot_actions_to_add']))
+                for e in snippet['add_to_random_loot_actions']),
+            add_states_to_objects=tuple(SimpleNamespace(
+                object_selection=get_object_selection(e['object_selection']),
+                state_component=SimpleNamespace(states=tuple(object() for _ in range(e['states'])), state_triggers=tuple(object() for _ in range(e['state_triggers']))))
+                for e in snippet['add_states_to_objects']),
+            add_name_component_to_objects=tuple(SimpleNamespace(
+                object_selection=get_object_selection(e['object_selection']), name_component=StandInValues(_tuned_values=StandInValues()))
+                for e in snippet['add_name_component_to_objects']),
+            add_object_relationships_to_objects=tuple(SimpleNamespace(
+                object_selection=get_object_selection(e['object_selection']), object_relationships_component=StandInValues(_tuned_values=StandInValues()))
+                for e in snippet['add_object_relationships_to_objects']),
+            add_lock_aware_interactions_to_lockable_objects=tuple(SimpleNamespace(
+                object_selection=get_object_selection(e['object_selection']), super_affordances=c.get_list(interaction, e['super_affordances']))
+                for e in snippet['add_lock_aware_interactions_to_lockable_objects']),
+            add_buffs_to_trait=tuple(SimpleNamespace(
+                trait=c.get(StandInTypes.TRAIT, e['trait']), buffs=tuple(SimpleNamespace(buff_type=c.get_affordance(b)) for b in e['buffs']))
+                for e in snippet['add_buffs_to_trait']),
+            add_satisfaction_store_rewards=tuple(SimpleNamespace(
+                new_items={c.get_affordance(r): SimpleNamespace(award_type=0, cost=100) for r in e['new_items']})
+                for e in snippet['add_satisfaction_store_rewards']),
+            add_purchase_list_options_to_interactions=tuple(SimpleNamespace(
+                interactions_to_add_to=c.get_list(interaction, e['interactions_to_add_to']), purchase_list_options=tuple(object() for _ in range(e['purchase_list_options'])))
+                for e in snippet['add_purchase_list_options_to_interactions']),
+            add_picker_dialog_categories_to_interactions=tuple(SimpleNamespace(
+                interactions_to_add_to=c.get_list(interaction, e['interactions_to_add_to']), picker_dialog_categories=tuple(SimpleNamespace(tag=t) for t in e['picker_dialog_categories']))
+                for e in snippet['add_picker_dialog_categories_to_interactions']),
+        )
+
+    def replay(self) -> float:
+        # The same operations as XmlInjector._tuning_loaded_callback()
+        t = time.perf_counter()
+        snippet_manager = services.get_instance_manager(StandInTypes.SNIPPET)
+        for snippet in self.catalogue.snapshot['snippets']:
+            # The scheduled entries look the snippet up by its id
+            tuning = self.get_snippet(snippet)
+            snippet_manager.add(tuning)
+            Operations.schedule(tuning)
+        InjectionUnits.run(None, 'on_load_complete', None, services.get_instance_manager(StandInTypes.SNIPPET).call_on_load_complete)
+        return time.perf_counter() - t
+
+
+def read_snapshot(file_name: str) -> Dict[str, Any]:
+    with gzip.open(file_name, 'rt', encoding='UTF-8') as fp:
+        return json.load(fp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay XmlInjector snippets from a catalogue snapshot against stand-in tunings.')
+    parser.add_argument('snapshot', help="'catalogue_snapshot.json.gz' written by 'xml_injector.dump_catalogue'")
+    parser.add_argument('--profile', help='Write cProfile statistics of the replay to this pstats file')
+    parser.add_argument('--lazy', action='store_true', help="Replay with 'lazy_object_affordances' enabled")
+    parser.add_argument('--keep-injected', action='store_true', help='Do not remove the injected affordances from the snapshot before the replay')
+    parser.add_argument('--selector-threshold', type=int, help="Override the 'selector_threshold' setting")
+    parser.add_argument('--selector-action', choices=(SelectorCost.ACTION_LOG, SelectorCost.ACTION_CAP, SelectorCost.ACTION_REFUSE), help="Override the 'selector_action' setting")
+    parser.add_argument('--release-payloads', action='store_true', help="Replay with 'release_snippet_payloads' enabled")
+    parser.add_argument('--no-loot-merge', action='store_true', help="Replay with 'merge_duplicate_loot' disabled")
+    parser.add_argument('--sample-load', action='store_true', help="Replay with 'profile_load' enabled, the files are written to mod_logs of the stand-in documents directory")
+    parser.add_argument('--export-changes', action='store_true', help="Replay with 'export_changes' enabled, the export is written to mod_data of the stand-in documents directory")
+    parser.add_argument('--verbose', action='store_true', help='Print the injector log')
+    args = parser.parse_args()
+
+    StandInLog.VERBOSE = args.verbose
+    LazyAffordances.ENABLED = args.lazy
+    SnippetPayloads.ENABLED = args.release_payloads
+    # InjectionScheduler starts and stops the optional modules by their setting
+    Settings.set('profile_load', args.sample_load)
+    LoadProfiler.ENABLED = args.sample_load
+    if args.export_changes:
+        Settings.set('export_changes', True)
+        ChangeExport.ENABLED = True
+        ChangeExport.enable()
+    if args.no_loot_merge:
+        # The operations read the setting when they are registered
+        LootMerges.ENABLED = Operations.get('add_to_loot_actions').unique = Operations.get('add_to_random_loot_actions').unique = False
+    if args.selector_threshold is not None:
+        SelectorCost.THRESHOLD = args.selector_threshold
+    if args.selector_action is not None:
+        SelectorCost.ACTION = args.selector_action
+
+    t = time.perf_counter()
+    snapshot = read_snapshot(args.snapshot)
+    catalogue = Catalogue(snapshot, keep_injected=args.keep_injected)
+    print(f"Built {len(snapshot['objects']['ids'])} objects and {len(catalogue.affordances)} affordances from {len(snapshot['snippets'])} snippets in {time.perf_counter() - t:.3f}s")
+
+    replay = Replay(catalogue)
+    if args.profile:
+        profile = cProfile.Profile()
+        total = profile.runcall(replay.replay)
+        profile.dump_stats(args.profile)
+        print(f'Wrote {args.profile}')
+    else:
+        total = replay.replay()
+
+    print(f'Replayed in {total:.3f}s')
+    print(f'object_sim (before, added, after): {SimAffordances.get_counts()}')
+    for batch in BatchedAdditions._batches:
+        print(f'{batch.name}: {batch.duplicates} duplicates skipped')
+    print(f'Most expensive snippets, {SelectorCost.capped} selections capped, {SelectorCost.refused} refused:')
+    for line in SelectorCost.get_report():
+        print(f'  {line}')
+    print('Counters:')
+    for line in Stats.get_report():
+        print(f'  {line}')
+    if InjectionUnits.errors:
+        print(f'{len(InjectionUnits.errors)} failed entries')
+        for error in InjectionUnits.errors:
+            print(f'  {error}')
+    if args.lazy:
+        print(f'Lazy object affordances: {LazyAffordances.pending_tunings} tunings pending')
+    if args.release_payloads:
+        print(SnippetPayloads.get_report(0)[0])
+    if LootMerges.ENABLED:
+        for line in LootMerges.get_report(5):
+            print(line)
+    if ChangeExport.ENABLED:
+        print(f'Changes exported to {os.path.join(Settings.get_mod_data_directory(), ChangeExport.FILE_NAME)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Stand-ins for the game and S4CL modules which 'xml_injector' imports, so the injector can run
+# outside of the game. install() registers them in sys.modules and must be called before anything
+# from 'xml_injector' is imported. Only the attributes the injector uses are implemented.
+#
+# The Stand* classes build the tunings (object tunings, interactions, AffordanceLists, ...) which
+# the tools in this folder feed to AddToTuning and ObjectSelection.
+
+
+import os
+import sys
+import tempfile
+import types
+from typing import Any, Callable, Dict, Iterable, List
+
+
+class StandInLog:
+    VERBOSE = False
+
+    def __init__(self, name: str = ''):
+        self.name = name
+
+    def _print(self, level: str, message: str):
+        if StandInLog.VERBOSE:
+            print(f'{level}: {message}')
+
+    def enable(self):
+        pass
+
+    def debug(self, message, *_, **__):
+        self._print('DEBUG', message)
+
+    def info(self, message, *_, **__):
+        self._print('INFO', message)
+
+    def warn(self, message, *_, **__):
+        self._print('WARN', message)
+
+    def error(self, message, *_, **__):
+        # Errors are always shown
+        print(f'ERROR: {message}')
+
+
+class StandInValues:
+    # FrozenAttributeDict / tuned values with clone_with_overrides()
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def clone_with_overrides(self, **kwargs):
+        return StandInValues(**{**self.__dict__, **kwargs})
+
+    def __repr__(self):
+        return f'StandInValues({self.__dict__})'
+
+
+class StandInTuning:
+    # Base class of all stand-in tuning classes, tunings are classes in the game.
+    guid64 = 0
+
+    @classmethod
+    def create(cls, name: str, guid64: int, **attributes):
+        attributes['guid64'] = guid64
+        return type(name, (cls,), attributes)
+
+
+class StandInObject(StandInTuning):
+    pass
+
+
+class StandInAffordance(StandInTuning):
+    pass
+
+
+class StandInDefinition:
+    __slots__ = ('id', 'cls', 'build_buy_tags')
+
+    def __init__(self, cls, build_buy_tags: Iterable[int]):
+        self.id = cls.guid64
+        self.cls = cls
+        self.build_buy_tags = frozenset(build_buy_tags)
+
+
+class StandInInstanceManager:
+    def __init__(self):
+        self._tuned_classes: Dict[int, Any] = {}
+        self._on_load_complete: List[Callable] = []
+
+    @property
+    def types(self) -> Dict[int, Any]:
+        return self._tuned_classes
+
+    def get(self, guid64: int):
+        return self._tuned_classes.get(guid64, None)
+
+    def add(self, tuning):
+        self._tuned_classes[tuning.guid64] = tuning
+
+    def add_on_load_complete(self, callback: Callable):
+        self._on_load_complete.append(callback)
+
+    def call_on_load_complete(self):
+        for callback in self._on_load_complete:
+            callback(self)
+
+
+class StandInDefinitionManager(StandInInstanceManager):
+    def __init__(self):
+        super().__init__()
+        self.definitions: Dict[int, StandInDefinition] = {}
+        self._tag_cache: Dict[int, List[StandInDefinition]] = None
+        self.tag_cache_refreshes = 0
+
+    @property
+    def loaded_definitions(self):
+        return self.definitions.values()
+
+    def get(self, guid64: int):
+        # DefinitionManager.get() returns the definition, super().get() the tuning.
+        return self.definitions.get(guid64, None)
+
+    def add(self, tuning, build_buy_tags: Iterable[int] = ()):
+        super().add(tuning)
+        self.definitions[tuning.guid64] = StandInDefinition(tuning, build_buy_tags)
+        self._tag_cache = None
+
+    def refresh_build_buy_tag_cache(self, refresh_definition_cache=True):
+        if self._tag_cache is not None:
+            return
+        self.tag_cache_refreshes += 1
+        self._tag_cache = {}
+        for definition in self.definitions.values():
+            for t in definition.build_buy_tags:
+                self._tag_cache.setdefault(t, []).append(definition)
+
+    def get_definitions_for_tags_gen(self, tags):
+        self.refresh_build_buy_tag_cache()
+        for t in tags:
+            yield from self._tag_cache.get(int(t), ())
+
+
+class StandInServices:
+    def __init__(self):
+        self.managers: Dict[Any, StandInInstanceManager] = {}
+        self.definition_manager_instance = StandInDefinitionManager()
+
+    def get_instance_manager(self, instance_type):
+        manager = self.managers.get(instance_type, None)
+        if manager is None:
+            manager = self.managers[instance_type] = StandInInstanceManager()
+        return manager
+
+
+class _Enum(int):
+    pass
+
+
+class StandInTag:
+    INVALID = _Enum(0)
+
+
+class StandInTypes:
+    SNIPPET = 'snippet'
+    OBJECT = 'object'
+    INTERACTION = 'interaction'
+    ACTION = 'action'
+    TRAIT = 'trait'
+    BUFF = 'buff'
+    REWARD = 'reward'
+    DRAMA_NODE = 'drama_node'
+
+
+class _AutoFactoryInit:
+    def __init__(self, *_, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _HasTunableSingletonFactory:
+    @classmethod
+    def TunableFactory(cls, *_, **__):
+        return cls
+
+
+class _Tunable:
+    def __init__(self, *_, **kwargs):
+        self.kwargs = kwargs
+
+
+class _SatisfactionTracker:
+    class SatisfactionAwardTypes:
+        MONEY = 0
+    SATISFACTION_STORE_ITEMS: Dict = {}
+
+
+class _CommonModIdentity:
+    def __init__(self, mod_info):
+        self.name = mod_info._name
+        self.author = mod_info._author
+        self.base_namespace = mod_info._base_namespace
+        self.file_path = mod_info._file_path
+        self.version = mod_info._version
+
+
+class _CommonModInfo:
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def get_identity(cls):
+        return _CommonModIdentity(cls.get())
+
+
+class _CommonLogRegistry:
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def register_log(self, _mod_identity, name: str, *_, **__):
+        return StandInLog(name)
+
+
+class _CommonLogUtils:
+    DOCUMENTS_DIRECTORY = os.path.join(tempfile.gettempdir(), 'xml_injector_stand_in')
+
+    @staticmethod
+    def get_sims_documents_location_path() -> str:
+        return _CommonLogUtils.DOCUMENTS_DIRECTORY
+
+
+class _CommonEventRegistry:
+    @staticmethod
+    def handle_events(*_, **__):
+        return lambda fn: fn
+
+
+services_instance: StandInServices = None
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install() -> StandInServices:
+    # Register the stand-in modules, return the StandInServices instance backing 'services'.
+    global services_instance
+    if services_instance is not None:
+        return services_instance
+    services_instance = StandInServices()
+    _module(
+        'services',
+        get_instance_manager=services_instance.get_instance_manager,
+        definition_manager=lambda: services_instance.definition_manager_instance,
+        affordance_manager=lambda: services_instance.get_instance_manager(StandInTypes.INTERACTION),
+    )
+    _module('sims4')
+    _module('sims4.resources', Types=StandInTypes, CompoundTypes=types.SimpleNamespace(IMAGE=()), get_resource_key=lambda *args: args)
+    _module('sims4.collections', FrozenAttributeDict=dict)
+    _module('sims4.tuning')
+    _module(
+        'sims4.tuning.tunable',
+        AutoFactoryInit=_AutoFactoryInit, HasTunableSingletonFactory=_HasTunableSingletonFactory,
+        Tunable=_Tunable, TunableList=_Tunable, TunableReference=_Tunable, TunableVariant=_Tunable, TunableEnumEntry=_Tunable,
+        TunableTuple=_Tunable, OptionalTunable=_Tunable, TunableResourceKey=_Tunable, TunableMapping=_Tunable,
+    )
+    _module('objects')
+    _module('objects.definition_manager', DefinitionManager=StandInDefinitionManager)
+    _module('satisfaction')
+    _module('satisfaction.satisfaction_tracker', SatisfactionTracker=_SatisfactionTracker)
+    _module('tag', Tag=StandInTag)
+    _module('sims4communitylib')
+    _module('sims4communitylib.mod_support')
+    _module('sims4communitylib.mod_support.common_mod_info', CommonModInfo=_CommonModInfo)
+    _module('sims4communitylib.utils')
+    _module('sims4communitylib.utils.common_log_registry', CommonLog=StandInLog, CommonLogRegistry=_CommonLogRegistry)
+    _module('sims4communitylib.utils.common_log_utils', CommonLogUtils=_CommonLogUtils)
+    _module('sims4communitylib.events')
+    _module('sims4communitylib.events.event_handling')
+    _module('sims4communitylib.events.event_handling.common_event_registry', CommonEventRegistry=_CommonEventRegistry)
+    _module('sims4communitylib.events.zone_spin')
+    _module('sims4communitylib.events.zone_spin.events')
+    _module('sims4communitylib.events.zone_spin.events.zone_early_load', S4CLZoneEarlyLoadEvent=object)
+    _module('sims4communitylib.events.zone_spin.events.zone_late_load', S4CLZoneLateLoadEvent=object)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return services_instance
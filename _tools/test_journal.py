@@ -0,0 +1,53 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Runs failing snippet entries through InjectionUnits against the stand-in snippet manager.
+# Usage: python -m pytest _tools/test_journal.py
+
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stand_ins  # noqa: E402
+from stand_ins import StandInTuning, StandInTypes  # noqa: E402
+
+services = stand_ins.install()
+
+from xml_injector.journal import InjectionUnits, Journal  # noqa: E402
+
+
+class Target:
+    values = ()
+
+
+def add_values(entry):
+    Journal.setattr(Target, 'values', Target.values + entry)
+    if Target.values.count(2) > 1:
+        raise ValueError('2 added twice')
+
+
+def test_failed_entry_is_reverted_and_retried():
+    snippet = StandInTuning.create('snippet_journal', 7001, entries=((1,), (2,), (2,)))
+    services.get_instance_manager(StandInTypes.SNIPPET).add(snippet)
+    errors = InjectionUnits.errors
+    InjectionUnits.errors = []
+    try:
+        for index, entry in enumerate(snippet.entries):
+            InjectionUnits.run(snippet, 'entries', index, add_values, entry)
+        assert Target.values == (1, 2)
+        error, = InjectionUnits.errors
+        # Only the snippet id, section and index identify the entry
+        assert (error.snippet_id, error.section, error.index) == (7001, 'entries', 2)
+        assert str(error) == 'snippet_journal.entries[2]: ValueError: 2 added twice'
+        assert 'in add_values' in error.get_details()
+
+        # The entry is read again from the snippet
+        snippet.entries = ((1,), (2,), (3,))
+        assert InjectionUnits.retry() == (1, 0)
+        assert Target.values == (1, 2, 3)
+    finally:
+        InjectionUnits.errors = errors
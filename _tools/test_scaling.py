@@ -0,0 +1,34 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Runs each scenario of check_scaling.py (every operation and object selection variant) with smaller
+# sizes and fails if a count grows faster than the declared complexity.
+# Usage: python -m pytest _tools/test_scaling.py
+
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import check_scaling  # noqa: E402
+
+
+SCENARIOS = check_scaling.get_scenarios()
+ARGS = SimpleNamespace(sizes=[50, 100, 200, 400], objects=500, catalogue_sizes=[500, 1000, 2000, 4000], snippets=50,
+                       tolerance=0.2, seed=19, verbose=False)
+
+
+def test_exponent_of_quadratic_growth():
+    assert check_scaling.get_exponent([100, 200, 400], [10000, 40000, 160000]) == pytest.approx(2.0)
+    assert check_scaling.get_exponent([100, 200, 400], [7, 7, 7]) == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize('name', list(SCENARIOS))
+def test_scenario_within_declared_complexity(name: str):
+    assert check_scaling.check(name, SCENARIOS[name], ARGS) == []
@@ -0,0 +1,72 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Runs object selections above 'selector_threshold' through AddToTuning.get_objects() against the
+# stand-in catalogue. Usage: python -m pytest _tools/test_selector_cost.py
+
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stand_ins  # noqa: E402
+from stand_ins import StandInAffordance, StandInObject  # noqa: E402
+
+services = stand_ins.install()
+
+from xml_injector.add_to_tuning import AddToTuning  # noqa: E402
+from xml_injector.lazy_affordances import LazyAffordances  # noqa: E402
+from xml_injector.object_selection import ObjectSelection  # noqa: E402
+from xml_injector.selector_cost import SelectorCost  # noqa: E402
+
+
+def create_catalogue(count: int):
+    affordance = StandInAffordance.create('affordance_1', 1)
+    for i in range(count):
+        guid64 = 1000 + i
+        services.definition_manager_instance.add(StandInObject.create(f'chair_{guid64}', guid64, _super_affordances=(affordance,)))
+
+
+def run_selection(action: str, attribute: str = None, estimate: int = None) -> list:
+    threshold, previous_action = SelectorCost.THRESHOLD, SelectorCost.ACTION
+    SelectorCost.THRESHOLD = 2
+    SelectorCost.ACTION = action
+    object_selection = ObjectSelection._ObjectsMatchingName(partial_name='chair')
+    if estimate is not None:
+        object_selection.estimate_objects = lambda: estimate
+    try:
+        return AddToTuning.get_objects(object_selection, 1, attribute)
+    finally:
+        SelectorCost.THRESHOLD, SelectorCost.ACTION = threshold, previous_action
+
+
+@pytest.fixture(scope='module', autouse=True)
+def catalogue():
+    create_catalogue(5)
+
+
+def test_refused_selection_matches_no_objects():
+    refused = SelectorCost.refused
+    assert run_selection(SelectorCost.ACTION_REFUSE) == []
+    assert run_selection(SelectorCost.ACTION_REFUSE, LazyAffordances.ATTRIBUTE) == []
+    assert SelectorCost.refused == refused + 2
+
+
+def test_selection_refused_by_match_count():
+    # The estimate is below the threshold, the 5 matched objects are above it
+    refused = SelectorCost.refused
+    assert run_selection(SelectorCost.ACTION_REFUSE, LazyAffordances.ATTRIBUTE, estimate=1) == []
+    assert SelectorCost.refused == refused + 1
+
+
+def test_capped_selection_matches_threshold_objects():
+    assert len(run_selection(SelectorCost.ACTION_CAP, LazyAffordances.ATTRIBUTE)) == 2
+
+
+def test_logged_selection_matches_all_objects():
+    assert len(run_selection(SelectorCost.ACTION_LOG, LazyAffordances.ATTRIBUTE)) == 5
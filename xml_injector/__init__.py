@@ -0,0 +1,11 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# Start the import profiler ('profile_imports' setting) before the other modules are imported.
+from xml_injector.settings import Settings
+if Settings.get('profile_imports', False):
+    from xml_injector.import_profiler import ImportProfiler
+    ImportProfiler.start()
@@ -7,8 +7,9 @@
 # XML Injector version 2
 # by Scumbumbo @ MTS
 #
-# Functions in the add_to_tuning module are called by the snippet's _tuning_loaded_callback
-# in order to process the addition of affordances to the various game objects.
+# The add_to_tuning module registers the operations of the snippet sections. AddToTuning
+# provides the targets of each entry and the apply steps which write the additions to the
+# various game objects, see the operations module for the engine which runs them.
 #
 # This mod is intended as a standard for modder's to use as a shared library.  Please do not
 # distribute any modifications anywhere other than the mod's main download site.  Modification
@@ -17,13 +18,21 @@
 #
 
 
-import services
-from objects.definition_manager import DefinitionManager
+from types import SimpleNamespace
+from typing import Any, Dict, List
 
 from satisfaction.satisfaction_tracker import SatisfactionTracker
 from sims4.collections import FrozenAttributeDict
 
+from xml_injector.injection_scheduler import InjectionScheduler
+from xml_injector.journal import Journal
+from xml_injector.lazy_affordances import LazyAffordances
+from xml_injector.loot_merges import LootMerges
 from xml_injector.modinfo import ModInfo
+from xml_injector.object_slots import ObjectSlots
+from xml_injector.operations import Operation, Operations
+from xml_injector.sim_affordances import SimAffordances
+from xml_injector.stats import Stats
 from sims4communitylib.utils.common_log_registry import CommonLog, CommonLogRegistry
 
 
@@ -32,193 +41,293 @@ log.enable()
 
 
 class AddToTuning:
-    OBJECT_SIM = 14965  # The instance ID for the object_sim tuning
-    TESTING = False  # If testing then allow adding multiple copies of affordance to _super_affordances
+    OBJECT_SIM = SimAffordances.OBJECT_SIM  # The instance ID for the object_sim tuning
+    TESTING = False  # If testing then allow adding multiple copies of the same addition (read by Operation)
+    # mixer: [AffordanceList, ...], the AffordanceLists each mixer was injected into
+    MIXER_AFFORDANCE_LISTS: Dict[Any, List] = {}
 
     @staticmethod
-    def add_super_affordances_to_objects(object_selection, sa_list):
-        for tuning in object_selection.get_objects():
-            if hasattr(tuning, '_super_affordances'):
-                sa_to_add_list = []
-                for sa in sa_list:
-                    if AddToTuning.TESTING or sa not in tuning._super_affordances:
-                        sa_to_add_list.append(sa)
-                if len(sa_to_add_list) > 0:
-                    # noinspection PyBroadException
-                    try:
-                        log.info(f'  {tuning.__name__}: adding super_affordances to objects: {sa_to_add_list}')  # TODO, log [] properly
-                    except:
-                        log.info(f'  {tuning}: adding super_affordances to objects: {sa_to_add_list}')
-                    tuning._super_affordances += tuple(sa_to_add_list)
+    def get_objects(object_selection, additions: int, attribute: str = None) -> List:
+        # The object tunings of object_selection, with attribute if set. Only the apply code needs the selector costs.
+        from xml_injector.selector_cost import SelectorCost
+        objects = SelectorCost.get_object_bits(object_selection, additions)
+        if attribute is not None:
+            objects = ObjectSlots.filter_attribute(objects, attribute)
+        return objects.get_tunings()
 
     @staticmethod
-    def add_super_affordances_to_sims(sa_list):
-        definition_manager = services.definition_manager()
-        object_sim = super(DefinitionManager, definition_manager).get(AddToTuning.OBJECT_SIM)
-        sa_to_add_list = []
-        for sa in sa_list:
-            if AddToTuning.TESTING or sa not in object_sim._super_affordances:
-                sa_to_add_list.append(sa)
-        if len(sa_to_add_list) > 0:
-            log.info(f'  {object_sim}: adding super_affordances to sims: {sa_to_add_list}')
-            object_sim._super_affordances += tuple(sa_to_add_list)
+    def get_components(object_selection, additions: int, component_name: str) -> List:
+        # The components of the object tunings of object_selection, object tunings often share a component
+        components = []
+        for tuning in AddToTuning.get_objects(object_selection, additions, '_components'):
+            component = getattr(tuning._components, component_name, None)
+            if component is not None:
+                components.append(component)
+        return components
 
     @staticmethod
-    def add_super_affordances_to_phones(sa_list):
-        definition_manager = services.definition_manager()
-        object_sim = super(DefinitionManager, definition_manager).get(AddToTuning.OBJECT_SIM)
-        sa_to_add_list = []
-        for sa in sa_list:
-            if AddToTuning.TESTING or sa not in object_sim._phone_affordances:
-                sa_to_add_list.append(sa)
-        if len(sa_to_add_list) > 0:
-            log.info(f'  phones: adding super_affordances to phones: {sa_to_add_list}')
-            object_sim._phone_affordances += tuple(sa_to_add_list)
+    def get_objects_with_component(object_selection, component_name: str) -> List:
+        return [tuning for tuning in AddToTuning.get_objects(object_selection, 1, '_components') if hasattr(tuning._components, component_name)]
 
     @staticmethod
-    def add_super_affordances_to_relpanel(sa_list):
-        definition_manager = services.definition_manager()
-        object_sim = super(DefinitionManager, definition_manager).get(AddToTuning.OBJECT_SIM)
-        sa_to_add_list = []
-        for sa in sa_list:
-            if AddToTuning.TESTING or sa not in object_sim._relation_panel_affordances:
-                sa_to_add_list.append(sa)
-        if len(sa_to_add_list) > 0:
-            log.info(f'  relpanel: adding super_affordances to relpanel: {sa_to_add_list}')
-            object_sim._relation_panel_affordances += tuple(sa_to_add_list)
+    def get_names(tunings) -> str:
+        return ', '.join(getattr(tuning, '__name__', str(tuning)) for tuning in tunings)
 
     @staticmethod
-    def add_mixer_to_affordance_list(affordance_lists_list, mixer_list):
-        for affordance_list in affordance_lists_list:
-            mixers_to_add_list = []
-            for mixer in mixer_list:
-                if AddToTuning.TESTING or mixer not in affordance_list.value:
-                    mixers_to_add_list.append(mixer)
-            if len(mixers_to_add_list) > 0:
-                log.info(f'  {affordance_list}: adding mixer interactions: {mixers_to_add_list}')
-                affordance_list.value += tuple(mixers_to_add_list)
+    def apply_super_affordances_to_objects(tuning, sa_list):
+        if LazyAffordances.ENABLED:
+            LazyAffordances.add_super_affordances(tuning, sa_list, allow_duplicates=True)
+            Operations.log_change(lambda: f'  {AddToTuning.get_names((tuning,))}: recording super_affordances to add to objects on first use: {AddToTuning.get_names(sa_list)}')
+        else:
+            Operations.log_change(lambda: f'  {AddToTuning.get_names((tuning,))}: adding super_affordances to objects: {AddToTuning.get_names(sa_list)}')
+            Operations.write(tuning, '_super_affordances', tuning._super_affordances + tuple(sa_list))
 
     @staticmethod
-    def add_to_loot_actions(loot_actions, loot_action_variant_list):
-        log.info(f'  {loot_actions}: adding loot actions: {loot_action_variant_list}')
+    def apply_mixer_interactions(affordance_list, mixer_list):
+        # Social mixer mods add to the same few AffordanceLists, the mixers are written once per AffordanceList for all snippets.
+        Operations.log_change(lambda: f'  {affordance_list}: adding mixer interactions: {mixer_list}')
+        Operations.write(affordance_list, 'value', affordance_list.value + tuple(mixer_list))
+        for mixer in mixer_list:
+            AddToTuning.MIXER_AFFORDANCE_LISTS.setdefault(mixer, []).append(affordance_list)
+        Journal.on_rollback(lambda: AddToTuning._remove_mixer_affordance_lists(affordance_list, mixer_list))
+
+    @staticmethod
+    def _remove_mixer_affordance_lists(affordance_list, mixer_list):
+        for mixer in mixer_list:
+            affordance_lists = AddToTuning.MIXER_AFFORDANCE_LISTS.get(mixer, [])
+            if affordance_list in affordance_lists:
+                affordance_lists.remove(affordance_list)
+
+    @staticmethod
+    def get_affordance_lists(mixer) -> list:
+        # The AffordanceLists the mixer was injected into
+        return list(AddToTuning.MIXER_AFFORDANCE_LISTS.get(mixer, ()))
+
+    @staticmethod
+    def apply_loot_actions(loot_actions, loot_action_variant_list):
+        Operations.log_change(lambda: f'  {loot_actions}: adding loot actions: {loot_action_variant_list}')
         saved_loot_actions = loot_actions.loot_actions
-        loot_actions.loot_actions += loot_action_variant_list
+        Operations.write(loot_actions, 'loot_actions', loot_actions.loot_actions + tuple(loot_action_variant_list))
         try:
             loot_actions._validate_recursion()
         except RecursionError:
             log.error(f' Added loot actions create a recursion, this would throw exceptions when used in game.')
             log.error(f' Loot action changes reverted')
-            loot_actions.loot_actions = saved_loot_actions
+            Journal.setattr(loot_actions, 'loot_actions', saved_loot_actions)
 
     @staticmethod
-    def add_to_random_loot_actions(random_loot_actions, random_loot_actions_list):
-        log.info(f'  {random_loot_actions}: adding random loot actions: {random_loot_actions_list}')
+    def apply_random_loot_actions(random_loot_actions, random_loot_actions_list):
+        Operations.log_change(lambda: f'  {random_loot_actions}: adding random loot actions: {random_loot_actions_list}')
         saved_loot_actions = random_loot_actions.random_loot_actions
-        random_loot_actions.random_loot_actions += random_loot_actions_list
+        Operations.write(random_loot_actions, 'random_loot_actions', random_loot_actions.random_loot_actions + tuple(random_loot_actions_list))
         try:
             random_loot_actions._validate_recursion()
         except RecursionError:
             log.error(f' Added random loot actions create a recursion, this would throw exceptions when used in game.')
             log.error(f' Random loot action changes reverted')
-            random_loot_actions.random_loot_actions = saved_loot_actions
+            Journal.setattr(random_loot_actions, 'random_loot_actions', saved_loot_actions)
+
+    @staticmethod
+    def get_state_additions(new_state_component) -> int:
+        return len(new_state_component.states or ()) + len(new_state_component.state_triggers or ())
+
+    @staticmethod
+    def apply_states(state_component, new_state_components):
+        # The states and state_triggers of all snippets are added with one clone of the state component
+        states = tuple(state for new_state_component in new_state_components for state in (new_state_component.states or ()))
+        state_triggers = tuple(trigger for new_state_component in new_state_components for trigger in (new_state_component.state_triggers or ()))
+        overrides = {}
+        if states:
+            Operations.log_change(lambda: f'  {state_component}: adding states to objects: {states}')
+            overrides['states'] = state_component._tuned_values.states + states
+        if state_triggers:
+            Operations.log_change(lambda: f'  {state_component}: adding state_triggers to objects: {state_triggers}')
+            overrides['state_triggers'] = state_component._tuned_values.state_triggers + state_triggers
+        if overrides:
+            Operations.write(state_component, '_tuned_values', state_component._tuned_values.clone_with_overrides(**overrides), Stats.CLONES)
+
+    @staticmethod
+    def apply_component(tuning, component_name: str, components):
+        # Only one component can be added, the first one is used
+        for component in components:
+            if getattr(tuning._components, component_name) is not None:
+                log.error(f' {tuning}: already has {component_name} component, cannot add')
+            else:
+                Operations.log_change(lambda: f'  {tuning}: adding {component_name} component to objects: {component._tuned_values}')
+                Operations.write(tuning, '_components', tuning._components.clone_with_overrides(**{component_name: component}), Stats.CLONES)
+
+    @staticmethod
+    def apply_lock_aware_interactions(object_locking_component, sa_list):
+        # For adding to the "locked" set of interactions on a computer (or any other future lockable objects like them)
+        # Object tunings often share their object_locking_component, it is updated once for all snippets.
+        super_affordances = object_locking_component._tuned_values.super_affordances
+        Operations.log_change(lambda: f'  {object_locking_component}: adding super_affordances to lockable objects: {sa_list}')
+        Operations.write(object_locking_component, '_tuned_values', object_locking_component._tuned_values.clone_with_overrides(
+            super_affordances=frozenset(super_affordances.union(sa_list))), Stats.CLONES)
+
+    @staticmethod
+    def apply_buffs(trait, buffs_list):
+        # Buffs are identified by their buff_type, a buff added twice would be applied twice to every Sim with the trait.
+        Operations.log_change(lambda: f'  {trait}: adding buffs to traits: {[b.buff_type for b in buffs_list]}')
+        Operations.write(trait, 'buffs', trait.buffs + tuple(buffs_list))
+
+    @staticmethod
+    def apply_satisfaction_store_rewards(satisfaction_tracker, rewards_list):
+        # rewards_list: (reward, value) of all snippets, a later value for the same reward replaces an earlier one
+        for reward in rewards_list:
+            Operations.log_change(lambda: f'  adding satisfaction store rewards: {reward}')
+        Operations.write(satisfaction_tracker, 'SATISFACTION_STORE_ITEMS', FrozenAttributeDict(
+            {**dict(satisfaction_tracker.SATISFACTION_STORE_ITEMS), **dict(rewards_list)}))
+
+    @staticmethod
+    def get_interactions(sa_list, attribute: str) -> List:
+        return [sa for sa in sa_list if sa is not None and hasattr(sa, attribute)]
+
+    @staticmethod
+    def apply_purchase_list_options(sa, purchase_list_options_list):
+        Operations.log_change(lambda: f'  {sa}: super_affordances adding purchase_list_options: {purchase_list_options_list}')
+        Operations.write(sa, 'purchase_list_option', sa.purchase_list_option + tuple(purchase_list_options_list))
+
+    @staticmethod
+    def apply_picker_dialog_categories(sa, picker_dialog_categories_list):
+        # Categories are identified by their tag, the first category added for a tag is kept.
+        Operations.log_change(lambda: f'  {sa}: super_affordances adding picker dialog categories to interactions: {picker_dialog_categories_list}')
+        Operations.write(sa.picker_dialog, '_tuned_values', sa.picker_dialog._tuned_values.clone_with_overrides(
+            categories=sa.picker_dialog._tuned_values.categories + tuple(picker_dialog_categories_list)), Stats.CLONES)
+
+    # The add_* methods are kept for other mods which call this library. They run the operation of the
+    # section for one entry and write the additions immediately, also after the snippets have been loaded.
+    @staticmethod
+    def _run(section: str, **entry):
+        Operations.get(section).run(SimpleNamespace(**entry), batched=False)
+
+    @staticmethod
+    def add_super_affordances_to_objects(object_selection, sa_list):
+        AddToTuning._run('add_interactions_to_objects', object_selection=object_selection, _super_affordances=sa_list)
+
+    @staticmethod
+    def add_super_affordances_to_sims(sa_list):
+        Operations.get('add_interactions_to_sims').run(sa_list, batched=False)
+
+    @staticmethod
+    def add_super_affordances_to_phones(sa_list):
+        Operations.get('add_interactions_to_phones').run(sa_list, batched=False)
+
+    @staticmethod
+    def add_super_affordances_to_relpanel(sa_list):
+        Operations.get('add_interactions_to_relationship_panel').run(sa_list, batched=False)
+
+    @staticmethod
+    def add_mixer_to_affordance_list(affordance_lists_list, mixer_list):
+        AddToTuning._run('add_mixer_interactions', mixer_snippets=affordance_lists_list, affordances=mixer_list)
+
+    @staticmethod
+    def add_to_loot_actions(loot_actions, loot_action_variant_list):
+        AddToTuning._run('add_to_loot_actions', loot_actions_ref=loot_actions, loot_actions_to_add=loot_action_variant_list)
+
+    @staticmethod
+    def add_to_random_loot_actions(random_loot_actions, random_loot_actions_list):
+        AddToTuning._run('add_to_random_loot_actions', random_weighted_loot_ref=random_loot_actions, random_loot_actions_to_add=random_loot_actions_list)
 
     @staticmethod
     def add_states_to_objects(object_selection, new_state_component):
-        for tuning in object_selection.get_objects():
-            if hasattr(tuning, '_components') and hasattr(tuning._components, 'state'):
-                state_component = tuning._components.state
-                if new_state_component.states:
-                    log.info(f'  {tuning}: adding states to objects: {new_state_component.states}')
-                    state_component._tuned_values = state_component._tuned_values.clone_with_overrides(
-                        states=state_component._tuned_values.states + new_state_component.states)
-                if new_state_component.state_triggers:
-                    log.info(f'  {tuning}: adding state_triggers to objects: {new_state_component.state_triggers}')
-                    state_component._tuned_values = state_component._tuned_values.clone_with_overrides(
-                        state_triggers=state_component._tuned_values.state_triggers + new_state_component.state_triggers)
+        AddToTuning._run('add_states_to_objects', object_selection=object_selection, state_component=new_state_component)
 
     @staticmethod
     def add_name_component_to_objects(object_selection, name_component):
-        for tuning in object_selection.get_objects():
-            if hasattr(tuning, '_components') and hasattr(tuning._components, 'name'):
-                if tuning._components.name is None:
-                    log.info(f'  {tuning}: adding name component to objects: {name_component._tuned_values}')
-                    tuning._components = tuning._components.clone_with_overrides(name=name_component)
-                else:
-                    log.error(f' {tuning}: already has name component, cannot add')
+        AddToTuning._run('add_name_component_to_objects', object_selection=object_selection, name_component=name_component)
 
     @staticmethod
     def add_object_relationships_to_objects(object_selection, object_relationships_component):
-        for tuning in object_selection.get_objects():
-            if hasattr(tuning, '_components') and hasattr(tuning._components, 'object_relationships'):
-                if tuning._components.object_relationships is None:
-                    log.info(f'  {tuning}: adding object_relationships component to objects: {object_relationships_component._tuned_values}')
-                    tuning._components = tuning._components.clone_with_overrides(
-                        object_relationships=object_relationships_component)
-                else:
-                    log.error(f' {tuning}: already has object_relationships component, cannot add')
+        AddToTuning._run('add_object_relationships_to_objects', object_selection=object_selection, object_relationships_component=object_relationships_component)
 
     @staticmethod
     def add_lock_aware_interactions_to_lockable_objects(object_selection, sa_list):
-        # For adding to the "locked" set of interactions on a computer (or any other future lockable objects like them)
-        for tuning in object_selection.get_objects():
-            if hasattr(tuning, '_components') and hasattr(tuning._components, 'object_locking_component'):
-                sa_to_add_list = []
-                for sa in sa_list:
-                    if AddToTuning.TESTING or sa not in sa_to_add_list:
-                        sa_to_add_list.append(sa)
-                if len(sa_to_add_list) > 0:
-                    log.info(f'  {tuning}: adding super_affordances to lockable objects: {sa_to_add_list}')
-                    tuning._components.object_locking_component._tuned_values = tuning._components.object_locking_component._tuned_values.clone_with_overrides(
-                        super_affordances=frozenset(tuning._components.object_locking_component._tuned_values.super_affordances.union(frozenset(sa_to_add_list))))
+        AddToTuning._run('add_lock_aware_interactions_to_lockable_objects', object_selection=object_selection, super_affordances=sa_list)
 
     @staticmethod
     def add_buffs_to_trait(trait, buffs_list):
-        log.info(f'  {trait}: adding buffs to traits: {[b.buff_type for b in buffs_list]}')
-        trait.buffs += buffs_list
+        AddToTuning._run('add_buffs_to_trait', trait=trait, buffs=buffs_list)
 
     @staticmethod
     def add_satisfaction_store_rewards(rewards_list):
-        for reward in rewards_list:
-            log.info(f'  adding satisfaction store rewards: {reward}')
-        SatisfactionTracker.SATISFACTION_STORE_ITEMS = FrozenAttributeDict(
-            {**dict(SatisfactionTracker.SATISFACTION_STORE_ITEMS), **rewards_list})
+        # rewards_list: {reward: value}
+        AddToTuning._run('add_satisfaction_store_rewards', new_items=rewards_list)
 
     @staticmethod
     def add_purchase_list_options_to_interactions(sa_list, purchase_list_options_list):
-        sa_to_add_to_list = []
-        for sa in sa_list:
-            if sa is not None and hasattr(sa, 'purchase_list_option'):
-                sa_to_add_to_list.append(sa)
-        if len(sa_to_add_to_list) > 0:
-            pl_option_to_add_to_list = []
-            for pl_option in purchase_list_options_list:
-                if pl_option is not None:
-                    pl_option_to_add_to_list.append(pl_option)
-            if len(pl_option_to_add_to_list) > 0:
-                log.info(f'  {sa_to_add_to_list}: super_affordances adding purchase_list_options: {pl_option_to_add_to_list}')
-                for sa_to_add_to in sa_to_add_to_list:
-                    sa_to_add_to.purchase_list_option += tuple(pl_option_to_add_to_list)
+        AddToTuning._run('add_purchase_list_options_to_interactions', interactions_to_add_to=sa_list, purchase_list_options=purchase_list_options_list)
 
     @staticmethod
     def add_picker_dialog_categories_to_interactions(sa_list, picker_dialog_categories_list):
-        sa_to_add_to_list = []
-        for sa in sa_list:
-            if sa is not None and hasattr(sa, 'picker_dialog'):
-                sa_to_add_to_list.append(sa)
-        if len(sa_to_add_to_list) > 0:
-            pd_cat_to_add_to_list = []
-            for pd_cat in picker_dialog_categories_list:
-                if pd_cat is not None:
-                    pd_cat_to_add_to_list.append(pd_cat)
-            if len(pd_cat_to_add_to_list) > 0:
-                log.info(f'  {sa_to_add_to_list}: super_affordances adding picker dialog categories to interactions: {pd_cat_to_add_to_list}')
-                for sa_to_add_to in sa_to_add_to_list:
-                    pd_cat_to_add_dup_validated = []
-                    for pd_cat in pd_cat_to_add_to_list:
-                        if pd_cat not in sa_to_add_to.picker_dialog._tuned_values.categories:
-                            pd_cat_to_add_dup_validated.append(pd_cat)
-                    if len(pd_cat_to_add_dup_validated) > 0:
-                        sa_to_add_to.picker_dialog._tuned_values = sa_to_add_to.picker_dialog._tuned_values.clone_with_overrides(
-                            categories=sa_to_add_to.picker_dialog._tuned_values.categories + tuple(pd_cat_to_add_dup_validated))
-                    else:
-                        log.info(f'  {sa_to_add_to}: skipped, categories to add were found to be duplicates')
+        AddToTuning._run('add_picker_dialog_categories_to_interactions', interactions_to_add_to=sa_list, picker_dialog_categories=picker_dialog_categories_list)
+
+
+# The snippet sections in the order of XmlInjector.INSTANCE_TUNABLES.
+# Object interactions are collected per object tuning and written once, object selections of later entries
+# (objects_with_affordance) see the collected interactions. 'lazy_object_affordances' records them in LazyAffordances.
+Operations.register(
+    Operation('add_interactions_to_objects', 'object interactions', InjectionScheduler.PRIORITY_OBJECTS,
+              lambda e, a: AddToTuning.get_objects(e.object_selection, len(a), LazyAffordances.ATTRIBUTE),
+              lambda e: e._super_affordances, AddToTuning.apply_super_affordances_to_objects, required=('object_selection',),
+              get_existing=LazyAffordances.get_existing),
+    Operation('add_interactions_to_sims', 'sim interactions', InjectionScheduler.PRIORITY_SIMS,
+              lambda e, a: SimAffordances.get_targets('_super_affordances'), lambda e: e,
+              lambda object_sim, sa_list: SimAffordances.apply(object_sim, '_super_affordances', sa_list),
+              get_existing=lambda object_sim: SimAffordances.get_existing(object_sim, '_super_affordances'), whole_list=True),
+    Operation('add_interactions_to_phones', 'phone interactions', InjectionScheduler.PRIORITY_SIMS,
+              lambda e, a: SimAffordances.get_targets('_phone_affordances'), lambda e: e,
+              lambda object_sim, sa_list: SimAffordances.apply(object_sim, '_phone_affordances', sa_list),
+              get_existing=lambda object_sim: SimAffordances.get_existing(object_sim, '_phone_affordances'), whole_list=True),
+    Operation('add_interactions_to_relationship_panel', 'relationship panel interactions', InjectionScheduler.PRIORITY_SIMS,
+              lambda e, a: SimAffordances.get_targets('_relation_panel_affordances'), lambda e: e,
+              lambda object_sim, sa_list: SimAffordances.apply(object_sim, '_relation_panel_affordances', sa_list),
+              get_existing=lambda object_sim: SimAffordances.get_existing(object_sim, '_relation_panel_affordances'), whole_list=True),
+    Operation('add_mixer_interactions', 'mixer interactions', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: [affordance_list for affordance_list in e.mixer_snippets if affordance_list is not None],
+              lambda e: e.affordances, AddToTuning.apply_mixer_interactions, get_existing=lambda affordance_list: set(affordance_list.value)),
+    # Loot actions are validated for recursions after each entry, loot ops with the same tuned values are merged by LootMerges
+    Operation('add_to_loot_actions', 'loot actions', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: [e.loot_actions_ref], lambda e: e.loot_actions_to_add, AddToTuning.apply_loot_actions,
+              required=('loot_actions_ref',), key_fn=LootMerges.get_signature, get_existing=LootMerges.get_existing_loot_actions,
+              unique=LootMerges.ENABLED, batched=False, on_duplicate=LootMerges.on_duplicate),
+    Operation('add_to_random_loot_actions', 'random loot actions', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: [e.random_weighted_loot_ref], lambda e: e.random_loot_actions_to_add, AddToTuning.apply_random_loot_actions,
+              required=('random_weighted_loot_ref',), key_fn=LootMerges.get_signature, get_existing=LootMerges.get_existing_random_loot_actions,
+              unique=LootMerges.ENABLED, batched=False, on_duplicate=LootMerges.on_duplicate),
+    # The same state component of a snippet is added once to a state component shared by several objects
+    Operation('add_states_to_objects', 'object states', InjectionScheduler.PRIORITY_OBJECTS,
+              lambda e, a: AddToTuning.get_components(e.object_selection, AddToTuning.get_state_additions(e.state_component), 'state'),
+              lambda e: [e.state_component], AddToTuning.apply_states, required=('object_selection', 'state_component'), key_fn=id),
+    Operation('add_name_component_to_objects', 'name components', InjectionScheduler.PRIORITY_OBJECTS,
+              lambda e, a: AddToTuning.get_objects_with_component(e.object_selection, 'name'), lambda e: [e.name_component],
+              lambda tuning, components: AddToTuning.apply_component(tuning, 'name', components),
+              required=('object_selection', 'name_component'), key_fn=id),
+    Operation('add_object_relationships_to_objects', 'object relationships components', InjectionScheduler.PRIORITY_OBJECTS,
+              lambda e, a: AddToTuning.get_objects_with_component(e.object_selection, 'object_relationships'), lambda e: [e.object_relationships_component],
+              lambda tuning, components: AddToTuning.apply_component(tuning, 'object_relationships', components),
+              required=('object_selection', 'object_relationships_component'), key_fn=id),
+    Operation('add_lock_aware_interactions_to_lockable_objects', 'lock aware interactions', InjectionScheduler.PRIORITY_OBJECTS,
+              lambda e, a: AddToTuning.get_components(e.object_selection, len(a), 'object_locking_component'),
+              lambda e: e.super_affordances, AddToTuning.apply_lock_aware_interactions, required=('object_selection',),
+              get_existing=lambda object_locking_component: object_locking_component._tuned_values.super_affordances),
+    Operation('add_buffs_to_trait', 'trait buffs', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: [e.trait], lambda e: e.buffs, AddToTuning.apply_buffs, required=('trait',),
+              key_fn=lambda b: b.buff_type, get_existing=lambda trait: {b.buff_type for b in trait.buffs}),
+    Operation('add_satisfaction_store_rewards', 'satisfaction store rewards', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: [SatisfactionTracker], lambda e: e.new_items.items(), AddToTuning.apply_satisfaction_store_rewards,
+              required=('new_items',), key_fn=id, unique=False),
+    # Purchase list options are tunable factories without a key, options with the same tuned values are added once
+    Operation('add_purchase_list_options_to_interactions', 'purchase list options', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: AddToTuning.get_interactions(e.interactions_to_add_to, 'purchase_list_option'),
+              lambda e: e.purchase_list_options, AddToTuning.apply_purchase_list_options,
+              required=('interactions_to_add_to', 'purchase_list_options'), key_fn=LootMerges.get_signature,
+              get_existing=lambda sa: {LootMerges.get_signature(pl_option) for pl_option in sa.purchase_list_option}),
+    Operation('add_picker_dialog_categories_to_interactions', 'picker dialog categories', InjectionScheduler.PRIORITY_TUNINGS,
+              lambda e, a: AddToTuning.get_interactions(e.interactions_to_add_to, 'picker_dialog'),
+              lambda e: e.picker_dialog_categories, AddToTuning.apply_picker_dialog_categories,
+              required=('interactions_to_add_to', 'picker_dialog_categories'), key_fn=lambda pd_cat: pd_cat.tag,
+              get_existing=lambda sa: {pd_cat.tag for pd_cat in sa.picker_dialog._tuned_values.categories}),
+)
+
+LazyAffordances.pending_batch = Operations.get('add_interactions_to_objects').batch
@@ -0,0 +1,99 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The batched_additions module collects additions per target tuning (or component) from all
+# XmlInjector snippets. The additions are de-duplicated while they are collected and written
+# with one call of apply_fn(target, additions) per target after the snippet manager has loaded.
+# Targets are stored by id() as tunable factories and component instances are not always hashable.
+# Each target has one slotted _PendingTarget record, released as soon as it has been applied.
+
+
+from typing import Any, Callable, Dict, List
+
+import services
+from sims4.resources import Types
+
+from xml_injector.journal import InjectionUnits, Journal
+from xml_injector.log import log
+from xml_injector.stats import Stats
+
+
+class _PendingTarget:
+    __slots__ = ('target', 'pending', 'keys')
+
+    def __init__(self, target):
+        self.target = target
+        self.pending = []
+        self.keys = set()
+
+
+class BatchedAdditions:
+    _batches: List['BatchedAdditions'] = []
+
+    def __init__(self, name: str, apply_fn: Callable[[Any, List], None], key_fn: Callable[[Any], Any] = None):
+        self.name = name
+        self.apply_fn = apply_fn
+        self.key_fn = key_fn  # Additions with the same key are duplicates, defaults to the addition itself.
+        self._targets: Dict[int, _PendingTarget] = {}
+        self.duplicates = 0
+        BatchedAdditions._batches.append(self)
+
+    def get_key(self, addition) -> Any:
+        return addition if self.key_fn is None else self.key_fn(addition)
+
+    def add(self, target, additions, allow_duplicates: bool = False) -> List:
+        # Record additions for target and return the additions which were not yet recorded
+        record = self._targets.get(id(target), None)
+        if record is None:
+            record = self._targets[id(target)] = _PendingTarget(target)
+        pending = record.pending
+        pending_keys = record.keys
+        added = []
+        for addition in additions:
+            key = self.get_key(addition)
+            if allow_duplicates or key not in pending_keys:
+                pending_keys.add(key)
+                added.append(addition)
+            else:
+                self.duplicates += 1
+                Stats.add(Stats.DUPLICATES_SKIPPED)
+        pending.extend(added)
+        if added:
+            Journal.on_rollback(lambda: self._remove(pending, pending_keys, added))
+        return added
+
+    def _remove(self, pending: List, pending_keys: set, added: List):
+        del pending[len(pending) - len(added):]
+        pending_keys.difference_update(self.get_key(addition) for addition in added)
+
+    def get_pending(self, target) -> List:
+        record = self._targets.get(id(target), None)
+        return [] if record is None else record.pending
+
+    def has_pending(self, target, key) -> bool:
+        record = self._targets.get(id(target), None)
+        return record is not None and key in record.keys
+
+    def apply(self):
+        targets = self._targets
+        self._targets = {}
+        count = len(targets)
+        for key in list(targets):
+            record = targets.pop(key)
+            if record.pending:
+                if not InjectionUnits.run(None, self.name, None, self.apply_fn, record.target, record.pending):
+                    # Kept for the next apply(), 'xml_injector.retry'
+                    self._targets[key] = record
+        if count:
+            log.info(f'{self.name}: {count} targets updated, {self.duplicates} duplicates skipped')
+
+    @staticmethod
+    def apply_all(*_):
+        for batch in BatchedAdditions._batches:
+            batch.apply()
+
+
+services.get_instance_manager(Types.SNIPPET).add_on_load_complete(BatchedAdditions.apply_all)
@@ -0,0 +1,211 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The catalogue_snapshot module writes a compact snapshot of the object catalogue and of all
+# XmlInjector snippets to 'mod_data/xml_injector/catalogue_snapshot.json.gz'.
+# '_tools/replay_catalogue.py' replays AddToTuning and ObjectSelection against stand-in objects
+# built from the snapshot, so real installs can be profiled without starting the game.
+#
+# The file is gzip compressed JSON. The object catalogue is stored column by column, all tunings
+# are referenced by their 64-bit tuning id (guid64) and tags by their int value. Loot ops are
+# stored as class name and structural digest ('BuffOp:0123456789abcdef').
+
+
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+import services
+from objects.definition_manager import DefinitionManager
+from sims4.resources import Types
+
+from xml_injector.lazy_affordances import LazyAffordances
+from xml_injector.log import log
+from xml_injector.loot_merges import LootMerges
+from xml_injector.object_selection import ObjectSelection
+from xml_injector.settings import Settings
+from xml_injector.sim_affordances import SimAffordances
+from xml_injector.snippet import XmlInjector
+
+
+class CatalogueSnapshot:
+    FORMAT_VERSION = 1
+    FILE_NAME = 'catalogue_snapshot.json.gz'
+    COMPONENTS = ('state', 'name', 'object_relationships', 'object_locking_component')
+
+    @staticmethod
+    def get_id(tuning) -> int:
+        return getattr(tuning, 'guid64', 0) or 0
+
+    @staticmethod
+    def get_ids(tunings) -> List[int]:
+        return [CatalogueSnapshot.get_id(tuning) for tuning in tunings if tuning is not None]
+
+    @staticmethod
+    def get_object_selection(object_selection) -> Dict[str, Any]:
+        if isinstance(object_selection, ObjectSelection._ObjectList):
+            return {'object_list': [obj_id for obj_id in object_selection.object_list if obj_id]}
+        if isinstance(object_selection, ObjectSelection._ObjectsWithAffordance):
+            return {'objects_with_affordance': CatalogueSnapshot.get_id(object_selection.affordance)}
+        if isinstance(object_selection, ObjectSelection._ObjectsMatchingName):
+            return {'objects_matching_name': object_selection.partial_name}
+        if isinstance(object_selection, ObjectSelection._ObjectsWithTag):
+            return {'objects_with_tag': int(object_selection.tag)}
+        return {}
+
+    @staticmethod
+    def get_loot_op(op) -> str:
+        # Class name and structural digest, the replay merges ops with the same digest
+        action = getattr(op, 'action', op)
+        return f'{type(action).__name__}:{LootMerges.get_digest(op)}'
+
+    @staticmethod
+    def get_objects() -> Dict[str, Any]:
+        definition_manager = services.definition_manager()
+        tags: Dict[Any, set] = {}
+        for definition in getattr(definition_manager, 'loaded_definitions', ()):
+            build_buy_tags = getattr(definition, 'build_buy_tags', None)
+            if build_buy_tags:
+                tags.setdefault(definition.cls, set()).update(int(t) for t in build_buy_tags)
+
+        class_names: Dict[str, int] = {}
+        lock_components: Dict[int, int] = {}
+        columns = {'ids': [], 'names': [], 'classes': [], 'tags': [], 'super_affordances': [], 'components': [], 'lock_components': []}
+        lock_component_affordances = []
+        for tuning in definition_manager._tuned_classes.values():
+            class_name = tuning.__mro__[1].__name__ if len(tuning.__mro__) > 1 else type(tuning).__name__
+            components = getattr(tuning, '_components', None)
+            component_mask = 0
+            lock_component_index = -1
+            if components is not None:
+                for i, component_name in enumerate(CatalogueSnapshot.COMPONENTS):
+                    if getattr(components, component_name, None) is not None:
+                        component_mask |= 1 << i
+                object_locking_component = getattr(components, 'object_locking_component', None)
+                if object_locking_component is not None:
+                    lock_component_index = lock_components.get(id(object_locking_component), None)
+                    if lock_component_index is None:
+                        lock_component_index = lock_components[id(object_locking_component)] = len(lock_component_affordances)
+                        lock_component_affordances.append(CatalogueSnapshot.get_ids(object_locking_component._tuned_values.super_affordances))
+            columns['ids'].append(CatalogueSnapshot.get_id(tuning))
+            columns['names'].append(getattr(tuning, '__name__', ''))
+            columns['classes'].append(class_names.setdefault(class_name, len(class_names)))
+            columns['tags'].append(sorted(tags.get(tuning, ())))
+            columns['super_affordances'].append(CatalogueSnapshot.get_ids(LazyAffordances.get_super_affordances(tuning)) if LazyAffordances.has_super_affordances(tuning) else None)
+            columns['components'].append(component_mask)
+            columns['lock_components'].append(lock_component_index)
+        columns['class_names'] = list(class_names)
+        columns['lock_component_affordances'] = lock_component_affordances
+        return columns
+
+    @staticmethod
+    def get_snippet(snippet) -> Dict[str, Any]:
+        get_ids = CatalogueSnapshot.get_ids
+        get_id = CatalogueSnapshot.get_id
+        get_object_selection = CatalogueSnapshot.get_object_selection
+        return {
+            'name': getattr(snippet, '__name__', str(snippet)),
+            'id': get_id(snippet),
+            'xml_injector_minimum_version': snippet.xml_injector_minimum_version,
+            'add_interactions_to_objects': [
+                {'object_selection': get_object_selection(e.object_selection), '_super_affordances': get_ids(e._super_affordances)}
+                for e in snippet.add_interactions_to_objects],
+            'add_interactions_to_sims': get_ids(snippet.add_interactions_to_sims),
+            'add_interactions_to_phones': get_ids(snippet.add_interactions_to_phones),
+            'add_interactions_to_relationship_panel': get_ids(snippet.add_interactions_to_relationship_panel),
+            'add_mixer_interactions': [
+                {'mixer_snippets': get_ids(e.mixer_snippets), 'affordances': get_ids(e.affordances)}
+                for e in snippet.add_mixer_interactions],
+            'add_to_loot_actions': [
+                {'loot_actions_ref': get_id(e.loot_actions_ref), 'loot_actions_to_add': [CatalogueSnapshot.get_loot_op(op) for op in e.loot_actions_to_add]}
+                for e in snippet.add_to_loot_actions],
+            'add_to_random_loot_actions': [
+                {'random_weighted_loot_ref': get_id(e.random_weighted_loot_ref), 'random_loot_actions_to_add': [CatalogueSnapshot.get_loot_op(op) for op in e.random_loot_actions_to_add]}
+                for e in snippet.add_to_random_loot_actions],
+            'add_states_to_objects': [
+                {'object_selection': get_object_selection(e.object_selection), 'states': len(e.state_component.states or ()), 'state_triggers': len(e.state_component.state_triggers or ())}
+                for e in snippet.add_states_to_objects],
+            'add_name_component_to_objects': [
+                {'object_selection': get_object_selection(e.object_selection)}
+                for e in snippet.add_name_component_to_objects],
+            'add_object_relationships_to_objects': [
+                {'object_selection': get_object_selection(e.object_selection)}
+                for e in snippet.add_object_relationships_to_objects],
+            'add_lock_aware_interactions_to_lockable_objects': [
+                {'object_selection': get_object_selection(e.object_selection), 'super_affordances': get_ids(e.super_affordances)}
+                for e in snippet.add_lock_aware_interactions_to_lockable_objects],
+            'add_buffs_to_trait': [
+                {'trait': get_id(e.trait), 'buffs': [get_id(b.buff_type) for b in e.buffs if b is not None]}
+                for e in snippet.add_buffs_to_trait],
+            'add_satisfaction_store_rewards': [
+                {'new_items': get_ids((e.new_items or {}).keys())}
+                for e in snippet.add_satisfaction_store_rewards],
+            'add_purchase_list_options_to_interactions': [
+                {'interactions_to_add_to': get_ids(e.interactions_to_add_to or ()), 'purchase_list_options': len(e.purchase_list_options or ())}
+                for e in snippet.add_purchase_list_options_to_interactions],
+            'add_picker_dialog_categories_to_interactions': [
+                {'interactions_to_add_to': get_ids(e.interactions_to_add_to or ()), 'picker_dialog_categories': [int(c.tag) for c in e.picker_dialog_categories or () if c is not None]}
+                for e in snippet.add_picker_dialog_categories_to_interactions],
+        }
+
+    @staticmethod
+    def get_targets(snippets) -> Dict[str, Any]:
+        # The current state of the tunings the snippets add to, other than objects
+        targets = {'affordance_lists': {}, 'loot_actions': {}, 'random_loot_actions': {}, 'traits': {}, 'interactions': {}}
+        for snippet in snippets:
+            for e in snippet.add_mixer_interactions:
+                for affordance_list in e.mixer_snippets:
+                    targets['affordance_lists'][CatalogueSnapshot.get_id(affordance_list)] = CatalogueSnapshot.get_ids(affordance_list.value)
+            for e in snippet.add_to_loot_actions:
+                if e.loot_actions_ref is not None:
+                    targets['loot_actions'][CatalogueSnapshot.get_id(e.loot_actions_ref)] = len(e.loot_actions_ref.loot_actions)
+            for e in snippet.add_to_random_loot_actions:
+                if e.random_weighted_loot_ref is not None:
+                    targets['random_loot_actions'][CatalogueSnapshot.get_id(e.random_weighted_loot_ref)] = len(e.random_weighted_loot_ref.random_loot_actions)
+            for e in snippet.add_buffs_to_trait:
+                if e.trait is not None:
+                    targets['traits'][CatalogueSnapshot.get_id(e.trait)] = [CatalogueSnapshot.get_id(b.buff_type) for b in e.trait.buffs]
+            for e in tuple(snippet.add_purchase_list_options_to_interactions) + tuple(snippet.add_picker_dialog_categories_to_interactions):
+                for sa in e.interactions_to_add_to or ():
+                    if sa is None:
+                        continue
+                    interaction = {}
+                    if hasattr(sa, 'purchase_list_option'):
+                        interaction['purchase_list_options'] = len(sa.purchase_list_option)
+                    if getattr(sa, 'picker_dialog', None) is not None:
+                        interaction['picker_dialog_categories'] = [int(c.tag) for c in sa.picker_dialog._tuned_values.categories]
+                    targets['interactions'][CatalogueSnapshot.get_id(sa)] = interaction
+        # JSON keys are strings
+        return {name: {str(k): v for k, v in values.items()} for name, values in targets.items()}
+
+    @staticmethod
+    def create() -> Dict[str, Any]:
+        snippet_manager = services.get_instance_manager(Types.SNIPPET)
+        snippets = [cls for cls in snippet_manager.types.values() if isinstance(cls, type) and issubclass(cls, XmlInjector)]
+        object_sim = super(DefinitionManager, services.definition_manager()).get(SimAffordances.OBJECT_SIM)
+        return {
+            'format_version': CatalogueSnapshot.FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'object_sim': {attribute: CatalogueSnapshot.get_ids(getattr(object_sim, attribute, ())) for attribute in SimAffordances.ATTRIBUTES},
+            'components': CatalogueSnapshot.COMPONENTS,
+            'objects': CatalogueSnapshot.get_objects(),
+            'targets': CatalogueSnapshot.get_targets(snippets),
+            'snippets': [CatalogueSnapshot.get_snippet(snippet) for snippet in snippets],
+        }
+
+    @staticmethod
+    def write(file_name: str = None) -> str:
+        if file_name is None:
+            file_name = os.path.join(Settings.get_mod_data_directory(), CatalogueSnapshot.FILE_NAME)
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        snapshot = CatalogueSnapshot.create()
+        with gzip.open(file_name, 'wt', encoding='UTF-8') as fp:
+            json.dump(snapshot, fp, separators=(',', ':'))
+        log.info(f"Wrote {len(snapshot['objects']['ids'])} objects and {len(snapshot['snippets'])} snippets to {file_name}")
+        return file_name
+
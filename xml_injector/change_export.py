@@ -0,0 +1,255 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The change_export module writes one compact record per tuning attribute changed by the injector
+# ('export_changes'). The value of each attribute is kept when it is written for the first time
+# (Journal.observer), at the end of load it is compared with the final value. Tuned values
+# (_tuned_values, _components) are compared field by field as 'attribute.field', mappings by key.
+#
+# A record has the target id (guid64, for components a digest of the original value), the target and
+# attribute names, the length before and after and the ids of the added and removed items.
+# Items are identified by guid64, ints by their value, other items by a digest of their tuned values
+# (see LootMerges.get_signature()). Items without a stable identity get the id 0.
+#
+# With the export the per-entry 'adding ...' lines are not logged, see Operations.log_change().
+# The module is imported by InjectionScheduler.start() only if 'export_changes' is enabled.
+# 'mod_data/xml_injector/injected_changes.bin' is written once, the export of the previous load is kept
+# as 'injected_changes.previous.bin'. Compare two exports with '_tools/compare_changes.py'.
+# Format: header '<4sHI' (b'XIDF', version, records), then zlib compressed columns, all little endian:
+#   names (u32 byte length, '\n' separated UTF-8), target ids (u64), target name indexes (u32),
+#   attribute name indexes (u32), lengths before (u32), lengths after (u32), added counts (u32),
+#   removed counts (u32), added ids (u64), removed ids (u64)
+
+
+import hashlib
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Tuple
+
+from xml_injector.journal import Journal
+from xml_injector.lazy_affordances import LazyAffordances
+from xml_injector.log import log
+from xml_injector.loot_merges import LootMerges
+from xml_injector.settings import Settings
+
+
+class ChangeRecord:
+    __slots__ = ('target_id', 'target_name', 'attribute', 'length_before', 'length_after', 'added', 'removed')
+
+    def __init__(self, target_id: int, target_name: str, attribute: str, length_before: int, length_after: int, added: List[int], removed: List[int]):
+        self.target_id = target_id
+        self.target_name = target_name
+        self.attribute = attribute
+        self.length_before = length_before
+        self.length_after = length_after
+        self.added = added
+        self.removed = removed
+
+    def __repr__(self):
+        return f'<ChangeRecord:{self.target_name}.{self.attribute} {self.length_before}->{self.length_after} +{len(self.added)} -{len(self.removed)}>'
+
+
+class ChangeExport:
+    ENABLED = Settings.get('export_changes', False)
+    FILE_NAME = 'injected_changes.bin'
+    PREVIOUS_FILE_NAME = 'injected_changes.previous.bin'
+    MAGIC = b'XIDF'
+    VERSION = 1
+    _HEADER = '<4sHI'
+    _MASK = (1 << 64) - 1
+    # (target, attribute): (target, original value), the target is kept to keep its id valid
+    originals: Dict[Tuple[int, str], Tuple[Any, Any]] = {}
+    _written = False
+
+    @staticmethod
+    def enable():
+        # Records the changes from the first write until the export has been written
+        if not ChangeExport._written:
+            Journal.observer = ChangeExport.record
+
+    @staticmethod
+    def get_value(obj, attribute: str):
+        if attribute == LazyAffordances.ATTRIBUTE:
+            # Includes the pending additions without materializing them
+            return LazyAffordances.get_super_affordances(obj) if LazyAffordances.has_super_affordances(obj) else None
+        return getattr(obj, attribute, None)
+
+    @staticmethod
+    def record(obj, attribute: str):
+        key = (id(obj), attribute)
+        if key not in ChangeExport.originals:
+            ChangeExport.originals[key] = (obj, ChangeExport.get_value(obj, attribute))
+
+    @staticmethod
+    def get_fields(value) -> Dict[str, Any]:
+        # Tuned values are compared field by field, None for other values
+        if not hasattr(value, 'clone_with_overrides'):
+            return None
+        return dict(value) if isinstance(value, dict) else dict(getattr(value, '__dict__', {}))
+
+    @staticmethod
+    def get_items(value) -> list:
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return list(value.keys())
+        if isinstance(value, (tuple, list, set, frozenset)):
+            return list(value)
+        return [value]
+
+    @staticmethod
+    def _is_stable(signature) -> bool:
+        # get_signature() identifies values it can not compare by ('id', id(value))
+        if not isinstance(signature, tuple):
+            return True
+        if len(signature) == 2 and signature[0] == 'id' and isinstance(signature[1], int):
+            return False
+        return all(ChangeExport._is_stable(item) for item in signature)
+
+    @staticmethod
+    def get_id(item) -> int:
+        guid64 = getattr(item, 'guid64', None)
+        if isinstance(guid64, int):
+            return guid64 & ChangeExport._MASK
+        if isinstance(item, int):
+            return item & ChangeExport._MASK
+        signature = LootMerges.get_signature(item)
+        if not ChangeExport._is_stable(signature):
+            return 0
+        return int(hashlib.md5(repr(signature).encode('UTF-8')).hexdigest()[:16], 16)
+
+    @staticmethod
+    def get_record(target_id: int, target_name: str, attribute: str, before, after) -> ChangeRecord:
+        # None if nothing changed
+        before_items = ChangeExport.get_items(before)
+        after_items = ChangeExport.get_items(after)
+        # Added and removed by identity, only their ids are computed
+        before_identities = {id(item) for item in before_items}
+        after_identities = {id(item) for item in after_items}
+        added = [item for item in after_items if id(item) not in before_identities]
+        removed = [item for item in before_items if id(item) not in after_identities]
+        if not added and not removed:
+            return None
+        return ChangeRecord(target_id, target_name, attribute, len(before_items), len(after_items),
+                            [ChangeExport.get_id(item) for item in added], [ChangeExport.get_id(item) for item in removed])
+
+    @staticmethod
+    def get_records() -> List[ChangeRecord]:
+        records = []
+        for (_, attribute), (target, before) in ChangeExport.originals.items():
+            after = ChangeExport.get_value(target, attribute)
+            if after is before:
+                continue
+            guid64 = getattr(target, 'guid64', None)
+            target_id = guid64 & ChangeExport._MASK if isinstance(guid64, int) else ChangeExport.get_id(before)
+            target_name = getattr(target, '__name__', None) or type(target).__name__
+            before_fields = ChangeExport.get_fields(before)
+            after_fields = ChangeExport.get_fields(after)
+            if before_fields is None or after_fields is None:
+                changes = [(attribute, before, after)]
+            else:
+                changes = [(f'{attribute}.{field}', before_fields.get(field, None), value)
+                           for field, value in after_fields.items() if value is not before_fields.get(field, None)]
+            for name, before_value, after_value in changes:
+                record = ChangeExport.get_record(target_id, target_name, name, before_value, after_value)
+                if record is not None:
+                    records.append(record)
+        return records
+
+    @staticmethod
+    def _to_bytes(type_code: str, values) -> bytes:
+        data = array(type_code, values)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        return data.tobytes()
+
+    @staticmethod
+    def _from_bytes(type_code: str, data: bytes, offset: int, count: int) -> Tuple[List[int], int]:
+        values = array(type_code)
+        end = offset + count * values.itemsize
+        values.frombytes(data[offset:end])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values.tolist(), end
+
+    @staticmethod
+    def to_bytes(records: List[ChangeRecord]) -> bytes:
+        names: Dict[str, int] = {}
+        for record in records:
+            names.setdefault(record.target_name, len(names))
+            names.setdefault(record.attribute, len(names))
+        name_data = '\n'.join(names).encode('UTF-8')
+        columns = [
+            struct.pack('<I', len(name_data)), name_data,
+            ChangeExport._to_bytes('Q', [record.target_id for record in records]),
+            ChangeExport._to_bytes('I', [names[record.target_name] for record in records]),
+            ChangeExport._to_bytes('I', [names[record.attribute] for record in records]),
+            ChangeExport._to_bytes('I', [record.length_before for record in records]),
+            ChangeExport._to_bytes('I', [record.length_after for record in records]),
+            ChangeExport._to_bytes('I', [len(record.added) for record in records]),
+            ChangeExport._to_bytes('I', [len(record.removed) for record in records]),
+            ChangeExport._to_bytes('Q', [item for record in records for item in record.added]),
+            ChangeExport._to_bytes('Q', [item for record in records for item in record.removed]),
+        ]
+        return struct.pack(ChangeExport._HEADER, ChangeExport.MAGIC, ChangeExport.VERSION, len(records)) + zlib.compress(b''.join(columns), 9)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> List[ChangeRecord]:
+        header_size = struct.calcsize(ChangeExport._HEADER)
+        magic, version, count = struct.unpack(ChangeExport._HEADER, data[:header_size])
+        if magic != ChangeExport.MAGIC or version != ChangeExport.VERSION:
+            raise ValueError(f'Not a change export of version {ChangeExport.VERSION} ({magic}, {version})')
+        data = zlib.decompress(data[header_size:])
+        name_size, = struct.unpack('<I', data[:4])
+        names = data[4:4 + name_size].decode('UTF-8').split('\n')
+        offset = 4 + name_size
+        target_ids, offset = ChangeExport._from_bytes('Q', data, offset, count)
+        columns = []
+        for _ in range(6):
+            column, offset = ChangeExport._from_bytes('I', data, offset, count)
+            columns.append(column)
+        target_names, attributes, lengths_before, lengths_after, added_counts, removed_counts = columns
+        added, offset = ChangeExport._from_bytes('Q', data, offset, sum(added_counts))
+        removed, offset = ChangeExport._from_bytes('Q', data, offset, sum(removed_counts))
+        records = []
+        added_offset = removed_offset = 0
+        for i in range(count):
+            records.append(ChangeRecord(target_ids[i], names[target_names[i]], names[attributes[i]], lengths_before[i], lengths_after[i],
+                                        added[added_offset:added_offset + added_counts[i]], removed[removed_offset:removed_offset + removed_counts[i]]))
+            added_offset += added_counts[i]
+            removed_offset += removed_counts[i]
+        return records
+
+    @staticmethod
+    def read(file_name: str) -> List[ChangeRecord]:
+        with open(file_name, 'rb') as fp:
+            return ChangeExport.from_bytes(fp.read())
+
+    @staticmethod
+    def write():
+        # Once, at the end of load. Later writes (xml_injector.retry) are not exported.
+        if not ChangeExport.ENABLED or ChangeExport._written:
+            return
+        ChangeExport._written = True
+        Journal.observer = None
+        # noinspection PyBroadException
+        try:
+            records = ChangeExport.get_records()
+            path = Settings.get_mod_data_directory()
+            os.makedirs(path, exist_ok=True)
+            file_name = os.path.join(path, ChangeExport.FILE_NAME)
+            if os.path.exists(file_name):
+                os.replace(file_name, os.path.join(path, ChangeExport.PREVIOUS_FILE_NAME))
+            data = ChangeExport.to_bytes(records)
+            with open(file_name, 'wb') as fp:
+                fp.write(data)
+            log.info(f'Wrote {len(records)} changed attributes ({sum(len(record.added) for record in records)} added items) in {len(data)} bytes to {file_name}')
+        except Exception as e:
+            log.error(f'Exception {e} writing the injected changes')
+        ChangeExport.originals = {}
@@ -0,0 +1,137 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The commands module defines the 'xml_injector.*' console commands.
+# The optional modules (import profiler, selector costs, catalogue snapshot) are imported by their command.
+
+
+import services
+
+from xml_injector.add_to_tuning import AddToTuning
+from xml_injector.batched_additions import BatchedAdditions
+from xml_injector.journal import InjectionUnits
+from xml_injector.log import log
+from xml_injector.loot_merges import LootMerges
+from xml_injector.modinfo import ModInfo
+from xml_injector.snippet_payloads import SnippetPayloads
+from xml_injector.stats import Stats
+from sims4communitylib.services.commands.common_console_command import CommonConsoleCommand, CommonConsoleCommandArgument
+from sims4communitylib.services.commands.common_console_command_output import CommonConsoleCommandOutput
+
+
+@CommonConsoleCommand(ModInfo.get_identity(), 'xml_injector.dump_catalogue', 'Write the object catalogue and all XmlInjector snippets to mod_data/xml_injector/ for offline profiling.')
+def o19_cmd_xml_injector_dump_catalogue(output: CommonConsoleCommandOutput):
+    # noinspection PyBroadException
+    try:
+        from xml_injector.catalogue_snapshot import CatalogueSnapshot
+        file_name = CatalogueSnapshot.write()
+        output(f'Catalogue written to {file_name}')
+        if SnippetPayloads.summaries:
+            output(f"The entries of {len(SnippetPayloads.summaries)} snippets have been released, disable 'release_snippet_payloads' to dump them")
+    except Exception as e:
+        log.error(f'Exception {e} writing the catalogue snapshot')
+        output(f'Error {e} writing the catalogue snapshot')
+
+
+@CommonConsoleCommand(ModInfo.get_identity(), 'xml_injector.errors', 'List the XmlInjector snippet entries which failed and were reverted.')
+def o19_cmd_xml_injector_errors(output: CommonConsoleCommandOutput):
+    output(f'{len(InjectionUnits.errors)} failed entries')
+    for error in InjectionUnits.errors:
+        output(f'  {error}')
+        log.info(f'{error}\n{error.get_details()}')
+
+
+@CommonConsoleCommand(ModInfo.get_identity(), 'xml_injector.retry', 'Process the failed XmlInjector snippet entries again.')
+def o19_cmd_xml_injector_retry(output: CommonConsoleCommandOutput):
+    retried, _ = InjectionUnits.retry()
+    # Retried entries may have added to the batched additions, failed batched writes are applied again
+    BatchedAdditions.apply_all()
+    output(f'Retried {retried} entries, {len(InjectionUnits.errors)} still failing')
+    for error in InjectionUnits.errors:
+        output(f'  {error}')
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.costs', 'List the XmlInjector snippets with the highest objects touched × additions cost.',
+    command_arguments=(
+        CommonConsoleCommandArgument('count', 'Number', 'The number of snippets to list.', is_optional=True, default_value=10),
+    )
+)
+def o19_cmd_xml_injector_costs(output: CommonConsoleCommandOutput, count: int = 10):
+    from xml_injector.selector_cost import SelectorCost
+    output(f'{len(SelectorCost.snippet_costs)} snippets with object selections, {SelectorCost.capped} selections capped, {SelectorCost.refused} refused')
+    for line in SelectorCost.get_report(count):
+        output(f'  {line}')
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.stats', 'Show the XmlInjector counters and timings.',
+    command_arguments=(
+        CommonConsoleCommandArgument('reset', 'True or False', 'Reset the counters after showing them.', is_optional=True, default_value=False),
+    )
+)
+def o19_cmd_xml_injector_stats(output: CommonConsoleCommandOutput, reset: bool = False):
+    for line in Stats.get_report():
+        output(line)
+    if reset:
+        Stats.reset()
+        output('Counters reset')
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.mixer', 'List the AffordanceLists a mixer interaction was injected into.',
+    command_arguments=(
+        CommonConsoleCommandArgument('mixer_id', 'Decimal Identifier', 'The instance ID of the mixer interaction.'),
+    )
+)
+def o19_cmd_xml_injector_mixer(output: CommonConsoleCommandOutput, mixer_id: int):
+    mixer = services.affordance_manager().get(mixer_id)
+    if mixer is None:
+        output(f'Interaction {mixer_id} not found')
+        return
+    affordance_lists = AddToTuning.get_affordance_lists(mixer)
+    output(f'{mixer} was injected into {len(affordance_lists)} AffordanceLists')
+    for affordance_list in affordance_lists:
+        output(f'  {affordance_list}')
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.imports', "List the modules with the highest import time (requires 'profile_imports').",
+    command_arguments=(
+        CommonConsoleCommandArgument('count', 'Number', 'The number of modules to list.', is_optional=True, default_value=20),
+    )
+)
+def o19_cmd_xml_injector_imports(output: CommonConsoleCommandOutput, count: int = 20):
+    from xml_injector.import_profiler import ImportProfiler
+    if not ImportProfiler.timings:
+        output("No import times recorded, set 'profile_imports' to True in settings.ini and restart the game.")
+        return
+    for line in ImportProfiler.get_report(count):
+        output(line)
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.payloads', "List the snippets with the most entries released by 'release_snippet_payloads'.",
+    command_arguments=(
+        CommonConsoleCommandArgument('count', 'Number', 'The number of snippets to list.', is_optional=True, default_value=SnippetPayloads.REPORT_SIZE),
+    )
+)
+def o19_cmd_xml_injector_payloads(output: CommonConsoleCommandOutput, count: int = SnippetPayloads.REPORT_SIZE):
+    for line in SnippetPayloads.get_report(count):
+        output(line)
+
+
+@CommonConsoleCommand(
+    ModInfo.get_identity(), 'xml_injector.loot_merges', 'List the duplicate loot ops which were merged instead of being added again.',
+    command_arguments=(
+        CommonConsoleCommandArgument('count', 'Number', 'The number of merged loot ops to list.', is_optional=True, default_value=LootMerges.REPORT_SIZE),
+    )
+)
+def o19_cmd_xml_injector_loot_merges(output: CommonConsoleCommandOutput, count: int = LootMerges.REPORT_SIZE):
+    if not LootMerges.ENABLED:
+        output("Loot ops are not merged, 'merge_duplicate_loot' is disabled")
+    for line in LootMerges.get_report(count):
+        output(line)
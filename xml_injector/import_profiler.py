@@ -0,0 +1,101 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The import_profiler module implements the opt-in 'profile_imports' setting.
+# It is imported and started by 'xml_injector/__init__.py' only if enabled and wraps builtins.__import__ to record the import time
+# of every module imported afterwards, XmlInjector modules and the game modules they pull in.
+# The inclusive time contains the nested imports, the exclusive time only the module's own code.
+# The profiler stops when the zone starts loading, writes 'mod_logs/xml_injector_imports.txt'
+# and the results are listed with 'xml_injector.imports'.
+
+
+import builtins
+import os
+import sys
+import time
+from importlib.util import resolve_name
+from typing import Dict, List
+
+from xml_injector.log import log
+from xml_injector.modinfo import ModInfo
+from xml_injector.settings import Settings
+from sims4communitylib.events.event_handling.common_event_registry import CommonEventRegistry
+from sims4communitylib.events.zone_spin.events.zone_early_load import S4CLZoneEarlyLoadEvent
+from sims4communitylib.utils.common_log_utils import CommonLogUtils
+
+
+class ImportProfiler:
+    ENABLED = Settings.get('profile_imports', False)
+    FILE_NAME = 'xml_injector_imports.txt'
+    REPORT_SIZE = 20
+    # module: [inclusive seconds, exclusive seconds]
+    timings: Dict[str, List[float]] = {}
+    # Seconds spent in nested imports, one item per import in progress
+    _nested: List[float] = []
+    _original_import = None
+
+    @staticmethod
+    def start():
+        if ImportProfiler.ENABLED and ImportProfiler._original_import is None:
+            ImportProfiler._original_import = builtins.__import__
+            builtins.__import__ = ImportProfiler._import
+
+    @staticmethod
+    def stop():
+        if ImportProfiler._original_import is not None:
+            builtins.__import__ = ImportProfiler._original_import
+            ImportProfiler._original_import = None
+
+    @staticmethod
+    def _import(name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = ImportProfiler._original_import
+        if level == 0 and name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+        modules = len(sys.modules)
+        nested = ImportProfiler._nested
+        nested.append(0.0)
+        t = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            inclusive = time.perf_counter() - t
+            nested_seconds = nested.pop()
+            if nested:
+                nested[-1] += inclusive
+            if len(sys.modules) > modules:
+                if level:
+                    # noinspection PyBroadException
+                    try:
+                        name = resolve_name(f"{'.' * level}{name}", (globals or {}).get('__package__', None))
+                    except Exception:
+                        pass
+                timing = ImportProfiler.timings.setdefault(name, [0.0, 0.0])
+                timing[0] += inclusive
+                timing[1] += inclusive - nested_seconds
+
+    @staticmethod
+    def get_report(count: int = REPORT_SIZE) -> List[str]:
+        timings = sorted(ImportProfiler.timings.items(), key=lambda item: -item[1][1])
+        total = sum(exclusive for _, exclusive in ImportProfiler.timings.values())
+        report = [f'{len(timings)} modules imported in {total * 1000:.1f} ms (inclusive ms, exclusive ms, module):']
+        for name, (inclusive, exclusive) in timings[:count]:
+            report.append(f'{inclusive * 1000:9.1f} {exclusive * 1000:9.1f}  {name}')
+        return report
+
+    @staticmethod
+    def write():
+        file_name = os.path.join(CommonLogUtils.get_sims_documents_location_path(), 'mod_logs', ImportProfiler.FILE_NAME)
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'wt', encoding='UTF-8') as fp:
+            fp.write('\n'.join(ImportProfiler.get_report(len(ImportProfiler.timings))) + '\n')
+        log.info(f'Wrote import times of {len(ImportProfiler.timings)} modules to {file_name}')
+
+    @staticmethod
+    @CommonEventRegistry.handle_events(ModInfo.get_identity().name)
+    def handle_event(event_data: S4CLZoneEarlyLoadEvent):
+        if ImportProfiler._original_import is not None:
+            ImportProfiler.stop()
+            ImportProfiler.write()
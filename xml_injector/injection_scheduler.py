@@ -0,0 +1,160 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The injection_scheduler module orders the snippet entries by priority: Sim, phone and relationship
+# panel interactions first, additions to other tunings next and object decoration last.
+#
+# With the 'deferred_object_injection' setting the object decoration entries are not processed
+# while the snippets load. They run in time slices of 'deferred_slice_ms' when other instance
+# managers finish loading, and the remaining entries run on S4CLZoneEarlyLoadEvent, before the
+# zone creates its objects.
+# Each queued entry is a slotted _ScheduledEntry, ordered by one integer key (priority, then
+# scheduling order), and is dropped as soon as it has run. It keeps the snippet id, section and index,
+# the snippet and the entry are looked up when it runs. on_done(snippet) is called after the entry,
+# it is set on the last entry of a snippet to release its payload ('release_snippet_payloads').
+# The load profiler ('profile_load') is started with the first snippet, it is stopped and the changes are
+# exported ('export_changes') after the last entry has run. Both modules are only imported if they are enabled.
+
+
+import heapq
+import time
+from typing import Callable, List
+
+import services
+import sims4.resources
+from sims4.resources import Types
+
+from xml_injector.batched_additions import BatchedAdditions
+from xml_injector.journal import InjectionUnits
+from xml_injector.log import log
+from xml_injector.modinfo import ModInfo
+from xml_injector.settings import Settings
+from sims4communitylib.events.event_handling.common_event_registry import CommonEventRegistry
+from sims4communitylib.events.zone_spin.events.zone_early_load import S4CLZoneEarlyLoadEvent
+
+
+class _ScheduledEntry:
+    __slots__ = ('key', 'snippet_id', 'section', 'index', 'fn', 'on_done')
+
+    def __init__(self, key: int, snippet_id: int, section: str, index, fn: Callable):
+        self.key = key
+        self.snippet_id = snippet_id
+        self.section = section
+        self.index = index
+        self.fn = fn
+        self.on_done: Callable = None
+
+    def __lt__(self, other: '_ScheduledEntry') -> bool:
+        return self.key < other.key
+
+
+class InjectionScheduler:
+    PRIORITY_SIMS = 0
+    PRIORITY_TUNINGS = 1
+    PRIORITY_OBJECTS = 2
+    ENABLED = Settings.get('deferred_object_injection', False)
+    SLICE_SECONDS = Settings.get('deferred_slice_ms', 20) / 1000
+    _queue: List[_ScheduledEntry] = []
+    _sequence = 0
+    deferred_seconds = 0.0
+
+    @staticmethod
+    def schedule(priority: int, snippet, section: str, index, fn: Callable) -> _ScheduledEntry:
+        # fn is called with the entry, or with the whole section if index is None
+        key = (priority << 48) | InjectionScheduler._sequence
+        scheduled = _ScheduledEntry(key, snippet.guid64, section, index, fn)
+        heapq.heappush(InjectionScheduler._queue, scheduled)
+        InjectionScheduler._sequence += 1
+        return scheduled
+
+    @staticmethod
+    def _run_next():
+        scheduled = heapq.heappop(InjectionScheduler._queue)
+        snippet = InjectionUnits.get_snippet(scheduled.snippet_id)
+        if snippet is None:
+            log.error(f'Snippet {scheduled.snippet_id:016x} not found, {scheduled.section} skipped')
+            return
+        entry = InjectionUnits.get_entry(snippet, scheduled.section, scheduled.index)
+        if entry is not None:
+            InjectionUnits.run(snippet, scheduled.section, scheduled.index, scheduled.fn, entry)
+        if scheduled.on_done is not None:
+            scheduled.on_done(snippet)
+
+    @staticmethod
+    def run_scheduled():
+        # Called after each snippet, runs the entries which must not be deferred
+        max_priority = InjectionScheduler.PRIORITY_TUNINGS if InjectionScheduler.ENABLED else InjectionScheduler.PRIORITY_OBJECTS
+        queue = InjectionScheduler._queue
+        while queue and queue[0].key >> 48 <= max_priority:
+            InjectionScheduler._run_next()
+
+    @staticmethod
+    def run_slice(*_):
+        queue = InjectionScheduler._queue
+        if not queue:
+            return
+        t = time.perf_counter()
+        end = t + InjectionScheduler.SLICE_SECONDS
+        while queue and time.perf_counter() < end:
+            InjectionScheduler._run_next()
+        InjectionScheduler.deferred_seconds += time.perf_counter() - t
+        if not queue:
+            InjectionScheduler._finish()
+
+    @staticmethod
+    def run_all(*_):
+        queue = InjectionScheduler._queue
+        if not queue:
+            return
+        t = time.perf_counter()
+        while queue:
+            InjectionScheduler._run_next()
+        InjectionScheduler.deferred_seconds += time.perf_counter() - t
+        InjectionScheduler._finish()
+
+    @staticmethod
+    def start():
+        if Settings.get('profile_load', False):
+            from xml_injector.load_profiler import LoadProfiler
+            LoadProfiler.start()
+        if Settings.get('export_changes', False):
+            from xml_injector.change_export import ChangeExport
+            ChangeExport.enable()
+
+    @staticmethod
+    def stop():
+        if Settings.get('profile_load', False):
+            from xml_injector.load_profiler import LoadProfiler
+            LoadProfiler.stop()
+        if Settings.get('export_changes', False):
+            from xml_injector.change_export import ChangeExport
+            ChangeExport.write()
+
+    @staticmethod
+    def _finish():
+        # Deferred entries may have added to the batched additions
+        BatchedAdditions.apply_all()
+        log.info(f'Deferred object injection finished in {InjectionScheduler.deferred_seconds:.3f}s')
+        InjectionScheduler.stop()
+
+    @staticmethod
+    def on_snippets_loaded(*_):
+        # Registered after BatchedAdditions.apply_all(), deferred entries stop the profiler in _finish()
+        if not InjectionScheduler._queue:
+            InjectionScheduler.stop()
+
+    @staticmethod
+    @CommonEventRegistry.handle_events(ModInfo.get_identity().name)
+    def handle_event(event_data: S4CLZoneEarlyLoadEvent):
+        InjectionScheduler.run_all()
+        InjectionScheduler.stop()
+
+
+services.get_instance_manager(Types.SNIPPET).add_on_load_complete(InjectionScheduler.on_snippets_loaded)
+if InjectionScheduler.ENABLED:
+    for _definition in getattr(sims4.resources, 'INSTANCE_TUNING_DEFINITIONS', ()):
+        if _definition.TYPE_ENUM_VALUE != sims4.resources.Types.SNIPPET:
+            services.get_instance_manager(_definition.TYPE_ENUM_VALUE).add_on_load_complete(InjectionScheduler.run_slice)
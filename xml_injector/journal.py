@@ -0,0 +1,161 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The journal module runs every snippet entry in its own transactional unit.
+# AddToTuning writes tuning attributes with Journal.setattr() and registers Journal.on_rollback()
+# callbacks for changes to pending additions. When a unit raises, its writes are rolled back in
+# reverse order and an InjectionError is stored, the remaining entries are still processed.
+# InjectionUnits.retry() (console command 'xml_injector.retry') runs the failed units again.
+# An InjectionError keeps the snippet id, section and index, the entry is read again from the snippet.
+# Only the file, line and function of each frame are kept, the traceback is formatted by get_details().
+
+
+from typing import Any, Callable, List, Tuple
+
+import services
+from sims4.resources import Types
+
+from xml_injector.log import log
+from xml_injector.stats import Stats
+
+
+class _Missing:
+    pass
+
+
+class Journal:
+    _current: 'Journal' = None
+    # Called with (obj, attribute) before each write, see ChangeExport
+    observer: Callable[[Any, str], None] = None
+
+    def __init__(self):
+        self._undo: List[Tuple[Any, str, Any]] = []
+
+    @staticmethod
+    def _get_raw(obj, attribute: str):
+        # Read the value stored on obj itself, without descriptors (LazyAffordances) or inherited values
+        obj_dict = getattr(obj, '__dict__', None)
+        if obj_dict is not None:
+            return obj_dict.get(attribute, _Missing)
+        return getattr(obj, attribute, _Missing)
+
+    @staticmethod
+    def setattr(obj, attribute: str, value):
+        if Journal.observer is not None:
+            Journal.observer(obj, attribute)
+        journal = Journal._current
+        if journal is not None:
+            journal._undo.append((obj, attribute, Journal._get_raw(obj, attribute)))
+        setattr(obj, attribute, value)
+
+    @staticmethod
+    def on_rollback(callback: Callable[[], None]):
+        journal = Journal._current
+        if journal is not None:
+            journal._undo.append((callback, None, None))
+
+    def rollback(self):
+        for obj, attribute, value in reversed(self._undo):
+            # noinspection PyBroadException
+            try:
+                if attribute is None:
+                    obj()
+                elif value is _Missing:
+                    delattr(obj, attribute)
+                else:
+                    setattr(obj, attribute, value)
+            except Exception as e:
+                log.error(f'Exception {e} rolling back {obj}.{attribute}')
+        self._undo = []
+
+
+class InjectionError:
+    __slots__ = ('snippet_id', 'section', 'index', 'fn', 'error', 'frames')
+
+    def __init__(self, snippet_id: int, section: str, index, fn: Callable, error: Exception):
+        # fn is None for units which can not be run again without their arguments (BatchedAdditions keeps those)
+        self.snippet_id = snippet_id
+        self.section = section
+        self.index = index
+        self.fn = fn
+        self.error = f'{type(error).__name__}: {error}'
+        self.frames: List[Tuple[str, int, str]] = []
+        tb = error.__traceback__
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            self.frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+            tb = tb.tb_next
+
+    def get_details(self) -> str:
+        frames = ''.join(f'  File "{file_name}", line {line}, in {name}\n' for file_name, line, name in self.frames)
+        return f'Traceback (most recent call last):\n{frames}{self.error}'
+
+    def __str__(self):
+        snippet = InjectionUnits.get_snippet(self.snippet_id)
+        name = '' if self.snippet_id is None else f'{getattr(snippet, "__name__", f"{self.snippet_id:016x}")}.'
+        index = '' if self.index is None else f'[{self.index}]'
+        return f'{name}{self.section}{index}: {self.error}'
+
+
+class InjectionUnits:
+    errors: List[InjectionError] = []
+    current_snippet = None
+
+    @staticmethod
+    def get_snippet(snippet_id: int):
+        return None if snippet_id is None else services.get_instance_manager(Types.SNIPPET).get(snippet_id)
+
+    @staticmethod
+    def get_entry(snippet, section: str, index):
+        # The entry (or the whole section if index is None), None if the section has been released ('release_snippet_payloads')
+        entries = getattr(snippet, section, None)
+        if not entries:
+            return None
+        return entries if index is None else entries[index]
+
+    @staticmethod
+    def run(snippet, section: str, index, fn: Callable, *args) -> bool:
+        # Run fn(*args) as one unit, snippet and index identify the entry and may be None.
+        journal = Journal()
+        previous = Journal._current
+        previous_snippet = InjectionUnits.current_snippet
+        Journal._current = journal
+        InjectionUnits.current_snippet = snippet
+        t = Stats.now()
+        try:
+            fn(*args)
+            return True
+        except Exception as e:
+            journal.rollback()
+            error = InjectionError(getattr(snippet, 'guid64', None), section, index, fn if snippet is not None or not args else None, e)
+            InjectionUnits.errors.append(error)
+            log.error(f'Exception occurred processing {error}, changes of this entry were reverted')
+            return False
+        finally:
+            Stats.add_time(section, Stats.now() - t)
+            Journal._current = previous
+            InjectionUnits.current_snippet = previous_snippet
+
+    @staticmethod
+    def retry() -> Tuple[int, int]:
+        # Returns the number of retried and of still failing units.
+        # Failed BatchedAdditions writes are retried by BatchedAdditions.apply_all().
+        errors = InjectionUnits.errors
+        InjectionUnits.errors = []
+        for error in errors:
+            if error.fn is None:
+                continue
+            if error.snippet_id is None:
+                InjectionUnits.run(None, error.section, error.index, error.fn)
+                continue
+            snippet = InjectionUnits.get_snippet(error.snippet_id)
+            entry = None if snippet is None else InjectionUnits.get_entry(snippet, error.section, error.index)
+            if entry is None:
+                log.error(f'{error}: the entry is no longer available')
+                InjectionUnits.errors.append(error)
+                continue
+            InjectionUnits.run(snippet, error.section, error.index, error.fn, entry)
+        return len(errors), len(InjectionUnits.errors)
@@ -0,0 +1,143 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The lazy_affordances module implements the opt-in 'lazy_object_affordances' setting.
+# Instead of rebuilding '_super_affordances' of every selected object tuning while the game
+# loads, the additions are recorded and a _PendingSuperAffordances descriptor is placed on the
+# tuning class. The first read of '_super_affordances', either on the class or on the first
+# instance of the object, merges the additions and replaces the descriptor with the final tuple.
+# Object tunings which are never read this session are never rebuilt.
+# The pending additions are stored as an array of 64-bit affordance ids, one record per tuning,
+# and the record is released when the tuning is materialized. 'in' checks use a set of the pending ids,
+# built on the first check and kept up to date while affordances are added.
+# has_super_affordance() also sees the additions which are still collected in pending_batch, the
+# BatchedAdditions of the object interactions (set by AddToTuning).
+
+
+from array import array
+
+import services
+from sims4.resources import Types
+
+from xml_injector.journal import Journal
+from xml_injector.log import log
+from xml_injector.settings import Settings
+
+
+class _PendingSuperAffordances:
+    __slots__ = ('tuning', 'base', 'pending', '_guid64s')
+
+    def __init__(self, tuning, base):
+        self.tuning = tuning
+        self.base = base
+        self.pending = array('Q')  # guid64 of the pending affordances
+        self._guid64s: set = None  # The pending guid64s for 'in' checks, built on first use
+
+    def append(self, guid64: int):
+        self.pending.append(guid64)
+        if self._guid64s is not None:
+            self._guid64s.add(guid64)
+
+    def remove_last(self, count: int):
+        del self.pending[len(self.pending) - count:]
+        self._guid64s = None
+
+    def __contains__(self, sa):
+        if self._guid64s is None:
+            self._guid64s = set(self.pending)
+        return sa.guid64 in self._guid64s or sa in self.base
+
+    def get_affordances(self) -> tuple:
+        affordance_manager = services.get_instance_manager(Types.INTERACTION)
+        return tuple(affordance_manager.get(guid64) for guid64 in self.pending)
+
+    def __get__(self, instance, owner):
+        return LazyAffordances.materialize(self.tuning)
+
+
+class LazyAffordances:
+    ATTRIBUTE = '_super_affordances'
+    ENABLED = Settings.get('lazy_object_affordances', False)
+    pending_batch = None
+    pending_tunings = 0
+    materialized_tunings = 0
+
+    @staticmethod
+    def _get_pending(tuning):
+        pending = getattr(tuning, '__dict__', {}).get(LazyAffordances.ATTRIBUTE, None)
+        if isinstance(pending, _PendingSuperAffordances):
+            return pending
+        return None
+
+    @staticmethod
+    def has_super_affordances(tuning) -> bool:
+        # hasattr() would materialize the pending additions
+        return LazyAffordances._get_pending(tuning) is not None or hasattr(tuning, LazyAffordances.ATTRIBUTE)
+
+    @staticmethod
+    def has_super_affordance(tuning, sa) -> bool:
+        pending = LazyAffordances._get_pending(tuning)
+        if pending is not None:
+            if sa in pending:
+                return True
+        elif not hasattr(tuning, LazyAffordances.ATTRIBUTE):
+            return False
+        elif sa in tuning._super_affordances:
+            return True
+        return LazyAffordances.pending_batch is not None and LazyAffordances.pending_batch.has_pending(tuning, sa)
+
+    @staticmethod
+    def get_super_affordances(tuning) -> tuple:
+        # Read '_super_affordances' including the pending additions without materializing them
+        pending = LazyAffordances._get_pending(tuning)
+        if pending is not None:
+            return pending.base + pending.get_affordances()
+        return tuning._super_affordances
+
+    @staticmethod
+    def get_existing(tuning):
+        # The pending record or '_super_affordances' for 'in' checks, without materializing the pending additions
+        pending = LazyAffordances._get_pending(tuning)
+        return tuning._super_affordances if pending is None else pending
+
+    @staticmethod
+    def add_super_affordances(tuning, sa_list, allow_duplicates: bool = False) -> list:
+        # Record sa_list for tuning and return the affordances which will be added.
+        pending = LazyAffordances._get_pending(tuning)
+        if pending is None:
+            pending = _PendingSuperAffordances(tuning, tuning._super_affordances)
+        sa_to_add_list = []
+        for sa in sa_list:
+            if allow_duplicates or sa not in pending:
+                sa_to_add_list.append(sa)
+                pending.append(sa.guid64)
+        if sa_to_add_list:
+            count = len(sa_to_add_list)
+            Journal.on_rollback(lambda: LazyAffordances._remove(pending, count))
+            if LazyAffordances._get_pending(tuning) is not pending:
+                Journal.setattr(tuning, LazyAffordances.ATTRIBUTE, pending)
+                LazyAffordances.pending_tunings += 1
+                Journal.on_rollback(LazyAffordances._remove_pending_tuning)
+        return sa_to_add_list
+
+    @staticmethod
+    def _remove(pending: _PendingSuperAffordances, count: int):
+        pending.remove_last(count)
+
+    @staticmethod
+    def _remove_pending_tuning():
+        LazyAffordances.pending_tunings -= 1
+
+    @staticmethod
+    def materialize(tuning):
+        pending = LazyAffordances._get_pending(tuning)
+        if pending is None:
+            return tuning._super_affordances
+        super_affordances = pending.base + pending.get_affordances()
+        setattr(tuning, LazyAffordances.ATTRIBUTE, super_affordances)
+        LazyAffordances.pending_tunings -= 1
+        LazyAffordances.materialized_tunings += 1
+        return super_affordances
@@ -0,0 +1,135 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The load_profiler module implements the opt-in 'profile_load' setting.
+# A sampling profiler is started when the first XmlInjector snippet is processed and stopped when the
+# last entry has been processed (after the snippet manager has loaded, or after the deferred object
+# injection). A daemon thread records the Python stack of the loading thread every
+# 'profile_load_interval_ms', so the time spent in game code called by the injector
+# (clone_with_overrides, refresh_build_buy_tag_cache, _validate_recursion, ...) and in the game's own
+# loading between the snippets shows up next to the injector code, without instrumenting either.
+# The sampler only runs when the loading thread releases the GIL, usually every 5 ms (sys.getswitchinterval()).
+#
+# Two files are written to 'mod_logs':
+#   xml_injector_load.collapsed - one line per stack 'outer;...;inner samples', for flamegraph.pl or speedscope
+#   xml_injector_load.pstats - the samples as pstats data, for pstats.Stats() or snakeviz. Call counts are sample counts.
+
+
+import marshal
+import os
+import sys
+import threading
+import time
+from typing import Dict, Tuple
+
+from xml_injector.log import log
+from xml_injector.settings import Settings
+from sims4communitylib.utils.common_log_utils import CommonLogUtils
+
+
+class LoadProfiler:
+    ENABLED = Settings.get('profile_load', False)
+    INTERVAL_SECONDS = Settings.get('profile_load_interval_ms', 5) / 1000
+    FILE_NAME = 'xml_injector_load'
+    # Stack of code objects, outermost first: samples
+    samples: Dict[Tuple, int] = {}
+    ticks = 0  # Samples including the ones without a Python frame of the loading thread
+    seconds = 0.0
+    _started = False
+    _thread: threading.Thread = None
+    _stop_event: threading.Event = None
+    _thread_id = None
+    _start_time = 0.0
+
+    @staticmethod
+    def start():
+        # Only the first call starts the profiler, a retry later in the session is not profiled
+        if not LoadProfiler.ENABLED or LoadProfiler._started:
+            return
+        LoadProfiler._started = True
+        LoadProfiler._thread_id = threading.get_ident()
+        LoadProfiler._stop_event = threading.Event()
+        LoadProfiler._thread = threading.Thread(target=LoadProfiler._sample, name='xml_injector_load_profiler', daemon=True)
+        LoadProfiler._start_time = time.perf_counter()
+        LoadProfiler._thread.start()
+        log.info(f'Load profiler started, sampling every {LoadProfiler.INTERVAL_SECONDS * 1000:.1f} ms')
+
+    @staticmethod
+    def stop():
+        if LoadProfiler._thread is None:
+            return
+        LoadProfiler._stop_event.set()
+        LoadProfiler._thread.join()
+        LoadProfiler._thread = None
+        LoadProfiler.seconds = time.perf_counter() - LoadProfiler._start_time
+        # noinspection PyBroadException
+        try:
+            LoadProfiler.write()
+        except Exception as e:
+            log.error(f'Exception {e} writing the load profile')
+
+    @staticmethod
+    def _sample():
+        thread_id = LoadProfiler._thread_id
+        samples = LoadProfiler.samples
+        get_frames = sys._current_frames
+        while not LoadProfiler._stop_event.wait(LoadProfiler.INTERVAL_SECONDS):
+            LoadProfiler.ticks += 1
+            frame = get_frames().get(thread_id, None)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                stack = tuple(reversed(stack))
+                samples[stack] = samples.get(stack, 0) + 1
+
+    @staticmethod
+    def get_function(code) -> Tuple[str, int, str]:
+        return code.co_filename, code.co_firstlineno, code.co_name
+
+    @staticmethod
+    def get_label(code) -> str:
+        # ';' separates the frames of a collapsed stack and ' ' the count
+        return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':').replace(' ', '_')
+
+    @staticmethod
+    def get_collapsed() -> str:
+        lines = [f"{';'.join(LoadProfiler.get_label(code) for code in stack)} {count}" for stack, count in LoadProfiler.samples.items()]
+        return '\n'.join(sorted(lines)) + '\n'
+
+    @staticmethod
+    def get_pstats(seconds_per_sample: float) -> Dict:
+        # {function: (primitive calls, calls, own time, cumulative time, {caller: (calls, primitive calls, own time, cumulative time)})}
+        stats = {}
+        for stack, count in LoadProfiler.samples.items():
+            seconds = count * seconds_per_sample
+            functions = [LoadProfiler.get_function(code) for code in stack]
+            seen = set()
+            for i, function in enumerate(functions):
+                cc, nc, tt, ct, callers = stats.get(function, None) or (0, 0, 0.0, 0.0, {})
+                leaf = i == len(functions) - 1
+                # Recursive functions count once per sample
+                recursive = function in seen
+                seen.add(function)
+                stats[function] = (cc + (0 if recursive else count), nc + count, tt + (seconds if leaf else 0.0), ct + (0.0 if recursive else seconds), callers)
+                if i:
+                    caller = functions[i - 1]
+                    c_nc, c_cc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                    callers[caller] = (c_nc + count, c_cc + count, c_tt + (seconds if leaf else 0.0), c_ct + seconds)
+        return stats
+
+    @staticmethod
+    def write():
+        total = sum(LoadProfiler.samples.values())
+        path = os.path.join(CommonLogUtils.get_sims_documents_location_path(), 'mod_logs')
+        os.makedirs(path, exist_ok=True)
+        file_name = os.path.join(path, LoadProfiler.FILE_NAME)
+        with open(f'{file_name}.collapsed', 'wt', encoding='UTF-8') as fp:
+            fp.write(LoadProfiler.get_collapsed())
+        with open(f'{file_name}.pstats', 'wb') as fp:
+            marshal.dump(LoadProfiler.get_pstats(LoadProfiler.seconds / LoadProfiler.ticks if LoadProfiler.ticks else 0.0), fp)
+        log.info(f'Wrote {total} samples of {LoadProfiler.seconds:.3f}s ({len(LoadProfiler.samples)} stacks) to {file_name}.collapsed and .pstats')
@@ -0,0 +1,15 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The log of the XmlInjector engine modules, registered once and imported with 'from xml_injector.log import log'.
+
+
+from xml_injector.modinfo import ModInfo
+from sims4communitylib.utils.common_log_registry import CommonLog, CommonLogRegistry
+
+
+log: CommonLog = CommonLogRegistry.get().register_log(ModInfo.get_identity(), ModInfo.get_identity().name)
+log.enable()
@@ -0,0 +1,129 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The loot_merges module de-duplicates the loot ops added with 'add_to_loot_actions' and
+# 'add_to_random_loot_actions'. Several mods often add the same buff or statistic loot to the same
+# LootActions, every copy runs whenever the loot is executed and makes the loot graph walked by
+# _validate_recursion() larger.
+# A loot op is identified by a structural signature of its tuned values: factory or class name,
+# references by guid64 and the values of tuples and mappings. Ops with the same signature as an op
+# already present on the loot are skipped and listed with 'xml_injector.loot_merges'.
+# Values which can not be compared (too deep or without tuned values) are identified by the object
+# itself, such ops are never merged with a different op. Disable with 'merge_duplicate_loot'.
+
+
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+from xml_injector.journal import InjectionUnits, Journal
+from xml_injector.log import log
+from xml_injector.settings import Settings
+
+
+class _LootMerge:
+    __slots__ = ('target', 'description', 'snippets')
+
+    def __init__(self, target: str, description: str):
+        self.target = target
+        self.description = description
+        self.snippets: List[str] = []  # One item per merged op
+
+
+class LootMerges:
+    ENABLED = Settings.get('merge_duplicate_loot', True)
+    MAX_DEPTH = 10
+    REPORT_SIZE = 20
+    # (target name, signature): merged ops
+    merges: Dict[Tuple[str, Any], _LootMerge] = {}
+    # (target, attribute): (ops, signatures of ops), only the ops added since are signed again
+    _existing: Dict[Tuple[Any, str], Tuple[tuple, set]] = {}
+
+    @staticmethod
+    def get_signature(value, depth: int = 0) -> Any:
+        # Hashable structural signature, equal for loot ops with the same tuned values
+        if value is None or isinstance(value, (bool, int, float, str, bytes)):
+            return value
+        if depth > LootMerges.MAX_DEPTH:
+            return 'id', id(value)
+        depth += 1
+        if isinstance(value, type):
+            guid64 = getattr(value, 'guid64', None)
+            return ('tuning', guid64) if guid64 is not None else ('class', value.__module__, value.__qualname__)
+        tuned_values = getattr(value, '_tuned_values', None)
+        if tuned_values is not None:
+            factory = getattr(value, 'factory', type(value))
+            return 'factory', getattr(factory, '__qualname__', repr(factory)), LootMerges.get_signature(tuned_values, depth)
+        if isinstance(value, dict):
+            items = ((LootMerges.get_signature(k, depth), LootMerges.get_signature(v, depth)) for k, v in value.items())
+            return ('dict', type(value).__name__) + tuple(sorted(items, key=repr))
+        if isinstance(value, (tuple, list)):
+            return ('list',) + tuple(LootMerges.get_signature(item, depth) for item in value)
+        if isinstance(value, (set, frozenset)):
+            return ('set',) + tuple(sorted((LootMerges.get_signature(item, depth) for item in value), key=repr))
+        if callable(value) and hasattr(value, '__qualname__'):
+            return 'function', getattr(value, '__module__', ''), value.__qualname__
+        attributes = getattr(value, '__dict__', None)
+        if attributes is not None:
+            return ('object', type(value).__qualname__) + LootMerges.get_signature(attributes, depth)[2:]
+        return 'id', id(value)
+
+    @staticmethod
+    def get_digest(value) -> str:
+        # Short and stable form of the signature for logs and catalogue snapshots
+        return hashlib.md5(repr(LootMerges.get_signature(value)).encode('UTF-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _get_existing(target, attribute: str) -> set:
+        # Popular loots get additions from many snippets, signing all their ops for each entry is quadratic
+        ops = getattr(target, attribute)
+        cached_ops, signatures = LootMerges._existing.get((target, attribute), ((), set()))
+        if ops is cached_ops:
+            return signatures
+        if len(ops) >= len(cached_ops) and ops[:len(cached_ops)] == cached_ops:
+            signatures = set(signatures)
+            new_ops = ops[len(cached_ops):]
+        else:
+            # Reverted or replaced
+            signatures = set()
+            new_ops = ops
+        signatures.update(LootMerges.get_signature(op) for op in new_ops)
+        LootMerges._existing[(target, attribute)] = (ops, signatures)
+        return signatures
+
+    @staticmethod
+    def get_existing_loot_actions(loot_actions) -> set:
+        return LootMerges._get_existing(loot_actions, 'loot_actions')
+
+    @staticmethod
+    def get_existing_random_loot_actions(random_loot_actions) -> set:
+        return LootMerges._get_existing(random_loot_actions, 'random_loot_actions')
+
+    @staticmethod
+    def get_description(op) -> str:
+        # Weighted random loot ops are tuples of action and weight
+        action = getattr(op, 'action', op)
+        factory = getattr(action, 'factory', None)
+        name = getattr(factory, '__name__', None) or getattr(action, '__name__', None) or type(action).__name__
+        return f'{name} {LootMerges.get_digest(op)}'
+
+    @staticmethod
+    def on_duplicate(target, op, signature):
+        target_name = getattr(target, '__name__', str(target))
+        merge = LootMerges.merges.get((target_name, signature), None)
+        if merge is None:
+            merge = LootMerges.merges[(target_name, signature)] = _LootMerge(target_name, LootMerges.get_description(op))
+        snippet = InjectionUnits.current_snippet
+        merge.snippets.append(getattr(snippet, '__name__', str(snippet)))
+        log.info(f'  {target_name}: skipping duplicate loot op {merge.description}')
+        Journal.on_rollback(lambda: merge.snippets.pop())
+
+    @staticmethod
+    def get_report(count: int = REPORT_SIZE) -> List[str]:
+        merges = [merge for merge in LootMerges.merges.values() if merge.snippets]
+        report = [f'{sum(len(merge.snippets) for merge in merges)} duplicate loot ops merged into {len(merges)} loot ops']
+        for merge in sorted(merges, key=lambda merge: -len(merge.snippets))[:count]:
+            report.append(f'{merge.target}: {merge.description} {len(merge.snippets)}x ({", ".join(sorted(set(merge.snippets)))})')
+        return report
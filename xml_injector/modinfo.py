@@ -34,10 +34,32 @@ class ModInfo(CommonModInfo):
 
     @property
     def _version(self) -> str:
-        return '0.0.6-5'
+        return '0.0.7-5'
 
 
 """
+v0.0.7-5
+    Add 'mod_data/xml_injector/settings.ini'
+    Add object interactions once per object tuning after all snippets have been loaded, add 'lazy_object_affordances' setting to add them on first use instead of while loading
+    Add interactions to sims, phones and relpanel once after all snippets have been loaded
+    Add lock aware interactions once per object_locking_component after all snippets have been loaded
+    Add purchase list options (unique by tuned values) and picker dialog categories (unique by tag) once per interaction after all snippets have been loaded
+    Add buffs (unique by buff_type) once per trait after all snippets have been loaded, duplicates are counted and logged
+    Add 'xml_injector.dump_catalogue' console command to write a catalogue snapshot for '_tools/replay_catalogue.py'
+    Process every snippet entry on its own, failing entries are reverted and listed with 'xml_injector.errors' and can be retried with 'xml_injector.retry'
+    Estimate the objects matched by object selections, log, cap or refuse selections above 'selector_threshold', list expensive snippets with 'xml_injector.costs'
+    Process snippet entries by priority, add 'deferred_object_injection' setting to add to objects in time slices after loading the snippets
+    Add 'xml_injector.stats' console command to show (and reset) counters and timings
+    Add mixer interactions once per AffordanceList for all snippets, 'xml_injector.mixer' lists the AffordanceLists of a mixer
+    Add 'profile_imports' setting to record module import times, list them with 'xml_injector.imports', import the profilers, the change export and the selector costs only if enabled or used, share one log
+    Add '_tools/bundle_snippets.py' to merge the snippets of a pack into one snippet
+    Process all snippet sections with one table of operations, states, name and object relationship components are written once per target after all snippets have been loaded
+    Add 'release_snippet_payloads' setting to release the snippet entries after processing, list the summaries with 'xml_injector.payloads'
+    Merge loot ops with the same tuned values added to the same loot by several snippets ('merge_duplicate_loot'), list them with 'xml_injector.loot_merges', only new loot ops are signed
+    Add 'profile_load' setting to sample the game while the snippets are processed, writes collapsed stacks and pstats to 'mod_logs'
+    Add '_tools/check_scaling.py' to check that the injector work grows linearly with the number of snippets and the catalogue size, run it with pytest as '_tools/test_scaling.py'
+    Object selections are bitsets over dense object slots, selections by name and tag are scanned once and cached while loading
+    Export the added item ids and lengths of all changed tuning attributes to 'mod_data/xml_injector/injected_changes.bin' ('export_changes'), compare two exports with '_tools/compare_changes.py', the additions are not logged one by one with the export
 v0.0.6-5
     Removed reference to HasTunableReference (broken with 1.117.227.1030 update)
 v0.0.6-4
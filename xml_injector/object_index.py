@@ -0,0 +1,74 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The object_index module provides cheap estimates of how many object tunings an ObjectSelection
+# will match, without scanning the whole catalogue.
+# Tag counts are read from the build/buy tag cache of the DefinitionManager. Names and affordances
+# are checked against an evenly spaced sample of the object tunings and scaled to the catalogue size.
+
+
+from typing import Dict, List
+
+import services
+
+from xml_injector.lazy_affordances import LazyAffordances
+from xml_injector.log import log
+from xml_injector.stats import Stats
+
+
+class ObjectIndex:
+    SAMPLE_SIZE = 1000
+    _tuning_count: int = None
+    _sample: List = None
+    _tag_counts: Dict[int, int] = {}
+
+    @staticmethod
+    def reset():
+        ObjectIndex._tuning_count = None
+        ObjectIndex._sample = None
+        ObjectIndex._tag_counts = {}
+
+    @staticmethod
+    def get_tuning_count() -> int:
+        if ObjectIndex._tuning_count is None:
+            ObjectIndex._tuning_count = len(services.definition_manager()._tuned_classes)
+        return ObjectIndex._tuning_count
+
+    @staticmethod
+    def get_sample() -> List:
+        if ObjectIndex._sample is None:
+            tunings = list(services.definition_manager()._tuned_classes.values())
+            step = max(1, len(tunings) // ObjectIndex.SAMPLE_SIZE)
+            ObjectIndex._sample = tunings[::step]
+            ObjectIndex._tuning_count = len(tunings)
+        return ObjectIndex._sample
+
+    @staticmethod
+    def _scale(matches: int) -> int:
+        sample = ObjectIndex.get_sample()
+        if not sample:
+            return 0
+        return matches * ObjectIndex.get_tuning_count() // len(sample)
+
+    @staticmethod
+    def estimate_partial_name(partial_name: str) -> int:
+        Stats.add(Stats.OBJECTS_SCANNED, len(ObjectIndex.get_sample()))
+        return ObjectIndex._scale(sum(1 for tun in ObjectIndex.get_sample() if partial_name in getattr(tun, '__name__', '')))
+
+    @staticmethod
+    def estimate_affordance(affordance) -> int:
+        Stats.add(Stats.OBJECTS_SCANNED, len(ObjectIndex.get_sample()))
+        return ObjectIndex._scale(sum(1 for tun in ObjectIndex.get_sample() if LazyAffordances.has_super_affordance(tun, affordance)))
+
+    @staticmethod
+    def estimate_tag(tag) -> int:
+        count = ObjectIndex._tag_counts.get(tag, None)
+        Stats.add(Stats.INDEX_MISSES if count is None else Stats.INDEX_HITS)
+        if count is None:
+            definition_manager = services.definition_manager()
+            definition_manager.refresh_build_buy_tag_cache(refresh_definition_cache=False)
+            count = ObjectIndex._tag_counts[tag] = sum(1 for _ in definition_manager.get_definitions_for_tags_gen((tag,)))
+        return count
@@ -29,7 +29,11 @@
 
 
 import services
+from xml_injector.lazy_affordances import LazyAffordances
 from xml_injector.modinfo import ModInfo
+from xml_injector.object_index import ObjectIndex
+from xml_injector.object_slots import ObjectBits, ObjectSlots
+from xml_injector.stats import Stats
 from objects.definition_manager import DefinitionManager
 from sims4.tuning.tunable import AutoFactoryInit, HasTunableSingletonFactory, Tunable, TunableList, TunableReference, TunableVariant, TunableEnumEntry
 from sims4communitylib.utils.common_log_registry import CommonLog, CommonLogRegistry
@@ -54,18 +58,29 @@ class ObjectSelection(TunableVariant):
         }
 
         def get_objects(self):
+            return self.get_object_bits().get_tunings()
+
+        def get_object_bits(self) -> ObjectBits:
             # Get the object tunings for each of the objects in the object list
             # from the DefinitionManager
             definition_manager = services.definition_manager()
             obj_list = []
+            Stats.add(Stats.OBJECTS_SCANNED, len(self.object_list))
             for obj_id in self.object_list:
                 # get() on the DefinitionManager will return an object definition,
                 # to get an actual tuning by ID, we need to call the super()
                 tun = super(DefinitionManager, definition_manager).get(obj_id)
+                Stats.add(Stats.INDEX_HITS if tun else Stats.INDEX_MISSES)
                 if tun:
-                    if hasattr(tun, '_super_affordances'):
+                    if LazyAffordances.has_super_affordances(tun):
                         obj_list.append(tun)
-            return obj_list
+            return ObjectSlots.get_bits(obj_list)
+
+        def estimate_objects(self) -> int:
+            return len(self.object_list)
+
+        def __repr__(self):
+            return f'object_list({len(self.object_list)} objects)'
 
     # objects_with_affordance variant
     class _ObjectsWithAffordance(HasTunableSingletonFactory, AutoFactoryInit):
@@ -79,14 +94,20 @@ class ObjectSelection(TunableVariant):
         }
 
         def get_objects(self):
+            return self.get_object_bits().get_tunings()
+
+        def get_object_bits(self) -> ObjectBits:
             # Iterate through all object tunings from the DefinitionManager
-            # and return those that contain the referenced affordance
-            definition_manager = services.definition_manager()
-            obj_list = []
-            for tun in definition_manager._tuned_classes.values():
-                if hasattr(tun, '_super_affordances') and self.affordance in tun._super_affordances:
-                    obj_list.append(tun)
-            return obj_list
+            # and return those that contain the referenced affordance.
+            # Not cached, earlier entries may have added the affordance to more objects.
+            affordance = self.affordance
+            return ObjectSlots.scan(lambda tun: LazyAffordances.has_super_affordance(tun, affordance))
+
+        def estimate_objects(self) -> int:
+            return ObjectIndex.estimate_affordance(self.affordance)
+
+        def __repr__(self):
+            return f'objects_with_affordance({self.affordance})'
 
     # objects_matching_name variant
     class _ObjectsMatchingName(HasTunableSingletonFactory, AutoFactoryInit):
@@ -98,17 +119,25 @@ class ObjectSelection(TunableVariant):
         }
 
         def get_objects(self):
+            return self.get_object_bits().get_tunings()
+
+        def get_object_bits(self) -> ObjectBits:
             # Iterate through all object tunings from the DefinitionManager
-            # and return those whose name contains the partial_name
-            obj_list = []
-            if not isinstance(self.partial_name, str):
+            # and return those whose name contains the partial_name, cached per partial_name
+            partial_name = self.partial_name
+            if not isinstance(partial_name, str):
                 log.error('Tuning error, missing or invalid partial_name')
-            else:
-                definition_manager = services.definition_manager()
-                for tun in definition_manager._tuned_classes.values():
-                    if hasattr(tun, '__name__') and self.partial_name in tun.__name__:
-                        obj_list.append(tun)
-            return obj_list
+                return ObjectBits()
+            return ObjectSlots.get_cached(('name', partial_name), lambda: ObjectSlots.scan(
+                lambda tun: hasattr(tun, '__name__') and partial_name in tun.__name__))
+
+        def estimate_objects(self) -> int:
+            if not isinstance(self.partial_name, str):
+                return 0
+            return ObjectIndex.estimate_partial_name(self.partial_name)
+
+        def __repr__(self):
+            return f"objects_matching_name('{self.partial_name}')"
 
     # objects_with_tag variant
     class _ObjectsWithTag(HasTunableSingletonFactory, AutoFactoryInit):
@@ -120,12 +149,26 @@ class ObjectSelection(TunableVariant):
         }
 
         def get_objects(self):
+            return self.get_object_bits().get_tunings()
+
+        def get_object_bits(self) -> ObjectBits:
+            # Cached per tag
+            return ObjectSlots.get_cached(('tag', self.tag), self._get_tagged_objects)
+
+        def _get_tagged_objects(self) -> ObjectBits:
             obj_set = set()
             definition_manager = services.definition_manager()
             definition_manager.refresh_build_buy_tag_cache(refresh_definition_cache=False)
             for defn in definition_manager.get_definitions_for_tags_gen((self.tag,)):
                 obj_set.add(defn.cls)
-            return list(obj_set)
+            Stats.add(Stats.OBJECTS_SCANNED, len(obj_set))
+            return ObjectSlots.get_bits(obj_set)
+
+        def estimate_objects(self) -> int:
+            return ObjectIndex.estimate_tag(self.tag)
+
+        def __repr__(self):
+            return f'objects_with_tag({self.tag})'
 
     # Create a variant for the object_selection
     def __init__(self, **kwargs):
@@ -0,0 +1,179 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The object_slots module represents sets of object tunings as bitsets.
+# Each object tuning of the DefinitionManager gets a dense slot number (its position in the catalogue),
+# an ObjectBits set stores one bit per slot in a Python int. Union, intersection and difference are
+# word-level int operations and a selection of 20000 objects needs 2.5 KB instead of a list of references.
+# Selections which do not change while the snippets are processed (objects_matching_name, objects_with_tag
+# and the objects with '_components' or '_super_affordances' used to filter large selections) are cached,
+# repeated selections of the same name or tag by many snippets scan the catalogue once.
+# objects_with_affordance sees the interactions added by earlier entries and is not cached.
+# The slots and the cache are rebuilt when the catalogue size changes and released when the zone loads.
+
+
+from typing import Any, Callable, Dict, Iterable, List
+
+import services
+
+from xml_injector.lazy_affordances import LazyAffordances
+from xml_injector.log import log
+from xml_injector.modinfo import ModInfo
+from xml_injector.stats import Stats
+from sims4communitylib.events.event_handling.common_event_registry import CommonEventRegistry
+from sims4communitylib.events.zone_spin.events.zone_early_load import S4CLZoneEarlyLoadEvent
+
+
+# The set bits of each byte value
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+class ObjectBits:
+    __slots__ = ('bits',)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @staticmethod
+    def from_slots(slots: Iterable[int]) -> 'ObjectBits':
+        # One pass over a bytearray, setting the bits of an int one by one would copy the int for each slot
+        data = bytearray((len(ObjectSlots.tunings) + 7) >> 3)
+        for slot in slots:
+            data[slot >> 3] |= 1 << (slot & 7)
+        return ObjectBits(int.from_bytes(data, 'little'))
+
+    def get_slots(self) -> List[int]:
+        slots = []
+        bits = self.bits
+        for i, value in enumerate(bits.to_bytes((bits.bit_length() + 7) >> 3, 'little')):
+            if value:
+                base = i << 3
+                slots.extend(base + bit for bit in _BYTE_BITS[value])
+        return slots
+
+    def get_tunings(self, limit: int = None) -> List:
+        # In catalogue order
+        tunings = ObjectSlots.tunings
+        slots = self.get_slots()
+        return [tunings[slot] for slot in (slots if limit is None else slots[:limit])]
+
+    def get_size(self) -> int:
+        # Bytes used by the bits
+        return (self.bits.bit_length() + 7) >> 3
+
+    def __contains__(self, tuning) -> bool:
+        slot = ObjectSlots.slots.get(tuning, None)
+        return slot is not None and self.bits >> slot & 1 == 1
+
+    def __len__(self) -> int:
+        return bin(self.bits).count('1')
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __or__(self, other: 'ObjectBits') -> 'ObjectBits':
+        return ObjectBits(self.bits | other.bits)
+
+    def __and__(self, other: 'ObjectBits') -> 'ObjectBits':
+        return ObjectBits(self.bits & other.bits)
+
+    def __sub__(self, other: 'ObjectBits') -> 'ObjectBits':
+        return ObjectBits(self.bits & ~other.bits)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ObjectBits) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self):
+        return f'<ObjectBits:{len(self)} objects, {self.get_size()} bytes>'
+
+
+class ObjectSlots:
+    # Selections with less than 1/FILTER_RATIO of the catalogue are filtered object by object
+    FILTER_RATIO = 16
+    # tuning: slot, tunings[slot] is the tuning
+    slots: Dict[Any, int] = {}
+    tunings: List = []
+    _catalogue_size: int = None
+    # Cached selections, key: ObjectBits
+    _cache: Dict[Any, ObjectBits] = {}
+
+    @staticmethod
+    def reset():
+        ObjectSlots.slots = {}
+        ObjectSlots.tunings = []
+        ObjectSlots._catalogue_size = None
+        ObjectSlots._cache = {}
+
+    @staticmethod
+    def update():
+        # The slots are the catalogue positions, they are assigned again if the catalogue changed
+        tuned_classes = services.definition_manager()._tuned_classes
+        if len(tuned_classes) != ObjectSlots._catalogue_size:
+            ObjectSlots.reset()
+            ObjectSlots.tunings = list(tuned_classes.values())
+            ObjectSlots.slots = {tuning: slot for slot, tuning in enumerate(ObjectSlots.tunings)}
+            ObjectSlots._catalogue_size = len(tuned_classes)
+
+    @staticmethod
+    def get_slot(tuning) -> int:
+        slot = ObjectSlots.slots.get(tuning, None)
+        if slot is None:
+            # Not in the catalogue, e.g. a definition of a tag whose tuning is stored elsewhere
+            slot = ObjectSlots.slots[tuning] = len(ObjectSlots.tunings)
+            ObjectSlots.tunings.append(tuning)
+        return slot
+
+    @staticmethod
+    def get_bits(tunings: Iterable) -> ObjectBits:
+        ObjectSlots.update()
+        return ObjectBits.from_slots([ObjectSlots.get_slot(tuning) for tuning in tunings])
+
+    @staticmethod
+    def scan(predicate: Callable[[Any], bool]) -> ObjectBits:
+        # The catalogue tunings matching predicate
+        ObjectSlots.update()
+        Stats.add(Stats.OBJECTS_SCANNED, ObjectSlots._catalogue_size)
+        tunings = ObjectSlots.tunings
+        return ObjectBits.from_slots([slot for slot in range(ObjectSlots._catalogue_size) if predicate(tunings[slot])])
+
+    @staticmethod
+    def get_cached(key, create: Callable[[], ObjectBits]) -> ObjectBits:
+        ObjectSlots.update()
+        bits = ObjectSlots._cache.get(key, None)
+        Stats.add(Stats.INDEX_MISSES if bits is None else Stats.INDEX_HITS)
+        if bits is None:
+            bits = ObjectSlots._cache[key] = create()
+        return bits
+
+    @staticmethod
+    def filter(objects: ObjectBits, key, predicate: Callable[[Any], bool]) -> ObjectBits:
+        # The objects matching predicate. Large selections are intersected with the cached bits of all
+        # matching objects, which cost one scan of the catalogue, small selections are checked one by one.
+        ObjectSlots.update()
+        if key not in ObjectSlots._cache and len(objects) * ObjectSlots.FILTER_RATIO < ObjectSlots._catalogue_size:
+            return ObjectSlots.get_bits([tuning for tuning in objects.get_tunings() if predicate(tuning)])
+        return objects & ObjectSlots.get_cached(key, lambda: ObjectSlots.scan(predicate))
+
+    @staticmethod
+    def filter_attribute(objects: ObjectBits, attribute: str) -> ObjectBits:
+        if attribute == LazyAffordances.ATTRIBUTE:
+            # hasattr() would materialize the lazy affordances
+            return ObjectSlots.filter(objects, ('attribute', attribute), LazyAffordances.has_super_affordances)
+        return ObjectSlots.filter(objects, ('attribute', attribute), lambda tuning: hasattr(tuning, attribute))
+
+    @staticmethod
+    def get_cache_size() -> int:
+        return sum(bits.get_size() for bits in ObjectSlots._cache.values())
+
+    @staticmethod
+    @CommonEventRegistry.handle_events(ModInfo.get_identity().name)
+    def handle_event(event_data: S4CLZoneEarlyLoadEvent):
+        if ObjectSlots._cache:
+            log.info(f'Releasing {len(ObjectSlots._cache)} cached object selections ({ObjectSlots.get_cache_size()} bytes)')
+        ObjectSlots.reset()
@@ -0,0 +1,164 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The operations module processes the XmlInjector snippet sections with a table of Operation handlers.
+# Each Operation declares its tunable key (the section), priority, the attributes an entry requires,
+# the targets and additions of an entry, the key which identifies duplicate additions, the additions
+# already present on a target and the apply step which writes the additions to one target.
+# The engine validates the entries, schedules them by priority, de-duplicates the additions, collects
+# them per target in BatchedAdditions (one write per target after the snippet manager has loaded)
+# and runs the entries and the writes as journaled and timed InjectionUnits.
+# The handlers are registered by AddToTuning, a new operation type only needs a new table entry.
+# With 'release_snippet_payloads' the sections of a snippet are released after its last entry has run.
+
+
+from typing import Any, Callable, Iterable, List, Tuple
+
+from xml_injector.batched_additions import BatchedAdditions
+from xml_injector.injection_scheduler import InjectionScheduler
+from xml_injector.journal import InjectionUnits, Journal
+from xml_injector.log import log
+from xml_injector.settings import Settings
+from xml_injector.snippet_payloads import SnippetPayloads
+from xml_injector.stats import Stats
+
+
+class Operation:
+    def __init__(self, section: str, name: str, priority: int,
+                 get_targets: Callable[[Any, List], Iterable], get_additions: Callable[[Any], Iterable],
+                 apply_fn: Callable[[Any, List], None], required: Tuple[str, ...] = (),
+                 key_fn: Callable[[Any], Any] = None, get_existing: Callable[[Any], Any] = None,
+                 unique: bool = True, batched: bool = True, whole_list: bool = False,
+                 on_duplicate: Callable[[Any, Any, Any], None] = None):
+        self.section = section  # The tunable key in XmlInjector.INSTANCE_TUNABLES
+        self.name = name
+        self.priority = priority
+        self.get_targets = get_targets  # (entry, additions) -> targets
+        self.get_additions = get_additions  # entry -> additions
+        self.apply_fn = apply_fn  # (target, additions) writes the new additions to target
+        self.required = required  # Entry attributes which must be set
+        self.key_fn = key_fn  # Additions with the same key are duplicates, defaults to the addition itself
+        self.get_existing = get_existing  # target -> keys of the additions present on target
+        self.unique = unique  # False: every addition is added, e.g. loot ops with 'merge_duplicate_loot' disabled
+        self.whole_list = whole_list  # The section is one list of additions, not a list of entries
+        self.on_duplicate = on_duplicate  # (target, addition, key) is called for each skipped addition
+        # Not batched: the additions are written while the entry is processed
+        self.batch = BatchedAdditions(name, self.apply, key_fn=key_fn) if batched else None
+
+    @staticmethod
+    def is_testing() -> bool:
+        # AddToTuning.TESTING, imported here as add_to_tuning registers the operations
+        from xml_injector.add_to_tuning import AddToTuning
+        return AddToTuning.TESTING
+
+    def get_key(self, addition) -> Any:
+        return addition if self.key_fn is None else self.key_fn(addition)
+
+    def is_valid(self, entry) -> bool:
+        for attribute in self.required:
+            value = getattr(entry, attribute, None)
+            if value is None or isinstance(value, str):
+                log.warn(f'Tuning warning, missing or invalid {attribute}')
+                return False
+        return True
+
+    def run(self, entry, batched: bool = True):
+        # Process one entry (or the whole list), called by InjectionScheduler as an InjectionUnit.
+        # batched=False writes the additions immediately, for the add_* methods of AddToTuning.
+        if not self.is_valid(entry):
+            return
+        additions = [addition for addition in self.get_additions(entry) if addition is not None]
+        if not additions:
+            return
+        allow_duplicates = not self.unique or Operation.is_testing()
+        for target in self.get_targets(entry, additions):
+            if self.batch is None or not batched:
+                self.apply(target, additions)
+            else:
+                self.batch.add(target, additions, allow_duplicates=allow_duplicates)
+
+    def apply(self, target, additions: List):
+        # Write the additions which are not yet present on target
+        if not self.unique or Operation.is_testing():
+            additions_to_add = additions
+        else:
+            existing = () if self.get_existing is None else self.get_existing(target)
+            keys = set()
+            additions_to_add = []
+            for addition in additions:
+                key = self.get_key(addition)
+                if key not in keys and key not in existing:
+                    keys.add(key)
+                    additions_to_add.append(addition)
+                elif self.on_duplicate is not None:
+                    self.on_duplicate(target, addition, key)
+            duplicates = len(additions) - len(additions_to_add)
+            if duplicates:
+                Stats.add(Stats.DUPLICATES_SKIPPED, duplicates)
+                if self.batch is not None:
+                    self.batch.duplicates += duplicates
+        if additions_to_add:
+            self.apply_fn(target, additions_to_add)
+
+    def __repr__(self):
+        return f'<Operation:{self.section}>'
+
+
+class Operations:
+    registry: List[Operation] = []
+
+    @staticmethod
+    def register(*operations: Operation):
+        Operations.registry.extend(operations)
+
+    @staticmethod
+    def get(section: str) -> Operation:
+        for operation in Operations.registry:
+            if operation.section == section:
+                return operation
+        return None
+
+    @staticmethod
+    def schedule(snippet):
+        # Each entry is processed as its own unit, a failing entry is reverted and can be retried with 'xml_injector.retry'.
+        # The entries are processed by priority, object decoration may be deferred.
+        InjectionScheduler.start()
+        last = None
+        for operation in Operations.registry:
+            entries = getattr(snippet, operation.section, None)
+            if not entries:
+                continue
+            if operation.whole_list:
+                scheduled = InjectionScheduler.schedule(operation.priority, snippet, operation.section, None, operation.run)
+                last = scheduled if last is None or last.key < scheduled.key else last
+            else:
+                for index in range(len(entries)):
+                    scheduled = InjectionScheduler.schedule(operation.priority, snippet, operation.section, index, operation.run)
+                    last = scheduled if last is None or last.key < scheduled.key else last
+        if SnippetPayloads.ENABLED:
+            if last is None:
+                Operations.release(snippet)
+            else:
+                last.on_done = Operations.release
+        InjectionScheduler.run_scheduled()
+
+    @staticmethod
+    def release(snippet):
+        # Sections with failed entries are kept for 'xml_injector.retry'
+        failed = {error.section for error in InjectionUnits.errors if error.snippet_id == snippet.guid64}
+        SnippetPayloads.release(snippet, tuple(operation.section for operation in Operations.registry), failed)
+
+    @staticmethod
+    def log_change(get_message: Callable[[], str]):
+        # The message is only built and logged without the change export ('export_changes'), the export records the same changes
+        if not Settings.get('export_changes', False):
+            log.info(get_message())
+
+    @staticmethod
+    def write(target, attribute: str, value, counter: str = Stats.TUPLES_REBUILT):
+        # All apply steps write through the journal, the write is reverted if the unit fails
+        Journal.setattr(target, attribute, value)
+        Stats.add(counter)
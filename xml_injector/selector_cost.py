@@ -0,0 +1,91 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The selector_cost module guards against object selections which match most of the catalogue,
+# e.g. 'objects_matching_name' with 'a' or a very common tag.
+# Before an ObjectSelection is applied its match count is estimated. Selections above the
+# 'selector_threshold' setting are logged and, depending on 'selector_action', capped or refused.
+# The actual match count is checked as well, the estimate of some selections is too low.
+# For every snippet the objects touched and 'objects touched × additions' are recorded, the most
+# expensive snippets are logged after loading and listed with 'xml_injector.costs'.
+
+
+from typing import Dict, List
+
+import services
+from sims4.resources import Types
+
+from xml_injector.journal import InjectionUnits
+from xml_injector.log import log
+from xml_injector.object_slots import ObjectBits, ObjectSlots
+from xml_injector.settings import Settings
+
+
+class SelectorCost:
+    ACTION_LOG = 'log'
+    ACTION_CAP = 'cap'
+    ACTION_REFUSE = 'refuse'
+    THRESHOLD: int = Settings.get('selector_threshold', 10000)  # 0 disables the check
+    ACTION: str = Settings.get('selector_action', ACTION_LOG)
+    REPORT_SIZE = 10
+    # snippet name: [objects touched, objects touched × additions]
+    snippet_costs: Dict[str, List[int]] = {}
+    refused = 0
+    capped = 0
+
+    @staticmethod
+    def _get_snippet_name() -> str:
+        snippet = InjectionUnits.current_snippet
+        if snippet is None:
+            return '-'
+        return getattr(snippet, '__name__', str(snippet))
+
+    @staticmethod
+    def get_object_bits(object_selection, additions: int) -> ObjectBits:
+        # object_selection.get_object_bits() with the threshold check, additions is the number of items added to each object
+        threshold = SelectorCost.THRESHOLD
+        if threshold and hasattr(object_selection, 'estimate_objects'):
+            estimate = object_selection.estimate_objects()
+            if estimate > threshold:
+                log.warn(f'{SelectorCost._get_snippet_name()}: {object_selection} is estimated to match {estimate} objects (threshold {threshold})')
+                if SelectorCost.ACTION == SelectorCost.ACTION_REFUSE:
+                    log.error(f'{SelectorCost._get_snippet_name()}: {object_selection} refused')
+                    SelectorCost.refused += 1
+                    return ObjectBits()
+        objects = object_selection.get_object_bits()
+        count = len(objects)
+        if threshold and count > threshold:
+            if SelectorCost.ACTION == SelectorCost.ACTION_CAP:
+                log.warn(f'{SelectorCost._get_snippet_name()}: {object_selection} matched {count} objects, capped to {threshold}')
+                SelectorCost.capped += 1
+                objects = ObjectSlots.get_bits(objects.get_tunings(threshold))
+                count = threshold
+            elif SelectorCost.ACTION == SelectorCost.ACTION_REFUSE:
+                # The estimate was below the threshold
+                log.error(f'{SelectorCost._get_snippet_name()}: {object_selection} matched {count} objects (threshold {threshold}), refused')
+                SelectorCost.refused += 1
+                return ObjectBits()
+            else:
+                log.warn(f'{SelectorCost._get_snippet_name()}: {object_selection} matched {count} objects (threshold {threshold})')
+        costs = SelectorCost.snippet_costs.setdefault(SelectorCost._get_snippet_name(), [0, 0])
+        costs[0] += count
+        costs[1] += count * additions
+        return objects
+
+    @staticmethod
+    def get_report(count: int = REPORT_SIZE) -> List[str]:
+        snippet_costs = sorted(SelectorCost.snippet_costs.items(), key=lambda item: -item[1][1])[:count]
+        return [f'{name}: {touched} objects touched, cost {cost}' for name, (touched, cost) in snippet_costs]
+
+    @staticmethod
+    def log_report(*_):
+        if SelectorCost.snippet_costs:
+            log.info(f'Most expensive snippets (objects touched × additions), {SelectorCost.capped} selections capped, {SelectorCost.refused} refused:')
+            for line in SelectorCost.get_report():
+                log.info(f'  {line}')
+
+
+services.get_instance_manager(Types.SNIPPET).add_on_load_complete(SelectorCost.log_report)
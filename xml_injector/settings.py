@@ -0,0 +1,57 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The settings module reads the optional 'The Sims 4/mod_data/xml_injector/settings.ini' file.
+# The file contains a Python dict literal, like '_compile/compile.ini'. Missing keys fall back
+# to the defaults passed to Settings.get(), so an absent or broken file changes nothing.
+
+
+import ast
+import os
+from typing import Any, Dict
+
+from xml_injector.log import log
+from xml_injector.modinfo import ModInfo
+from sims4communitylib.utils.common_log_utils import CommonLogUtils
+
+
+class Settings:
+    FILE_NAME = 'settings.ini'
+    _settings: Dict[str, Any] = None
+
+    @staticmethod
+    def get_mod_data_directory() -> str:
+        return os.path.join(CommonLogUtils.get_sims_documents_location_path(), 'mod_data', ModInfo.get_identity().base_namespace)
+
+    @staticmethod
+    def get(key: str, default: Any = None) -> Any:
+        if Settings._settings is None:
+            Settings._settings = Settings._read()
+        return Settings._settings.get(key, default)
+
+    @staticmethod
+    def set(key: str, value: Any):
+        # Override a setting for this session, e.g. by the offline tools before the optional modules are imported
+        if Settings._settings is None:
+            Settings._settings = Settings._read()
+        Settings._settings[key] = value
+
+    @staticmethod
+    def _read() -> Dict[str, Any]:
+        file_name = os.path.join(Settings.get_mod_data_directory(), Settings.FILE_NAME)
+        if not os.path.exists(file_name):
+            return {}
+        # noinspection PyBroadException
+        try:
+            with open(file_name, 'rt', encoding='UTF-8') as fp:
+                settings = ast.literal_eval(fp.read())
+            if isinstance(settings, dict):
+                log.info(f'Read settings from {file_name}: {settings}')
+                return settings
+            log.error(f'Settings in {file_name} are not a dict, ignoring them.')
+        except Exception as e:
+            log.error(f'Error {e} reading settings from {file_name}, ignoring them.')
+        return {}
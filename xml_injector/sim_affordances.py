@@ -0,0 +1,59 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The sim_affordances module writes the interactions all XmlInjector snippets add to object_sim.
+# Sims, phones and the relationship panel are stored in three tuples of the same tuning. The
+# operations have object_sim as their target and collect the additions per attribute, each tuple is
+# written once, after the snippet manager has loaded and all snippets have been processed.
+
+
+from typing import Dict, List, Tuple
+
+import services
+from objects.definition_manager import DefinitionManager
+
+from xml_injector.log import log
+from xml_injector.operations import Operations
+
+
+class SimAffordances:
+    OBJECT_SIM = 14965  # The instance ID for the object_sim tuning
+    ATTRIBUTES = {
+        '_super_affordances': 'sims',
+        '_phone_affordances': 'phones',
+        '_relation_panel_affordances': 'relpanel',
+    }
+    # attribute: (tuple length before, number of added affordances, tuple length after)
+    counts: Dict[str, Tuple[int, int, int]] = {}
+
+    @staticmethod
+    def get_object_sim():
+        definition_manager = services.definition_manager()
+        return super(DefinitionManager, definition_manager).get(SimAffordances.OBJECT_SIM)
+
+    @staticmethod
+    def get_targets(attribute: str) -> List:
+        object_sim = SimAffordances.get_object_sim()
+        if object_sim is None:
+            log.error(f'object_sim ({SimAffordances.OBJECT_SIM}) not found, cannot add interactions to {SimAffordances.ATTRIBUTES[attribute]}')
+            return []
+        return [object_sim]
+
+    @staticmethod
+    def get_existing(object_sim, attribute: str) -> set:
+        return set(getattr(object_sim, attribute))
+
+    @staticmethod
+    def apply(object_sim, attribute: str, sa_list: List):
+        current = getattr(object_sim, attribute)
+        Operations.log_change(lambda: f'  {object_sim}: adding super_affordances to {SimAffordances.ATTRIBUTES[attribute]}: {sa_list}')
+        Operations.write(object_sim, attribute, current + tuple(sa_list))
+        SimAffordances.counts[attribute] = (len(current), len(sa_list), len(getattr(object_sim, attribute)))
+        log.info(f'object_sim {SimAffordances.ATTRIBUTES[attribute]} affordances (before, added, after): {SimAffordances.counts[attribute]}')
+
+    @staticmethod
+    def get_counts() -> Dict[str, Tuple[int, int, int]]:
+        return {SimAffordances.ATTRIBUTES[attribute]: counts for attribute, counts in SimAffordances.counts.items()}
@@ -36,9 +36,10 @@ from buffs.tunable import TunableBuffReference
 from interactions.base.picker_interaction import DefinitionsFromTags, DefinitionsExplicit, InventoryItems, DefinitionsRandom, DefinitionsTested
 from interactions.utils.loot import LootActionVariant
 from interactions.utils.loot_ops import DoNothingLootOp
-from xml_injector.add_to_tuning import AddToTuning
+from xml_injector.add_to_tuning import AddToTuning  # noqa: F401, registers the operations
 from xml_injector.modinfo import ModInfo
 from xml_injector.object_selection import ObjectSelection
+from xml_injector.operations import Operations
 from xml_injector.version import Version
 from objects.components.name_component import NameComponent
 from objects.components.object_relationship_component import ObjectRelationshipComponent
@@ -356,87 +357,14 @@ class XmlInjector(
         except:
             log.info(f'Processing {str(cls)}')
         version = Version()
-        add_to_tuning = AddToTuning()
         try:
             version.request_version(cls.xml_injector_minimum_version, cls.version_error_dialog)
-
-            for entry in cls.add_interactions_to_objects:
-                if entry.object_selection is None or isinstance(entry.object_selection, str):
-                    log.warn('Tuning warning, missing or invalid object_selection')
-                else:
-                    add_to_tuning.add_super_affordances_to_objects(entry.object_selection, entry._super_affordances)
-
-            if cls.add_interactions_to_sims:
-                add_to_tuning.add_super_affordances_to_sims(cls.add_interactions_to_sims)
-
-            if cls.add_interactions_to_phones:
-                add_to_tuning.add_super_affordances_to_phones(cls.add_interactions_to_phones)
-
-            if cls.add_interactions_to_relationship_panel:
-                add_to_tuning.add_super_affordances_to_relpanel(cls.add_interactions_to_relationship_panel)
-
-            for entry in cls.add_mixer_interactions:
-                add_to_tuning.add_mixer_to_affordance_list(entry.mixer_snippets, entry.affordances)
-
-            for entry in cls.add_to_loot_actions:
-                if entry.loot_actions_ref is None:
-                    log.warn('Tuning warning, missing or invalid loot_actions_ref')
-                else:
-                    add_to_tuning.add_to_loot_actions(entry.loot_actions_ref, entry.loot_actions_to_add)
-
-            for entry in cls.add_to_random_loot_actions:
-                if entry.random_weighted_loot_ref is None:
-                    log.warn('Tuning warning, missing or invalid random_weighted_loot_ref')
-                else:
-                    add_to_tuning.add_to_random_loot_actions(entry.random_weighted_loot_ref, entry.random_loot_actions_to_add)
-            for entry in cls.add_states_to_objects:
-                if isinstance(entry.object_selection, str) or entry.object_selection is None:
-                    log.warn('Tuning warning, missing or invalid object_selection')
-                else:
-                    add_to_tuning.add_states_to_objects(entry.object_selection, entry.state_component)
-
-            for entry in cls.add_name_component_to_objects:
-                if isinstance(entry.object_selection, str) or entry.object_selection is None:
-                    log.warn('Tuning warning, missing or invalid object_selection')
-                else:
-                    add_to_tuning.add_name_component_to_objects(entry.object_selection, entry.name_component)
-            for entry in cls.add_object_relationships_to_objects:
-                if isinstance(entry.object_selection, str) or entry.object_selection is None:
-                    log.warn('Tuning warning, missing or invalid object_selection')
-                else:
-                    add_to_tuning.add_object_relationships_to_objects(entry.object_selection, entry.object_relationships_component)
-            for entry in cls.add_lock_aware_interactions_to_lockable_objects:
-                if isinstance(entry.object_selection, str) or entry.object_selection is None:
-                    log.warn('Tuning warning, missing or invalid object_selection')
-                else:
-                    add_to_tuning.add_lock_aware_interactions_to_lockable_objects(entry.object_selection, entry.super_affordances)
-            for entry in cls.add_buffs_to_trait:
-                if entry.trait is None:
-                    log.warn('Tuning warning, missing or invalid trait')
-                else:
-                    add_to_tuning.add_buffs_to_trait(entry.trait, entry.buffs)
-
-            for entry in cls.add_satisfaction_store_rewards:
-                if entry.new_items is None:
-                    log.warn('Tuning warning, missing or invalid satisfaction reward')
-                else:
-                    add_to_tuning.add_satisfaction_store_rewards(entry.new_items)
-
-            for entry in cls.add_purchase_list_options_to_interactions:
-                if entry.interactions_to_add_to is None or entry.purchase_list_options is None:
-                    log.warn('Tuning warning, missing or invalid interaction or purchase_list_options')
-                else:
-                    add_to_tuning.add_purchase_list_options_to_interactions(entry.interactions_to_add_to, entry.purchase_list_options)
-
-            for entry in cls.add_picker_dialog_categories_to_interactions:
-                if entry.interactions_to_add_to is None or entry.picker_dialog_categories is None:
-                    log.warn('Tuning warning, missing or invalid interaction or purchase_list_options')
-                else:
-                    add_to_tuning.add_picker_dialog_categories_to_interactions(entry.interactions_to_add_to, entry.picker_dialog_categories)
-
         except Exception as e:
             log.error(f'Exception {e} occurred processing XmlInjector tuning instance {cls}')
 
+        # The sections are processed by the operations registered by AddToTuning
+        Operations.schedule(cls)
+
     def __repr__(self):
         return f'<XmlInjector:({self.__name__})>'
 
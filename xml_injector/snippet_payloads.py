@@ -0,0 +1,59 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The snippet_payloads module implements the opt-in 'release_snippet_payloads' setting.
+# The XmlInjector snippet classes keep their tuned sections (object selections, state components,
+# loot ops, purchase options, ...) for the rest of the session, although they are not read again once
+# all entries of the snippet have been processed. With the setting the sections are replaced with
+# empty tuples after the last entry of a snippet has run, only a slotted summary with the name, id
+# and the number of entries per section is kept and listed with 'xml_injector.payloads'.
+# Sections with failed entries are not released, 'xml_injector.retry' reads the entries again.
+# 'xml_injector.dump_catalogue' needs the sections and should be used with the setting disabled.
+
+
+from typing import List, Set, Tuple
+
+from xml_injector.log import log
+from xml_injector.settings import Settings
+
+
+class _SnippetSummary:
+    __slots__ = ('name', 'guid64', 'counts')
+
+    def __init__(self, name: str, guid64: int, counts: Tuple[int, ...]):
+        self.name = name
+        self.guid64 = guid64
+        self.counts = counts  # Number of entries per section of SnippetPayloads.sections
+
+
+class SnippetPayloads:
+    ENABLED = Settings.get('release_snippet_payloads', False)
+    REPORT_SIZE = 20
+    sections: Tuple[str, ...] = ()
+    summaries: List[_SnippetSummary] = []
+    released_entries = 0
+
+    @staticmethod
+    def release(snippet, sections: Tuple[str, ...], kept: Set[str] = frozenset()):
+        # Called after the last entry of snippet has been processed, the kept sections are not released
+        counts = []
+        for section in sections:
+            entries = () if section in kept else getattr(snippet, section, None) or ()
+            counts.append(len(entries))
+            if entries:
+                setattr(snippet, section, ())
+        SnippetPayloads.sections = sections
+        SnippetPayloads.released_entries += sum(counts)
+        SnippetPayloads.summaries.append(_SnippetSummary(getattr(snippet, '__name__', str(snippet)), getattr(snippet, 'guid64', 0), tuple(counts)))
+
+    @staticmethod
+    def get_report(count: int = REPORT_SIZE) -> List[str]:
+        report = [f'{len(SnippetPayloads.summaries)} snippets released, {SnippetPayloads.released_entries} entries']
+        summaries = sorted(SnippetPayloads.summaries, key=lambda summary: -sum(summary.counts))[:count]
+        for summary in summaries:
+            sections = ', '.join(f'{section} {entries}' for section, entries in zip(SnippetPayloads.sections, summary.counts) if entries)
+            report.append(f'{summary.name} ({summary.guid64}): {sections}')
+        return report
@@ -0,0 +1,53 @@
+#
+# LICENSE https://creativecommons.org/licenses/by/4.0/ https://creativecommons.org/licenses/by/4.0/legalcode
+# © 2024 https://github.com/Oops19
+#
+
+
+# The stats module keeps running counters of the injector hot paths and the time spent per
+# operation type. They are shown and reset with the 'xml_injector.stats' console command, so
+# performance can be checked on a player's machine without verbose logging.
+
+
+import time
+from typing import Dict, List
+
+
+class Stats:
+    OBJECTS_SCANNED = 'objects scanned'
+    INDEX_HITS = 'index hits'
+    INDEX_MISSES = 'index misses'
+    TUPLES_REBUILT = 'tuples rebuilt'
+    CLONES = 'clones made'
+    DUPLICATES_SKIPPED = 'duplicates skipped'
+    counters: Dict[str, int] = {}
+    # operation: [calls, seconds]
+    timings: Dict[str, List] = {}
+
+    @staticmethod
+    def add(counter: str, count: int = 1):
+        Stats.counters[counter] = Stats.counters.get(counter, 0) + count
+
+    @staticmethod
+    def add_time(operation: str, seconds: float):
+        timing = Stats.timings.get(operation, None)
+        if timing is None:
+            timing = Stats.timings[operation] = [0, 0.0]
+        timing[0] += 1
+        timing[1] += seconds
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    @staticmethod
+    def reset():
+        Stats.counters = {}
+        Stats.timings = {}
+
+    @staticmethod
+    def get_report() -> List[str]:
+        report = [f'{counter}: {count}' for counter, count in sorted(Stats.counters.items())]
+        for operation, (calls, seconds) in sorted(Stats.timings.items(), key=lambda item: -item[1][1]):
+            report.append(f'{operation}: {calls} calls, {seconds * 1000:.1f} ms')
+        return report